@@ -28,17 +28,32 @@ const API = {
         }
     },
 
-    async getPhotos(personName, category = 'solo') {
-        const response = await fetch(`${this.baseUrl}/photos/${encodeURIComponent(personName)}?category=${category}`);
-        return response.json();
+    // Returns one page: { items, next_cursor, total }. `total` is only
+    // sent with the first page (no cursor).
+    async getPhotos(personName, category = 'solo', cursor = null, limit = 60) {
+        const params = new URLSearchParams({ category, limit });
+        if (cursor) params.set('cursor', cursor);
+        const response = await fetch(`${this.baseUrl}/photos/${encodeURIComponent(personName)}?${params}`);
+        const data = await response.json();
+
+        // Older servers return the whole list as a plain array
+        if (Array.isArray(data)) return { items: data, next_cursor: null, total: data.length };
+        return data;
+    },
+
+    // Without a size the original file is returned (used for downloads)
+    getPhotoUrl(photoPath, size = null) {
+        const sizeParam = size ? `&size=${size}` : '';
+        return `${this.baseUrl}/photo?path=${encodeURIComponent(photoPath)}${sizeParam}`;
     },
 
-    getPhotoUrl(photoPath) {
-        return `${this.baseUrl}/photo?path=${encodeURIComponent(photoPath)}`;
+    // Pyramid levels served by the thumbnail cache: 256 / 768 / 1600
+    getThumbnailUrl(photoPath, size = 256) {
+        return `${this.baseUrl}/thumbnail?path=${encodeURIComponent(photoPath)}&size=${size}`;
     },
 
-    getThumbnailUrl(photoPath) {
-        return `${this.baseUrl}/thumbnail?path=${encodeURIComponent(photoPath)}`;
+    getThumbnailSrcset(photoPath) {
+        return `${this.getThumbnailUrl(photoPath, 256)} 256w, ${this.getThumbnailUrl(photoPath, 768)} 768w`;
     }
 };
 
@@ -52,6 +67,10 @@ const State = {
     enrolledUser: null,
     currentGalleryTab: 'solo',
     galleryPhotos: { solo: [], group: [] },
+    galleryPaging: {
+        solo: { nextCursor: null, total: 0, loading: false },
+        group: { nextCursor: null, total: 0, loading: false },
+    },
     currentPhotoIndex: 0,
     videoStream: null,
 
@@ -206,6 +225,16 @@ function setupEventListeners() {
         });
     }
 
+    // One delegated handler instead of one listener per tile
+    if (Elements.galleryGrid) {
+        Elements.galleryGrid.addEventListener('click', (e) => {
+            const card = e.target.closest('.photo-card');
+            if (card) openLightbox(parseInt(card.dataset.index));
+        });
+    }
+    window.addEventListener('scroll', () => VirtualGrid.schedule(), { passive: true });
+    window.addEventListener('resize', () => VirtualGrid.schedule(true));
+
     // Lightbox
     if (Elements.lightboxClose) Elements.lightboxClose.addEventListener('click', closeLightbox);
     if (Elements.lightboxPrev) Elements.lightboxPrev.addEventListener('click', () => navigateLightbox(-1));
@@ -285,16 +314,37 @@ function handleScroll() {
 // ============================================================
 async function loadStats() {
     const stats = await API.getStats();
-    if (stats) {
-        if (Elements.statPhotos) animateNumber(Elements.statPhotos, stats.total_photos || 0);
-        if (Elements.statGuests) animateNumber(Elements.statGuests, stats.total_enrolled || 0);
-        if (Elements.statFaces) animateNumber(Elements.statFaces, stats.total_faces || 0);
+    if (stats) applyStats(stats);
+}
+
+function applyStats(stats) {
+    if (Elements.statPhotos && stats.total_photos !== undefined) animateNumber(Elements.statPhotos, stats.total_photos);
+    if (Elements.statGuests && stats.total_enrolled !== undefined) animateNumber(Elements.statGuests, stats.total_enrolled);
+    if (Elements.statFaces && stats.total_faces !== undefined) animateNumber(Elements.statFaces, stats.total_faces);
+}
+
+// Live counters pushed by the server (/api/events). Each message carries only
+// the counters that changed; the first one is a full snapshot. EventSource
+// reconnects on its own after a drop.
+function subscribeStats() {
+    if (!window.EventSource) {
+        loadStats();
+        return;
     }
+    const source = new EventSource(`${API.baseUrl}/events`);
+    source.addEventListener('batch', (e) => {
+        const batch = JSON.parse(e.data);
+        if (batch.counts) applyStats(batch.counts);
+    });
+    source.onerror = () => {
+        // Older server without the stream: fall back to a one-off fetch
+        if (source.readyState === EventSource.CLOSED) loadStats();
+    };
 }
 
-function animateNumber(element, target) {
-    const duration = 2000;
-    const start = 0;
+function animateNumber(element, target, duration = 2000) {
+    const start = parseInt(element.textContent.replace(/\D/g, '')) || 0;
+    if (start === target) return;
     const startTime = performance.now();
 
     function update(currentTime) {
@@ -320,7 +370,7 @@ function animateStatsOnLoad() {
     const observer = new IntersectionObserver((entries) => {
         entries.forEach(entry => {
             if (entry.isIntersecting) {
-                loadStats();
+                subscribeStats();
                 observer.disconnect();
             }
         });
@@ -591,8 +641,8 @@ function handleTryAgain() {
 
 async function loadPreviewPhotos(personName) {
     try {
-        const photos = await API.getPhotos(personName, 'solo');
-        const preview = photos.slice(0, 3);
+        const page = await API.getPhotos(personName, 'solo', null, 3);
+        const preview = page.items.slice(0, 3);
 
         if (Elements.galleryPreview) {
             Elements.galleryPreview.innerHTML = preview.map(photo => `
@@ -650,16 +700,17 @@ function closeGallery() {
 async function loadGalleryPhotos() {
     if (!State.enrolledUser) return;
 
+    VirtualGrid.clear();
     try {
-        // Load solo photos
-        const soloPhotos = await API.getPhotos(State.enrolledUser.person_name, 'solo');
-        State.galleryPhotos.solo = soloPhotos;
-        if (Elements.tabSoloCount) Elements.tabSoloCount.textContent = soloPhotos.length;
+        // First page of both tabs; the rest streams in while scrolling
+        await Promise.all(['solo', 'group'].map(tab => {
+            State.galleryPhotos[tab] = [];
+            State.galleryPaging[tab] = { nextCursor: null, total: 0, loading: false };
+            return loadNextPage(tab, true);
+        }));
 
-        // Load group photos
-        const groupPhotos = await API.getPhotos(State.enrolledUser.person_name, 'group');
-        State.galleryPhotos.group = groupPhotos;
-        if (Elements.tabGroupCount) Elements.tabGroupCount.textContent = groupPhotos.length;
+        if (Elements.tabSoloCount) Elements.tabSoloCount.textContent = State.galleryPaging.solo.total;
+        if (Elements.tabGroupCount) Elements.tabGroupCount.textContent = State.galleryPaging.group.total;
 
         // Render current tab
         renderGallery();
@@ -669,6 +720,23 @@ async function loadGalleryPhotos() {
     }
 }
 
+async function loadNextPage(tab, first = false) {
+    const paging = State.galleryPaging[tab];
+    if (paging.loading || (!first && !paging.nextCursor)) return;
+
+    paging.loading = true;
+    try {
+        const page = await API.getPhotos(State.enrolledUser.person_name, tab, paging.nextCursor);
+        State.galleryPhotos[tab] = State.galleryPhotos[tab].concat(page.items);
+        paging.nextCursor = page.next_cursor;
+        if (page.total !== undefined) paging.total = page.total;
+    } finally {
+        paging.loading = false;
+    }
+
+    if (!first && tab === State.currentGalleryTab) VirtualGrid.schedule(true);
+}
+
 function switchTab(tab) {
     State.currentGalleryTab = tab;
 
@@ -685,32 +753,120 @@ function renderGallery() {
     const photos = State.galleryPhotos[State.currentGalleryTab] || [];
 
     if (photos.length === 0) {
-        if (Elements.galleryGrid) Elements.galleryGrid.innerHTML = '';
+        VirtualGrid.clear();
         if (Elements.galleryEmpty) Elements.galleryEmpty.classList.remove('hidden');
         return;
     }
 
     if (Elements.galleryEmpty) Elements.galleryEmpty.classList.add('hidden');
-
-    if (Elements.galleryGrid) {
-        Elements.galleryGrid.innerHTML = photos.map((photo, index) => `
-        <div class="photo-card" data-index="${index}">
-          <img src="${API.getThumbnailUrl(photo.path)}" alt="Photo" loading="lazy">
-          <div class="photo-overlay">
-            <span>View Full</span>
-          </div>
-        </div>
-      `).join('');
-
-        // Add click handlers
-        Elements.galleryGrid.querySelectorAll('.photo-card').forEach(card => {
-            card.addEventListener('click', () => {
-                const index = parseInt(card.dataset.index);
-                openLightbox(index);
-            });
+    VirtualGrid.schedule(true);
+}
+
+function createPhotoCard(photo, index) {
+    const card = document.createElement('div');
+    card.className = 'photo-card';
+    card.dataset.index = index;
+    // sizes follows .gallery-grid: one column on small phones, minmax(200px, 1fr)
+    // tracks up to 768px, minmax(280px, 1fr) above. 320px makes desktops pick the
+    // 768 level instead of upscaling the 256 one into a 280px+ tile.
+    card.innerHTML = `
+      <img src="${API.getThumbnailUrl(photo.path)}" srcset="${API.getThumbnailSrcset(photo.path)}"
+           sizes="(max-width: 440px) 100vw, (max-width: 768px) 50vw, 320px" alt="Photo" loading="lazy" decoding="async">
+      <div class="photo-overlay">
+        <span>View Full</span>
+      </div>
+    `;
+    return card;
+}
+
+
+// ============================================================
+// Virtualized Gallery Grid
+// ============================================================
+// Only the rows around the viewport exist in the DOM. Skipped rows are
+// represented by top/bottom padding on the grid, so the CSS grid layout
+// and the page scroll height stay the same as a fully rendered list.
+const VirtualGrid = {
+    overscanRows: 3,
+    cards: new Map(),      // photo index -> card element (current window only)
+    tab: null,
+    first: -1,
+    last: -1,
+    scheduled: false,
+    dirty: false,
+
+    schedule(force = false) {
+        if (force) this.dirty = true;
+        if (this.scheduled) return;
+        this.scheduled = true;
+        requestAnimationFrame(() => {
+            this.scheduled = false;
+            this.render();
         });
+    },
+
+    clear() {
+        this.cards.clear();
+        this.first = this.last = -1;
+        if (Elements.galleryGrid) {
+            Elements.galleryGrid.replaceChildren();
+            Elements.galleryGrid.style.paddingTop = '';
+            Elements.galleryGrid.style.paddingBottom = '';
+        }
+    },
+
+    render() {
+        const grid = Elements.galleryGrid;
+        if (!grid || !Elements.gallerySection || Elements.gallerySection.classList.contains('hidden')) return;
+
+        const tab = State.currentGalleryTab;
+        const photos = State.galleryPhotos[tab] || [];
+        if (tab !== this.tab) {
+            this.clear();
+            this.tab = tab;
+        }
+        if (photos.length === 0) return;
+
+        // Layout: columns come from the CSS grid itself
+        const style = getComputedStyle(grid);
+        const columns = Math.max(1, style.gridTemplateColumns.split(' ').filter(Boolean).length);
+        const gap = parseFloat(style.rowGap) || 0;
+        const innerWidth = grid.clientWidth - parseFloat(style.paddingLeft) - parseFloat(style.paddingRight);
+        const rowHeight = (innerWidth - gap * (columns - 1)) / columns + gap;  // tiles are square
+        const totalRows = Math.ceil(photos.length / columns);
+
+        const gridTop = grid.getBoundingClientRect().top + window.scrollY;
+        const viewTop = window.scrollY - gridTop;
+        const first = Math.max(0, Math.floor(viewTop / rowHeight) - this.overscanRows);
+        const last = Math.min(totalRows - 1, Math.ceil((viewTop + window.innerHeight) / rowHeight) + this.overscanRows);
+
+        if (!this.dirty && first === this.first && last === this.last) return;
+        this.dirty = false;
+        this.first = first;
+        this.last = last;
+
+        const start = first * columns;
+        const end = Math.min(photos.length, (last + 1) * columns);
+        const next = new Map();
+        const nodes = [];
+        for (let i = start; i < end; i++) {
+            // Reuse tiles that stay in view so their images don't reload
+            const card = this.cards.get(i) || createPhotoCard(photos[i], i);
+            next.set(i, card);
+            nodes.push(card);
+        }
+        this.cards = next;
+
+        grid.style.paddingTop = `${first * rowHeight}px`;
+        grid.style.paddingBottom = `${Math.max(0, totalRows - 1 - last) * rowHeight}px`;
+        grid.replaceChildren(...nodes);
+
+        // Infinite scroll: fetch the next page before the user reaches the end
+        if (end >= photos.length - columns * this.overscanRows) {
+            loadNextPage(tab);
+        }
     }
-}
+};
 
 
 // ============================================================
@@ -731,6 +887,7 @@ function closeLightbox() {
 function navigateLightbox(direction) {
     const photos = State.galleryPhotos[State.currentGalleryTab] || [];
     State.currentPhotoIndex = (State.currentPhotoIndex + direction + photos.length) % photos.length;
+    if (State.currentPhotoIndex >= photos.length - 3) loadNextPage(State.currentGalleryTab);
     updateLightbox();
 }
 
@@ -740,8 +897,9 @@ function updateLightbox() {
 
     if (!photo) return;
 
-    if (Elements.lightboxImage) Elements.lightboxImage.src = API.getPhotoUrl(photo.path);
-    if (Elements.lightboxCounter) Elements.lightboxCounter.textContent = `${State.currentPhotoIndex + 1} / ${photos.length}`;
+    if (Elements.lightboxImage) Elements.lightboxImage.src = API.getPhotoUrl(photo.path, 1600);
+    const total = Math.max(State.galleryPaging[State.currentGalleryTab].total, photos.length);
+    if (Elements.lightboxCounter) Elements.lightboxCounter.textContent = `${State.currentPhotoIndex + 1} / ${total}`;
 
     if (Elements.downloadBtn) {
         Elements.downloadBtn.href = API.getPhotoUrl(photo.path);
@@ -1,6 +1,6 @@
 import sys
 import os
-import subprocess
+import logging
 import threading
 import time
 import multiprocessing
@@ -17,16 +17,15 @@ sys.path.insert(0, str(FRONTEND_DIR))
 try:
     import customtkinter as ctk
 except ImportError:
-    print("CustomTkinter not found. Installing...")
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "customtkinter"])
-    import customtkinter as ctk
+    sys.exit("CustomTkinter is not installed. Run: pip install customtkinter")
 
 import tkinter as tk
 import math
-from PIL import Image, ImageTk, ImageFilter, ImageEnhance
 
-from app.config import get_config
-from app.db import get_db
+# PIL, app.config and app.db are imported where they are used (thumbnail
+# threads, folder actions) so the window can paint before they load.
+
+logger = logging.getLogger(__name__)
 
 
 # =============================================================================
@@ -51,6 +50,101 @@ COLORS = {
 }
 
 
+# =============================================================================
+# Shared Animation Clock
+# =============================================================================
+class AnimationClock:
+    """
+    One after() chain for every dashboard animation.
+    
+    Widgets subscribe a callback with the interval they want. The clock only
+    ticks while something is subscribed and stops while the window is
+    minimized, so an idle or hidden dashboard schedules nothing at all.
+    Each tick sleeps until the earliest subscriber is due (never less than
+    FRAME_MS), so a lone 1 s pulse costs one wakeup per second, not 30.
+    """
+    
+    FRAME_MS = 33
+    
+    def __init__(self, root):
+        self.root = root
+        self._subs = {}  # callback -> [interval_ms, next_due_ms]
+        self._after_id = None
+        self._after_due = 0.0   # monotonic ms the pending after() fires at
+        self._paused = False
+        root.bind("<Unmap>", self._on_unmap, add="+")
+        root.bind("<Map>", self._on_map, add="+")
+    
+    def subscribe(self, callback, interval_ms: int):
+        """Call callback() every interval_ms, starting on the next frame."""
+        if callback in self._subs:
+            self._subs[callback][0] = interval_ms
+        else:
+            self._subs[callback] = [interval_ms, 0.0]
+        self._wake()
+    
+    def unsubscribe(self, callback):
+        self._subs.pop(callback, None)
+        if not self._subs:
+            self._sleep()
+    
+    def _wake(self):
+        """(Re)arm the after() for the earliest due subscriber."""
+        if not self._subs or self._paused:
+            return
+        now = time.monotonic() * 1000
+        due = max(now + self.FRAME_MS, min(entry[1] for entry in self._subs.values()))
+        if self._after_id is not None:
+            if self._after_due <= due:
+                return
+            self.root.after_cancel(self._after_id)
+        self._after_due = due
+        self._after_id = self.root.after(max(1, math.ceil(due - now)), self._tick)
+    
+    def _sleep(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+    
+    def _tick(self):
+        self._after_id = None
+        now = time.monotonic() * 1000 + 1     # after() may fire a hair early
+        for callback, entry in list(self._subs.items()):
+            if now < entry[1] or callback not in self._subs:
+                continue
+            entry[1] = now + entry[0]
+            try:
+                callback()
+            except tk.TclError:
+                # Widget was destroyed while still subscribed
+                self._subs.pop(callback, None)
+            except Exception:
+                logger.exception(f"Animation callback {callback!r} failed, unsubscribing it")
+                self._subs.pop(callback, None)
+        self._wake()
+    
+    def _on_unmap(self, event):
+        if event.widget is self.root:
+            self._paused = True
+            self._sleep()
+    
+    def _on_map(self, event):
+        if event.widget is self.root and self._paused:
+            self._paused = False
+            self._wake()
+
+
+_animation_clock = None
+
+
+def get_animation_clock(widget) -> AnimationClock:
+    """The clock for widget's window, created on first use."""
+    global _animation_clock
+    if _animation_clock is None:
+        _animation_clock = AnimationClock(widget.winfo_toplevel())
+    return _animation_clock
+
+
 # =============================================================================
 # Animated Status Indicator
 # =============================================================================
@@ -72,20 +166,21 @@ class StatusIndicator(ctk.CTkFrame):
     def set_running(self):
         self._pulsing = True
         self.label.configure(text="Running", text_color=COLORS["success"])
-        self._pulse()
+        get_animation_clock(self).subscribe(self._pulse, 400)
     
     def set_starting(self):
         self._pulsing = True
         self.label.configure(text="Starting...", text_color=COLORS["warning"])
-        self._pulse()
+        get_animation_clock(self).subscribe(self._pulse, 400)
     
     def set_stopping(self):
         self._pulsing = True
         self.label.configure(text="Stopping...", text_color=COLORS["warning"])
-        self._pulse()
+        get_animation_clock(self).subscribe(self._pulse, 400)
     
     def set_stopped(self):
         self._pulsing = False
+        get_animation_clock(self).unsubscribe(self._pulse)
         self.dot.configure(text_color=COLORS["text_secondary"])
         self.label.configure(text="Stopped", text_color=COLORS["text_secondary"])
     
@@ -99,8 +194,6 @@ class StatusIndicator(ctk.CTkFrame):
         
         self.dot.configure(text_color=colors[self._pulse_step % len(colors)])
         self._pulse_step += 1
-        
-        self.after(400, self._pulse)
 
 
 # =============================================================================
@@ -148,7 +241,7 @@ class SystemHealthIndicator(ctk.CTkFrame):
         self._target_scale = 1.0
         self.configure(border_color=COLORS["success"])
         self.label.configure(text="System Idle", text_color=COLORS["success"])
-        self._pulse()
+        get_animation_clock(self).subscribe(self._pulse, 500)
     
     def set_busy(self):
         """At least one worker is busy - show red/orange pulsating dot."""
@@ -160,7 +253,7 @@ class SystemHealthIndicator(ctk.CTkFrame):
         self._target_scale = 1.05
         self.configure(border_color=COLORS["warning"])
         self.label.configure(text="Workers Active", text_color=COLORS["warning"])
-        self._pulse()
+        get_animation_clock(self).subscribe(self._pulse, 500)
     
     def set_offline(self):
         """System is stopped - show grey static dot."""
@@ -170,6 +263,7 @@ class SystemHealthIndicator(ctk.CTkFrame):
         self._state = "offline"
         self._pulsing = False
         self._target_scale = 1.0
+        get_animation_clock(self).unsubscribe(self._pulse)
         self.configure(border_color=COLORS["border"])
         self.dot.configure(text_color=COLORS["text_secondary"])
         self.label.configure(text="System Offline", text_color=COLORS["text_secondary"])
@@ -197,8 +291,6 @@ class SystemHealthIndicator(ctk.CTkFrame):
         
         self.dot.configure(text_color=colors[self._pulse_step % len(colors)])
         self._pulse_step += 1
-        
-        self.after(500, self._pulse)
 
 class StatCard(ctk.CTkFrame):
     """A stat card with big number and label — peach/beige background."""
@@ -277,6 +369,9 @@ class StatusCard(ctk.CTkFrame):
 class ProcessingWidget(ctk.CTkFrame):
     """Animated circular progress bar with percentage and status."""
     
+    RING_RADIUS = 45
+    RING_WIDTH = 6
+    
     def __init__(self, parent):
         super().__init__(parent, fg_color=COLORS["bg_card"], corner_radius=14, border_width=1, border_color=COLORS["border"])
         
@@ -315,6 +410,7 @@ class ProcessingWidget(ctk.CTkFrame):
         self._completed = 0
         self._total = 0
         
+        self._build_ring()
         self._draw_ring()
 
     def set_appearance_mode(self, mode):
@@ -323,67 +419,71 @@ class ProcessingWidget(ctk.CTkFrame):
         self.canvas.configure(bg=bg)
         self._draw_ring()
 
+    def _build_ring(self):
+        """Create the ring's canvas items once; _draw_ring only updates them."""
+        cx, cy = self.canvas_size / 2, self.canvas_size / 2
+        r = self.RING_RADIUS
+        w = self.RING_WIDTH
+        
+        self._ring_track = self.canvas.create_oval(cx-r, cy-r, cx+r, cy+r, width=w)
+        self._ring_arc = self.canvas.create_arc(
+            cx-r, cy-r, cx+r, cy+r,
+            start=90, extent=0, width=w, style="arc", state="hidden"
+        )
+        self._ring_dot = self.canvas.create_oval(0, 0, 0, 0, outline="", state="hidden")
+        self._ring_value = self.canvas.create_text(cx, cy, text="")
+        self._ring_unit = self.canvas.create_text(cx, cy + 16, text="")
+    
     def _draw_ring(self):
-        """Draw the circular progress ring with current state."""
-        self.canvas.delete("all")
+        """Update the ring items for the current progress and mode."""
+        canvas = self.canvas
         cx, cy = self.canvas_size / 2, self.canvas_size / 2
-        r = 45
-        line_w = 6
+        r = self.RING_RADIUS
+        dark = self._mode == "dark"
         
-        track_color = "#3a3a3c" if self._mode == "dark" else "#e0e0e0"
-        self.canvas.create_oval(cx-r, cy-r, cx+r, cy+r, outline=track_color, width=line_w)
+        track_color = "#3a3a3c" if dark else "#e0e0e0"
+        canvas.itemconfigure(self._ring_track, outline=track_color)
         
         progress = self._current_progress
         if progress > 0:
             extent = progress * 360
             
             if progress >= 1.0:
-                arc_color = COLORS["success"][1] if self._mode == "dark" else COLORS["success"][0]
+                arc_color = COLORS["success"][1] if dark else COLORS["success"][0]
             else:
-                arc_color = COLORS["accent"][1] if self._mode == "dark" else COLORS["accent"][0]
+                arc_color = COLORS["accent"][1] if dark else COLORS["accent"][0]
             
-            self.canvas.create_arc(
-                cx-r, cy-r, cx+r, cy+r,
-                start=90, extent=-extent,
-                outline=arc_color, width=line_w, style="arc"
-            )
+            canvas.itemconfigure(self._ring_arc, extent=-extent, outline=arc_color, state="normal")
             
-            if 0 < progress < 1.0:
+            if progress < 1.0:
                 angle_rad = math.radians(90 - extent)
                 dot_x = cx + r * math.cos(angle_rad)
                 dot_y = cy - r * math.sin(angle_rad)
                 dot_r = 4
-                self.canvas.create_oval(
-                    dot_x-dot_r, dot_y-dot_r, dot_x+dot_r, dot_y+dot_r,
-                    fill=arc_color, outline=""
-                )
-        
-        pct_color = COLORS["text_primary"][1] if self._mode == "dark" else COLORS["text_primary"][0]
+                canvas.coords(self._ring_dot, dot_x-dot_r, dot_y-dot_r, dot_x+dot_r, dot_y+dot_r)
+                canvas.itemconfigure(self._ring_dot, fill=arc_color, state="normal")
+            else:
+                canvas.itemconfigure(self._ring_dot, state="hidden")
+        else:
+            canvas.itemconfigure(self._ring_arc, state="hidden")
+            canvas.itemconfigure(self._ring_dot, state="hidden")
         
         if self._total == 0 and not self._animating:
-            self.canvas.create_text(
-                cx, cy - 4, text="--",
-                fill=track_color, font=("Segoe UI", 24, "bold")
-            )
-            self.canvas.create_text(
-                cx, cy + 16, text="IDLE",
-                fill=track_color, font=("Segoe UI", 9)
-            )
+            canvas.coords(self._ring_value, cx, cy - 4)
+            canvas.itemconfigure(self._ring_value, text="--", fill=track_color, font=("Segoe UI", 24, "bold"))
+            canvas.itemconfigure(self._ring_unit, text="IDLE", fill=track_color, font=("Segoe UI", 9), state="normal")
         elif progress >= 1.0:
-            done_color = COLORS["success"][1] if self._mode == "dark" else COLORS["success"][0]
-            self.canvas.create_text(
-                cx, cy - 2, text="DONE",
-                fill=done_color, font=("Segoe UI", 18, "bold")
-            )
+            done_color = COLORS["success"][1] if dark else COLORS["success"][0]
+            canvas.coords(self._ring_value, cx, cy - 2)
+            canvas.itemconfigure(self._ring_value, text="DONE", fill=done_color, font=("Segoe UI", 18, "bold"))
+            canvas.itemconfigure(self._ring_unit, state="hidden")
         else:
-            pct = int(progress * 100)
-            self.canvas.create_text(
-                cx, cy - 6, text=f"{pct}",
-                fill=pct_color, font=("Segoe UI", 28, "bold")
-            )
-            self.canvas.create_text(
-                cx, cy + 16, text="%",
-                fill=COLORS["text_secondary"][1] if self._mode == "dark" else COLORS["text_secondary"][0],
+            pct_color = COLORS["text_primary"][1] if dark else COLORS["text_primary"][0]
+            canvas.coords(self._ring_value, cx, cy - 6)
+            canvas.itemconfigure(self._ring_value, text=f"{int(progress * 100)}", fill=pct_color, font=("Segoe UI", 28, "bold"))
+            canvas.itemconfigure(
+                self._ring_unit, text="%", state="normal",
+                fill=COLORS["text_secondary"][1] if dark else COLORS["text_secondary"][0],
                 font=("Segoe UI", 11)
             )
 
@@ -406,14 +506,18 @@ class ProcessingWidget(ctk.CTkFrame):
         else:
             self.progress_label.configure(text=f"{completed} / {total} Photos")
             self.status_label.configure(text="Processing...", text_color=COLORS["accent"])
+        
+        if self._animating and self._current_progress != self._target_progress:
+            get_animation_clock(self).subscribe(self._animate, 33)
 
     def start_processing(self):
         if not self._animating:
             self._animating = True
-            self._animate()
+            get_animation_clock(self).subscribe(self._animate, 33)
 
     def stop_processing(self):
         self._animating = False
+        get_animation_clock(self).unsubscribe(self._animate)
         if self._total == 0:
             self.status_label.configure(text="Idle", text_color=COLORS["text_secondary"])
             self._current_progress = 0
@@ -425,17 +529,15 @@ class ProcessingWidget(ctk.CTkFrame):
         self._draw_ring()
 
     def _animate(self):
-        if not self._animating:
-            return
-        
         diff = self._target_progress - self._current_progress
         if abs(diff) > 0.002:
             self._current_progress += diff * 0.12
         else:
+            # Settled: nothing moves until the next update_progress()
             self._current_progress = self._target_progress
+            get_animation_clock(self).unsubscribe(self._animate)
         
         self._draw_ring()
-        self.after(33, self._animate)
 
 class CloudWidget(ctk.CTkFrame):
     """Animated cloud upload status."""
@@ -460,11 +562,18 @@ class CloudWidget(ctk.CTkFrame):
             self, text="Synced", font=("Segoe UI", 12),
             text_color=COLORS["text_secondary"]
         )
-        self.status_label.pack(pady=(0, 10))
+        self.status_label.pack(pady=(0, 2))
+        
+        self.detail_label = ctk.CTkLabel(
+            self, text="", font=("Segoe UI", 10),
+            text_color=COLORS["text_secondary"]
+        )
+        self.detail_label.pack(pady=(0, 10))
         
         self._uploading = False
         self._offset = 0
         self._mode = "light"
+        self._progress = None  # None = indeterminate, else 0.0-1.0
         
         self.draw_static_cloud()
 
@@ -472,25 +581,68 @@ class CloudWidget(ctk.CTkFrame):
         self._mode = mode.lower()
         bg = COLORS["bg_card"][1] if self._mode == "dark" else COLORS["bg_card"][0]
         self.canvas.configure(bg=bg)
-        if not self._uploading:
+        if self._uploading:
+            self._draw_uploading_cloud()
+        else:
             self.draw_static_cloud()
 
     def draw_static_cloud(self):
         self.canvas.delete("all")
         self._draw_cloud_icon(offset=0, color=COLORS["text_secondary"][1] if self._mode == "dark" else COLORS["text_secondary"][0])
 
+    def _draw_uploading_cloud(self):
+        self.canvas.delete("all")
+        cloud_color = COLORS["text_primary"][1] if self._mode == "dark" else COLORS["text_primary"][0]
+        self._draw_cloud_icon(offset=self._offset, color=cloud_color)
+
     def start_uploading(self):
         if not self._uploading:
             self._uploading = True
             self.status_label.configure(text="Uploading...", text_color=COLORS["accent"])
-            self._animate()
+            self._draw_uploading_cloud()
+            get_animation_clock(self).subscribe(self._animate, 50)
 
     def stop_uploading(self):
         if self._uploading:
             self._uploading = False
+            self._progress = None
+            get_animation_clock(self).unsubscribe(self._animate)
             self.status_label.configure(text="Synced", text_color=COLORS["success"])
+            self.detail_label.configure(text="")
             self.draw_static_cloud()
 
+    def update_transfer(self, stats: dict):
+        """Show real upload progress from the upload scheduler's stats."""
+        if not stats:
+            return
+        done = stats.get("done", 0) + stats.get("failed", 0)
+        total = stats.get("total", 0)
+        in_flight = stats.get("in_flight", 0)
+        
+        if total == 0 or (done >= total and in_flight == 0):
+            self.stop_uploading()
+            return
+        
+        progress = min(done / total, 1.0)
+        changed = progress != self._progress
+        self._progress = progress
+        if self._uploading:
+            if changed:
+                self._draw_uploading_cloud()
+        else:
+            self.start_uploading()
+        self.status_label.configure(text=f"Uploading {done} / {total}", text_color=COLORS["accent"])
+        self.detail_label.configure(
+            text=f"{self._format_rate(stats.get('throughput_bps', 0))}  ·  "
+                 f"{in_flight} in flight  ·  {int(stats.get('rtt_ms', 0))} ms"
+        )
+
+    @staticmethod
+    def _format_rate(bps):
+        if bps >= 1024 * 1024:
+            return f"{bps / (1024 * 1024):.1f} MB/s"
+        return f"{bps / 1024:.0f} KB/s"
+
     def _draw_cloud_icon(self, offset=0, color="gray"):
         cx, cy = self.canvas_size / 2, self.canvas_size / 2
         
@@ -499,23 +651,27 @@ class CloudWidget(ctk.CTkFrame):
         self.canvas.create_oval(cx+10, cy-10, cx+40, cy+20, fill=color, outline="")
         self.canvas.create_oval(cx-20, cy+5, cx+30, cy+20, fill=color, outline="")
         
+        if self._uploading and self._progress is not None:
+            # Determinate progress bar under the cloud
+            track = "#3a3a3c" if self._mode == "dark" else "#e0e0e0"
+            fill = COLORS["accent"][1] if self._mode == "dark" else COLORS["accent"][0]
+            x0, x1, y = cx - 35, cx + 45, cy + 32
+            self.canvas.create_line(x0, y, x1, y, width=6, fill=track, capstyle="round")
+            if self._progress > 0:
+                self.canvas.create_line(x0, y, x0 + (x1 - x0) * self._progress, y, width=6, fill=fill, capstyle="round")
+        
         if self._uploading:
             arrow_y = cy + 10 - offset
             ac = COLORS["success"][1] if self._mode == "dark" else COLORS["success"][0]
-            self.canvas.create_line(cx, arrow_y, cx, arrow_y-20, width=3, fill=ac, capstyle="round")
-            self.canvas.create_line(cx, arrow_y-20, cx-8, arrow_y-12, width=3, fill=ac, capstyle="round")
-            self.canvas.create_line(cx, arrow_y-20, cx+8, arrow_y-12, width=3, fill=ac, capstyle="round")
+            self.canvas.create_line(cx, arrow_y, cx, arrow_y-20, width=3, fill=ac, capstyle="round", tags="arrow")
+            self.canvas.create_line(cx, arrow_y-20, cx-8, arrow_y-12, width=3, fill=ac, capstyle="round", tags="arrow")
+            self.canvas.create_line(cx, arrow_y-20, cx+8, arrow_y-12, width=3, fill=ac, capstyle="round", tags="arrow")
 
     def _animate(self):
-        if not self._uploading:
-            return
-            
-        self.canvas.delete("all")
-        cloud_color = COLORS["text_primary"][1] if self._mode == "dark" else COLORS["text_primary"][0]
-        self._draw_cloud_icon(offset=self._offset, color=cloud_color)
-        
-        self._offset = (self._offset + 2) % 20
-        self.after(50, self._animate)
+        # Only the arrow moves; the cloud and progress bar stay as drawn
+        offset = (self._offset + 2) % 20
+        self.canvas.move("arrow", 0, self._offset - offset)
+        self._offset = offset
 
 
 # =============================================================================
@@ -593,8 +749,41 @@ class StuckPhotosCard(ctk.CTkFrame):
             text=str(total),
             text_color=COLORS["error"] if total > 0 else COLORS["success"]
         )
+
+
+# Logger name -> (icon, tag, display label). Lines are classified once, by
+# the logger that wrote them, instead of substring scans over the message.
+LOG_SOURCES = {
+    "app.processor":    ("⚙️", "proc", "Processor"),
+    "app.worker":       ("⚙️", "proc", "Processor"),
+    "app.router":       ("⚙️", "proc", "Processor"),
+    "app.db":           ("🗄️", "db", "Database"),
+    "app.cloud":        ("☁️", "cloud", "Cloud"),
+    "app.upload_queue": ("☁️", "cloud", "Cloud"),
+    "app.upload_scheduler": ("☁️", "cloud", "Cloud"),
+    "app.leases":       ("⚙️", "proc", "Leases"),
+    "app.journal":      ("⚙️", "proc", "Journal"),
+    "app.supervisor":   ("⚙️", "proc", "Supervisor"),
+    "whatsapp":         ("💬", "whatsapp", "WhatsApp"),
+    "server":           ("🌐", "server", "Server"),
+}
+# Process prefixes written by the launcher in front of each captured line
+LOG_PREFIXES = {"[WhatsApp]": "whatsapp", "[Server]": "server", "[Worker]": None}
+
+
 class ActivityLog(ctk.CTkFrame):
-    """Activity log with dark grey bg and black terminal — per design guide."""
+    """
+    Activity log with dark grey bg and black terminal — per design guide.
+    
+    add_log() may be called from any thread: it classifies the line and
+    appends it to a bounded buffer. The first line into an empty buffer
+    schedules one flush on the Tk thread, which inserts the whole buffer in
+    one call; an idle log schedules nothing. The textbox keeps only the
+    newest MAX_LINES lines.
+    """
+    
+    MAX_LINES = 1000
+    FLUSH_MS = 100
     
     def __init__(self, parent):
         super().__init__(
@@ -626,64 +815,86 @@ class ActivityLog(ctk.CTkFrame):
         self.textbox.tag_config("server", foreground="#007aff")
         self.textbox.tag_config("error", foreground="#ff3b30")
         self.textbox.tag_config("timestamp", foreground="#888888")
+        
+        from collections import deque
+        self._pending = deque(maxlen=self.MAX_LINES)   # (prefix, tag, text), oldest first
+        self._pending_lock = threading.Lock()
+        self._flush_scheduled = False
+        self._lines = 0
     
-    def add_log(self, message: str, level: str = "info"):
+    @staticmethod
+    def classify(message: str, level: str = "info", logger_name: str = None):
+        """Return (icon, tag, display text) for a log line."""
+        display_msg = message.strip()
+        
+        # "[Worker] 12:00:01 | INFO | app.processor | message"
+        source = logger_name
+        for prefix, prefix_source in LOG_PREFIXES.items():
+            if display_msg.startswith(prefix):
+                display_msg = display_msg[len(prefix):].strip()
+                source = source or prefix_source
+                break
+        parts = display_msg.split(" | ")
+        if len(parts) >= 2:
+            for i, part in enumerate(parts[:-1]):
+                if part.strip() in LOG_SOURCES:
+                    source = part.strip()
+                    display_msg = " | ".join(parts[i + 1:])
+                    break
+        
+        if source in LOG_SOURCES:
+            icon, tag, label = LOG_SOURCES[source]
+            return icon, tag, f"{label} | {display_msg}"
+        if level == "error":
+            return "✗", "error", display_msg
+        if level == "success":
+            return "✓", "whatsapp", display_msg
+        return "•", "info", display_msg
+    
+    def add_log(self, message: str, level: str = "info", logger_name: str = None):
         timestamp = datetime.now().strftime("%H:%M:%S")
+        icon, tag, display_msg = self.classify(message, level, logger_name)
+        with self._pending_lock:
+            self._pending.append((f"{timestamp}  {icon}  ", tag, f"{display_msg}\n"))
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        try:
+            # Tk marshals after() from other threads onto the main loop
+            self.after(self.FLUSH_MS, self._flush)
+        except (RuntimeError, tk.TclError):
+            # Widget destroyed or no main loop yet; the next line retries
+            with self._pending_lock:
+                self._flush_scheduled = False
+    
+    def _flush(self):
+        with self._pending_lock:
+            batch = list(self._pending)
+            self._pending.clear()
+            self._flush_scheduled = False
+        if not batch:
+            return
         
-        icon = "•"
-        tag = "info"
-        display_msg = message
-
-        lower_msg = message.lower()
-        
-        if "app.processor" in lower_msg or "processing" in lower_msg:
-            icon = "⚙️"
-            tag = "proc"
-            display_msg = message.replace("app.processor |", "").strip()
-            if display_msg.startswith("[Worker]"): display_msg = display_msg.replace("[Worker]", "").strip()
-            display_msg = f"Processor | {display_msg}"
-            
-        elif "app.db" in lower_msg or "database" in lower_msg:
-            icon = "🗄️"
-            tag = "db"
-            display_msg = message.replace("app.db |", "").strip()
-            if display_msg.startswith("[Worker]"): display_msg = display_msg.replace("[Worker]", "").strip()
-            display_msg = f"Database | {display_msg}"
-            
-        elif "app.cloud" in lower_msg or "drive" in lower_msg:
-            icon = "☁️"
-            tag = "cloud"
-            display_msg = message.replace("app.cloud |", "").strip()
-            if display_msg.startswith("[Worker]"): display_msg = display_msg.replace("[Worker]", "").strip()
-            display_msg = f"Cloud | {display_msg}"
-            
-        elif "whatsapp" in lower_msg:
-            icon = "💬"
-            tag = "whatsapp"
-            if display_msg.startswith("[WhatsApp]"): display_msg = display_msg.replace("[WhatsApp]", "").strip()
-            display_msg = f"WhatsApp | {display_msg}"
-            
-        elif "server" in lower_msg:
-            icon = "🌐"
-            tag = "server"
-            if display_msg.startswith("[Server]"): display_msg = display_msg.replace("[Server]", "").strip()
-            display_msg = f"Server | {display_msg}"
-            
-        elif level == "error":
-            icon = "✗"
-            tag = "error"
-        elif level == "success":
-            icon = "✓"
-            tag = "whatsapp"
-
-        self.textbox.configure(state="normal")
-        
-        self.textbox.insert("1.0", f"{display_msg}\n")
-        
-        prefix = f"{timestamp}  {icon}  "
-        self.textbox.insert("1.0", prefix, (tag,))
+        # Newest line on top: one insert call for the whole batch
+        args = []
+        for prefix, tag, text in reversed(batch):
+            args.extend((prefix, (tag,), text, ()))
         
-        self.textbox.configure(state="disabled")
+        text_widget = self.textbox._textbox
+        try:
+            self.textbox.configure(state="normal")
+            text_widget.insert("1.0", *args)
+            self._lines += len(batch)
+            if self._lines > self.MAX_LINES:
+                # Trim the oldest lines at the bottom
+                text_widget.delete(f"{self.MAX_LINES + 1}.0", "end")
+                self._lines = self.MAX_LINES
+            self.textbox.configure(state="disabled")
+        except tk.TclError as e:
+            # Widget gone or broken: don't drop the lines without a trace
+            print(f"Activity log update failed ({e}); {len(batch)} lines:", file=sys.stderr)
+            for prefix, _, text in batch:
+                sys.stderr.write(prefix + text)
 
 
 # =============================================================================
@@ -697,7 +908,7 @@ class FolderChoicePopup(ctk.CTkToplevel):
     BTN_AREA_H = 30         # height for the button row
     PADDING = 4             # removed padding to accommodate wider image without growing window
     
-    def __init__(self, parent, x, y, person_name, on_local, on_cloud, thumbnail_path=None):
+    def __init__(self, parent, x, y, person_name, on_local, on_cloud, thumbnail_path=None, thumbnail_image=None):
         # Always parent to the root window to avoid "bad window path" errors
         # when the scrollable frame widget hierarchy changes (especially on external displays)
         root = parent.winfo_toplevel()
@@ -715,7 +926,7 @@ class FolderChoicePopup(ctk.CTkToplevel):
         curr_mode = ctk.get_appearance_mode()
         bg_color = COLORS["bg_card"][1] if curr_mode == "Dark" else COLORS["bg_card"][0]
         
-        has_thumb = thumbnail_path and Path(thumbnail_path).exists()
+        has_thumb = thumbnail_image is not None or (thumbnail_path and Path(thumbnail_path).exists())
         popup_w = self.THUMB_W + self.PADDING * 2 + 4  # +4 for border
         popup_h = (self.THUMB_H + self.BTN_AREA_H + self.PADDING * 3 + 4) if has_thumb else (self.BTN_AREA_H + self.PADDING * 2 + 4)
         
@@ -728,51 +939,18 @@ class FolderChoicePopup(ctk.CTkToplevel):
         self.frame.pack(padx=2, pady=2)
         
         # ---- Thumbnail (clear, clipped to rounded rect) ----
-        self._tk_thumb = None
-        if has_thumb:
+        # Normally a ready CTkImage from FaceThumbnailCache; a bare path is
+        # still accepted and rendered here.
+        self._tk_thumb = thumbnail_image
+        if self._tk_thumb is None and has_thumb:
             try:
-                img = Image.open(thumbnail_path).convert("RGBA")
-                
-                # Crop to portrait ratio from center
-                tw, th = self.THUMB_W, self.THUMB_H
-                w, h = img.size
-                target_ratio = tw / th
-                src_ratio = w / h
-                if src_ratio > target_ratio:
-                    # Source is wider — crop sides
-                    new_w = int(h * target_ratio)
-                    left = (w - new_w) // 2
-                    img = img.crop((left, 0, left + new_w, h))
-                else:
-                    # Source is taller — crop top/bottom
-                    new_h = int(w / target_ratio)
-                    top = (h - new_h) // 2
-                    img = img.crop((0, top, w, top + new_h))
-                img = img.resize((tw, th), Image.LANCZOS)
-                
-                # Create rounded mask to clip corners
-                from PIL import ImageDraw
-                radius = 10
-                mask = Image.new("L", (tw, th), 0)
-                draw = ImageDraw.Draw(mask)
-                draw.rounded_rectangle(
-                    [(0, 0), (tw - 1, th - 1)],
-                    radius=radius, fill=255
-                )
-                
-                # Apply mask — composite onto bg color
-                bg_img = Image.new("RGBA", (tw, th), bg_color)
-                bg_img.paste(img, (0, 0), mask)
-                
-                self._tk_thumb = ImageTk.PhotoImage(bg_img.convert("RGB"))
-                
-                thumb_label = tk.Label(
-                    self.frame, image=self._tk_thumb, bd=0,
-                    highlightthickness=0, bg=bg_color
-                )
-                thumb_label.pack(padx=self.PADDING, pady=(self.PADDING, 0))
+                img = render_popup_thumbnail(thumbnail_path, bg_color, self.THUMB_W, self.THUMB_H)
+                self._tk_thumb = ctk.CTkImage(light_image=img, dark_image=img, size=(self.THUMB_W, self.THUMB_H))
             except Exception:
-                pass
+                self._tk_thumb = None
+        if self._tk_thumb is not None:
+            thumb_label = ctk.CTkLabel(self.frame, image=self._tk_thumb, text="", fg_color=bg_color)
+            thumb_label.pack(padx=self.PADDING, pady=(self.PADDING, 0))
         
         # ---- Button row (horizontal) ----
         btn_row = ctk.CTkFrame(self.frame, fg_color="transparent")
@@ -885,73 +1063,182 @@ class FolderChoicePopup(ctk.CTkToplevel):
     def _cancel_close(self):
         pass
 
-class PeopleList(ctk.CTkScrollableFrame):
-    """Person list with pill-shaped items — thick black border, white bg."""
+def render_popup_thumbnail(src_path, bg_color, tw, th):
+    """Portrait center-crop, LANCZOS resize and rounded corners composited onto bg_color."""
+    from PIL import Image, ImageDraw
     
-    def __init__(self, parent):
-        super().__init__(parent, fg_color=COLORS["bg_card"], corner_radius=14)
-        self._last_hash = None
-        self._hover_id = None
-        self._popup = None
-        self._thumb_cache = {}  # person_id -> thumbnail path
+    img = Image.open(src_path).convert("RGBA")
+    
+    # Crop to portrait ratio from center
+    w, h = img.size
+    target_ratio = tw / th
+    src_ratio = w / h
+    if src_ratio > target_ratio:
+        # Source is wider — crop sides
+        new_w = int(h * target_ratio)
+        left = (w - new_w) // 2
+        img = img.crop((left, 0, left + new_w, h))
+    else:
+        # Source is taller — crop top/bottom
+        new_h = int(w / target_ratio)
+        top = (h - new_h) // 2
+        img = img.crop((0, top, w, top + new_h))
+    img = img.resize((tw, th), Image.LANCZOS)
     
+    # Create rounded mask to clip corners
+    radius = 10
+    mask = Image.new("L", (tw, th), 0)
+    draw = ImageDraw.Draw(mask)
+    draw.rounded_rectangle(
+        [(0, 0), (tw - 1, th - 1)],
+        radius=radius, fill=255
+    )
+    
+    # Apply mask — composite onto bg color
+    bg_img = Image.new("RGBA", (tw, th), bg_color)
+    bg_img.paste(img, (0, 0), mask)
+    return bg_img.convert("RGB")
+
 
-    def _get_person_thumbnail(self, person_id, person_name, enrollment=None):
-        """Get or generate a face thumbnail for a person.
+# =============================================================================
+# Face Thumbnail Cache — generated off the Tk thread, decoded images in an LRU
+# =============================================================================
+class FaceThumbnailCache:
+    """
+    Popup thumbnails for persons.
+    
+    Generation (DB lookup, opening the processed JPEG, face crop, resize,
+    rounded mask for light and dark mode) runs on a small worker pool and is
+    started when a person's row is rendered (PeopleList keeps requests to
+    the visible rows plus a small overscan, and retain() drops queued work
+    for rows that scrolled away), not on hover. Workers put finished
+    PIL pairs straight into a size-bounded LRU; the Tk thread swaps an entry
+    for its CTkImage on first use, so a hover never touches disk.
+    """
+    
+    def __init__(self, max_images=64, workers=2):
+        from collections import OrderedDict
+        from concurrent.futures import ThreadPoolExecutor
+        
+        self.max_images = max_images
+        self._images = OrderedDict()    # person_id -> (light, dark) PIL pair or CTkImage
+        self._missing = set()           # persons with no usable face image (yet)
+        self._pending = {}              # person_id -> Future of a queued or running render
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbs")
+    
+    def request(self, person_id, person_name, enrollment=None):
+        """Start generating a person's thumbnail unless it's cached, queued or known missing."""
+        with self._lock:
+            if person_id in self._images or person_id in self._pending or person_id in self._missing:
+                return
+            selfie = getattr(enrollment, "selfie_path", None) if enrollment else None
+            self._pending[person_id] = self._pool.submit(self._generate, person_id, person_name, selfie)
+    
+    def retain(self, person_ids):
+        """Cancel queued renders for persons not in person_ids (running ones finish)."""
+        with self._lock:
+            for person_id in [pid for pid in self._pending if pid not in person_ids]:
+                if self._pending[person_id].cancel():
+                    del self._pending[person_id]
+    
+    def invalidate(self, person_id):
+        """Drop a cached thumbnail (e.g. the person just enrolled with a selfie)."""
+        with self._lock:
+            self._images.pop(person_id, None)
+            self._missing.discard(person_id)
+    
+    def forget_missing(self, person_id):
+        """Allow another attempt for a person that had no face image; True if it had none."""
+        with self._lock:
+            if person_id not in self._missing:
+                return False
+            self._missing.discard(person_id)
+            return True
+    
+    def is_pending(self, person_id):
+        with self._lock:
+            return person_id in self._pending
+    
+    def get(self, person_id):
+        """Tk thread: the CTkImage for a person, or None if not ready / no face."""
+        with self._lock:
+            entry = self._images.get(person_id)
+            if entry is None:
+                return None
+            self._images.move_to_end(person_id)
+        if not isinstance(entry, tuple):
+            return entry
+        image = ctk.CTkImage(light_image=entry[0], dark_image=entry[1],
+                             size=(FolderChoicePopup.THUMB_W, FolderChoicePopup.THUMB_H))
+        with self._lock:
+            if person_id in self._images:
+                self._images[person_id] = image
+        return image
+    
+    def _generate(self, person_id, person_name, selfie_path):
+        pair = None
+        try:
+            src = self._resolve_source(person_id, person_name, selfie_path)
+            if src is not None:
+                tw, th = FolderChoicePopup.THUMB_W, FolderChoicePopup.THUMB_H
+                pair = (render_popup_thumbnail(src, COLORS["bg_card"][0], tw, th),
+                        render_popup_thumbnail(src, COLORS["bg_card"][1], tw, th))
+        except Exception:
+            pair = None
+        with self._lock:
+            self._pending.pop(person_id, None)
+            if pair is None:
+                self._missing.add(person_id)
+                return
+            self._images[person_id] = pair
+            while len(self._images) > self.max_images:
+                # Evicted entries are regenerated from the disk crop on next request
+                self._images.popitem(last=False)
+    
+    @staticmethod
+    def _resolve_source(person_id, person_name, selfie_path):
+        """Source image for a person.
         
         Priority:
-        1. Cached thumbnail
-        2. Enrollment selfie (enrolled users)
-        3. Auto-crop from first detected face (non-enrolled)
+        1. Enrollment selfie (enrolled users)
+        2. Reference selfie in the person folder
+        3. Auto-crop from first detected face (non-enrolled), cached on disk
         
-        Returns path string or None.
+        Returns a path or None.
         """
-        # Check memory cache
-        if person_id in self._thumb_cache:
-            cached = self._thumb_cache[person_id]
-            if cached and Path(cached).exists():
-                return cached
+        from PIL import Image
+        from app.config import get_config
+        from app.db import get_db
+        
+        # Check for enrollment selfie first
+        if selfie_path and Path(selfie_path).exists():
+            return Path(selfie_path)
+        
+        config = get_config()
+        
+        # Check for reference selfie in person folder
+        ref_selfie = config.people_dir / person_name / "00_REFERENCE_SELFIE.jpg"
+        if ref_selfie.exists():
+            return ref_selfie
+        
+        # Auto-generate from face bbox
+        cache_dir = config.people_dir / ".thumbnails"
+        cache_dir.mkdir(exist_ok=True)
+        thumb_path = cache_dir / f"person_{person_id}.jpg"
+        if thumb_path.exists():
+            return thumb_path
+        
+        # Generate: crop face from source photo
+        face_info = get_db().get_first_face_for_person(person_id)
+        if not face_info or not face_info["processed_path"]:
+            return None
         
-        try:
-            from app.config import get_config
-            config = get_config()
-            
-            # Check for enrollment selfie first
-            if enrollment:
-                selfie = Path(enrollment.selfie_path)
-                if selfie.exists():
-                    self._thumb_cache[person_id] = str(selfie)
-                    return str(selfie)
-            
-            # Check for reference selfie in person folder
-            person_dir = config.people_dir / person_name
-            ref_selfie = person_dir / "00_REFERENCE_SELFIE.jpg"
-            if ref_selfie.exists():
-                self._thumb_cache[person_id] = str(ref_selfie)
-                return str(ref_selfie)
-            
-            # Auto-generate from face bbox
-            cache_dir = config.people_dir / ".thumbnails"
-            cache_dir.mkdir(exist_ok=True)
-            thumb_path = cache_dir / f"person_{person_id}.jpg"
-            
-            if thumb_path.exists():
-                self._thumb_cache[person_id] = str(thumb_path)
-                return str(thumb_path)
-            
-            # Generate: crop face from source photo
-            db = get_db()
-            face_info = db.get_first_face_for_person(person_id)
-            if not face_info or not face_info["processed_path"]:
-                self._thumb_cache[person_id] = None
-                return None
-            
-            src_path = Path(face_info["processed_path"])
-            if not src_path.exists():
-                self._thumb_cache[person_id] = None
-                return None
-            
-            img = Image.open(src_path)
+        src_path = Path(face_info["processed_path"])
+        if not src_path.exists():
+            return None
+        
+        with Image.open(src_path) as img:
             bx, by, bw, bh = face_info["bbox_x"], face_info["bbox_y"], face_info["bbox_w"], face_info["bbox_h"]
             
             # Add generous padding around the face crop
@@ -961,17 +1248,82 @@ class PeopleList(ctk.CTkScrollableFrame):
             x2 = min(img.width, bx + bw + pad)
             y2 = min(img.height, by + bh + pad)
             
-            face_crop = img.crop((x1, y1, x2, y2))
-            face_crop = face_crop.resize((120, 120), Image.LANCZOS)
-            face_crop.save(str(thumb_path), "JPEG", quality=85)
-            
-            self._thumb_cache[person_id] = str(thumb_path)
-            return str(thumb_path)
-            
-        except Exception:
-            self._thumb_cache[person_id] = None
-            return None
+            face_crop = img.crop((x1, y1, x2, y2)).convert("RGB")
+        face_crop = face_crop.resize((120, 120), Image.LANCZOS)
+        face_crop.save(str(thumb_path), "JPEG", quality=85)
+        return thumb_path
 
+
+class PeopleList(ctk.CTkFrame):
+    """
+    Person list with pill-shaped items — thick black border, white bg.
+    
+    Virtualized: only the rows that fit in the viewport exist as widgets.
+    A small pool of pill rows is re-bound to whichever persons are visible
+    as the list scrolls, so 1000 clusters cost the same as 20.
+    """
+    
+    ROW_HEIGHT = 42     # 36px pill + 2x3px padding
+    POOL_EXTRA = 2      # rows beyond the viewport, for partial rows at both edges
+    THUMB_OVERSCAN = 4  # rows above/below the viewport whose popup thumbnails are pre-rendered
+    
+    def __init__(self, parent):
+        super().__init__(parent, fg_color=COLORS["bg_card"], corner_radius=14)
+        self._hover_id = None
+        self._popup = None
+        self._thumbs = FaceThumbnailCache()
+        self._items = {}        # person_id -> {"id", "folder", "enrollment", "label", "count"}
+        self._order = []        # person ids in display order
+        self._index = {}        # person_id -> position in _order
+        self._slots = []        # recycled row widgets
+        self._render_pending = False
+        
+        self.canvas = ctk.CTkCanvas(self, bg=COLORS["bg_card"][0], highlightthickness=0)
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y", padx=(0, 4), pady=6)
+        self.canvas.pack(side="left", fill="both", expand=True, padx=(6, 0), pady=6)
+        self._empty_id = self.canvas.create_text(
+            0, 24, text="No people detected yet", font=("Segoe UI", 13),
+            fill=COLORS["text_secondary"][0], anchor="n"
+        )
+        
+        self.canvas.bind("<Configure>", lambda e: self._schedule_render())
+        for widget in (self.canvas, self):
+            widget.bind("<MouseWheel>", self._on_mousewheel)
+            widget.bind("<Button-4>", lambda e: self._scroll_units(-1))
+            widget.bind("<Button-5>", lambda e: self._scroll_units(1))
+    
+    def set_appearance_mode(self, mode):
+        i = 1 if mode.lower() == "dark" else 0
+        self.canvas.configure(bg=COLORS["bg_card"][i])
+        self.canvas.itemconfigure(self._empty_id, fill=COLORS["text_secondary"][i])
+    
+    # ---- Scrolling ----
+    
+    def _content_height(self):
+        return len(self._order) * self.ROW_HEIGHT
+    
+    def _on_scrollbar(self, *args):
+        self.canvas.yview(*args)
+        self._sync_scrollbar()
+        self._schedule_render()
+    
+    def _on_mousewheel(self, event):
+        self._scroll_units(-1 if event.delta > 0 else 1)
+    
+    def _scroll_units(self, units):
+        self.canvas.yview_scroll(units * 2, "units")
+        self._sync_scrollbar()
+        self._schedule_render()
+    
+    def _sync_scrollbar(self):
+        self.scrollbar.set(*self.canvas.yview())
+    
+    def _schedule_render(self):
+        if not self._render_pending:
+            self._render_pending = True
+            self.after_idle(self._render)
+    
     def _open_person_folder(self, person_name):
         """Open the specific person's folder in file explorer."""
         try:
@@ -1007,28 +1359,159 @@ class PeopleList(ctk.CTkScrollableFrame):
             pass
         self._popup = None
 
-    def _show_choice_popup(self, x, y, person_name, person_id=None, enrollment=None):
+    def _show_choice_popup(self, x, y, person_name, person_id=None, enrollment=None, _waits=8):
         """Show the floating choice menu with optional face thumbnail."""
-        # Close any existing popup safely
-        self._close_popup()
-        
-        # Get thumbnail
+        # Get thumbnail (memory only; generation happens on the worker pool)
         thumb = None
         if person_id is not None:
-            thumb = self._get_person_thumbnail(person_id, person_name, enrollment)
+            thumb = self._thumbs.get(person_id)
+            if thumb is None:
+                self._thumbs.request(person_id, person_name, enrollment)
+                if _waits > 0 and self._thumbs.is_pending(person_id):
+                    # Still rendering; give it up to ~400ms more before showing without
+                    self._hover_id = self.after(50, lambda: self._show_choice_popup(
+                        x, y, person_name, person_id, enrollment, _waits - 1))
+                    return
+                thumb = self._thumbs.get(person_id)
+        
+        # Close any existing popup safely
+        self._close_popup()
         
         try:
             self._popup = FolderChoicePopup(
                 self, x, y, person_name,
                 on_local=lambda: self._open_person_folder(person_name),
                 on_cloud=lambda: self._open_cloud_folder(person_name),
-                thumbnail_path=thumb
+                thumbnail_image=thumb
             )
         except Exception:
             # If popup creation fails (e.g. external display timing issue),, just skip
             self._popup = None
 
+    def _create_slot(self):
+        """Build one recyclable pill row. Handlers read slot["info"], the person it currently shows."""
+        slot = {"info": None, "shown": None}
+        
+        # Pill-shaped row: thick black border, fully rounded, white bg
+        row = ctk.CTkFrame(
+            self.canvas, fg_color=COLORS["bg_card"], corner_radius=50,
+            border_width=1, border_color=COLORS["border"],
+            height=36
+        )
+        row.pack_propagate(False)
+        row.configure(cursor="hand2")
+        
+        # Hover effect & Popup trigger
+        def on_enter(e):
+            info = slot["info"]
+            if info is None: return
+            row.configure(fg_color=("#f2f2f2", "#3a3a3c"))
+            # Start timer for popup
+            if self._hover_id: self.after_cancel(self._hover_id)
+            self._hover_id = self.after(600, lambda: self._show_choice_popup(
+                e.x_root, e.y_root, info["folder"], info["id"], info["enrollment"]))
+
+        def on_leave(e):
+            row.configure(fg_color=COLORS["bg_card"])
+            # Cancel timer if popup hasn't appeared yet
+            if self._hover_id:
+                self.after_cancel(self._hover_id)
+                self._hover_id = None
+            # Don't close popup immediately - let the popup's own tracking handle it
+        
+        # Click handler (still opens local immediately as quick action)
+        def on_click(e):
+            if slot["info"] is None: return
+            if self._hover_id: self.after_cancel(self._hover_id)
+            self._open_person_folder(slot["info"]["folder"])
+        
+        name_lbl = ctk.CTkLabel(
+            row, text="", font=("Segoe UI", 12),
+            text_color=COLORS["text_primary"]
+        )
+        name_lbl.pack(side="left", padx=(16, 5), pady=4)
+        
+        count_lbl = ctk.CTkLabel(
+            row, text="", font=("Segoe UI", 12),
+            text_color=COLORS["text_secondary"]
+        )
+        count_lbl.pack(side="right", padx=(5, 16), pady=4)
+        
+        for w in (row, name_lbl, count_lbl):
+            w.bind("<Button-1>", on_click)
+            w.bind("<Enter>", on_enter)
+            w.bind("<MouseWheel>", self._on_mousewheel)
+            w.bind("<Button-4>", lambda e: self._scroll_units(-1))
+            w.bind("<Button-5>", lambda e: self._scroll_units(1))
+        row.bind("<Leave>", on_leave)
+        
+        slot.update(row=row, name_lbl=name_lbl, count_lbl=count_lbl,
+                    window=self.canvas.create_window(0, 0, window=row, anchor="nw", state="hidden"))
+        return slot
+    
+    def _render(self):
+        """Bind the visible slice of persons to the slot pool."""
+        self._render_pending = False
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        if width <= 1:
+            return
+        
+        total = self._content_height()
+        self.canvas.configure(scrollregion=(0, 0, width, max(total, height)))
+        self.canvas.coords(self._empty_id, width / 2, 24)
+        self.canvas.itemconfigure(self._empty_id, state="normal" if not self._order else "hidden")
+        
+        needed = height // self.ROW_HEIGHT + self.POOL_EXTRA
+        while len(self._slots) < needed:
+            self._slots.append(self._create_slot())
+        
+        top = self.canvas.canvasy(0)
+        first = max(0, int(top // self.ROW_HEIGHT))
+        for i, slot in enumerate(self._slots):
+            idx = first + i
+            if idx >= len(self._order) or i >= needed:
+                if slot["info"] is not None:
+                    slot["info"] = None
+                    slot["shown"] = None
+                    self.canvas.itemconfigure(slot["window"], state="hidden")
+                continue
+            
+            info = self._items[self._order[idx]]
+            slot["info"] = info
+            self.canvas.coords(slot["window"], 4, idx * self.ROW_HEIGHT + 3)
+            self.canvas.itemconfigure(slot["window"], width=width - 8, state="normal")
+            
+            # Only touch the labels when what the slot shows actually changed
+            shown = (info["label"], info["count"])
+            if slot["shown"] != shown:
+                slot["name_lbl"].configure(text=info["label"])
+                slot["count_lbl"].configure(text=str(info["count"]))
+                slot["shown"] = shown
+        self._request_thumbnails(first, needed)
+        self._sync_scrollbar()
+    
+    def _request_thumbnails(self, first, count):
+        """Pre-render popup thumbnails for the visible rows plus a small overscan only."""
+        start = max(0, first - self.THUMB_OVERSCAN)
+        ids = self._order[start:first + count + self.THUMB_OVERSCAN]
+        self._thumbs.retain(set(ids))
+        for person_id in ids:
+            info = self._items[person_id]
+            self._thumbs.request(person_id, info["folder"], info["enrollment"])
+    
+    def _slot_for(self, person_id):
+        for slot in self._slots:
+            if slot["info"] is not None and slot["info"]["id"] == person_id:
+                return slot
+        return None
+
     def update_persons(self, persons: list, enrollments: dict):
+        """
+        Keyed update of the person model; rows are only re-rendered for the
+        visible slice, and a slot's labels are only reconfigured when the
+        person it shows has a new name or count.
+        """
         current_counts = {}
         for p in persons:
             name = enrollments.get(p.id).user_name if p.id in enrollments else p.name
@@ -1042,120 +1525,239 @@ class PeopleList(ctk.CTkScrollableFrame):
                     changes.append(name)
         
         self._last_counts = current_counts
-
-        data_hash = str([(p.id, p.name, p.face_count) for p in persons])
-        if data_hash == self._last_hash:
-            pass
-        else:
-            self._last_hash = data_hash
-            
-            for w in self.winfo_children():
-                w.destroy()
-            
-            if not persons:
-                ctk.CTkLabel(self, text="No people detected yet", font=("Segoe UI", 13), text_color=COLORS["text_secondary"]).pack(pady=20)
-                return
-            
-            for person in persons:
-                enrollment = enrollments.get(person.id)
-                name = enrollment.user_name if enrollment else person.name
-                icon = "✓ " if enrollment else ""
-                p_name = person.name # Current folder name
-                
-                # Pill-shaped row: thick black border, fully rounded, white bg
-                row = ctk.CTkFrame(
-                    self, fg_color=COLORS["bg_card"], corner_radius=50,
-                    border_width=1, border_color=COLORS["border"],
-                    height=36
-                )
-                row.pack(fill="x", padx=4, pady=3)
-                row.pack_propagate(False)
-                row.configure(cursor="hand2")
-                
-                # Hover effect & Popup trigger
-                def on_enter(e, r=row, pn=p_name, pid=person.id, enr=enrollment): 
-                    r.configure(fg_color=("#f2f2f2", "#3a3a3c"))
-                    # Start timer for popup
-                    if self._hover_id: self.after_cancel(self._hover_id)
-                    self._hover_id = self.after(600, lambda: self._show_choice_popup(e.x_root, e.y_root, pn, pid, enr))
-
-                def on_leave(e, r=row): 
-                    r.configure(fg_color=COLORS["bg_card"])
-                    # Cancel timer if popup hasn't appeared yet
-                    if self._hover_id:
-                        self.after_cancel(self._hover_id)
-                        self._hover_id = None
-                    # Don't close popup immediately - let the popup's own tracking handle it
-                
-                # Click handler (still opens local immediately as quick action)
-                def on_click(e, pn=p_name): 
-                    if self._hover_id: self.after_cancel(self._hover_id)
-                    self._open_person_folder(pn)
-                
-                row.bind("<Enter>", on_enter)
-                row.bind("<Leave>", on_leave)
-                row.bind("<Button-1>", on_click)
-                
-                name_lbl = ctk.CTkLabel(
-                    row, text=f"{icon}{name}", font=("Segoe UI", 12),
-                    text_color=COLORS["text_primary"]
-                )
-                name_lbl.pack(side="left", padx=(16, 5), pady=4)
-                name_lbl.bind("<Button-1>", on_click)
-                name_lbl.bind("<Enter>", on_enter)
-                
-                count_lbl = ctk.CTkLabel(
-                    row, text=f"{person.face_count}", font=("Segoe UI", 12),
-                    text_color=COLORS["text_secondary"]
-                )
-                count_lbl.pack(side="right", padx=(5, 16), pady=4)
-                count_lbl.bind("<Button-1>", on_click)
-                count_lbl.bind("<Enter>", on_enter)
+        
+        items = {}
+        for person in persons:
+            enrollment = enrollments.get(person.id)
+            name = enrollment.user_name if enrollment else person.name
+            icon = "✓ " if enrollment else ""
+            info = self._items.get(person.id)
+            # Thumbnails are requested by _render() for the rows it shows
+            if info is None:
+                info = {"id": person.id}
+            elif (info.get("enrollment") is None) != (enrollment is None):
+                # Enrollment selfie takes priority over the auto-crop
+                self._thumbs.invalidate(person.id)
+            elif info.get("count") != person.face_count or info.get("folder") != person.name:
+                # New faces or a renamed folder may give a person with no
+                # usable image one now
+                self._thumbs.forget_missing(person.id)
+            info.update(
+                folder=person.name,     # Current folder name
+                enrollment=enrollment,
+                label=f"{icon}{name}",
+                count=person.face_count,
+            )
+            items[person.id] = info
+        self._items = items
+        self._order = [p.id for p in persons]
+        self._index = {pid: i for i, pid in enumerate(self._order)}
+        self._schedule_render()
         
         for name in changes:
             self.highlight_person(name)
     
     def highlight_person(self, name_to_find):
-        """Find and highlight a person in the list."""
+        """Scroll a person into view and flash their row."""
         search = name_to_find.lower().strip()
-        found_widget = None
-        
-        for row in self.winfo_children():
-            children = row.winfo_children()
-            if not children: continue
-            
-            name_lbl = children[0]
-            if not isinstance(name_lbl, ctk.CTkLabel): continue
-            
-            txt = name_lbl.cget("text").lower()
+        person_id = None
+        for pid in self._order:
+            txt = self._items[pid]["label"].lower()
             if txt.startswith("✓ "): txt = txt[2:]
-            
             if search in txt:
-                found_widget = row
+                person_id = pid
                 break
         
-        if found_widget:
-            orig_color = found_widget.cget("fg_color")
-            flash_color = COLORS["accent"]
-            
-            def flash(step):
+        if person_id is None:
+            return
+        
+        # Center the row if it's outside the viewport. update_persons only
+        # scheduled the render, so grow the scrollregion to the new list
+        # first; otherwise a person added at the end maps onto the old one.
+        idx = self._index[person_id]
+        height = self.canvas.winfo_height()
+        region = max(self._content_height(), height)
+        self.canvas.configure(scrollregion=(0, 0, self.canvas.winfo_width(), region))
+        view_top, view_bottom = self.canvas.canvasy(0), self.canvas.canvasy(height)
+        row_top = idx * self.ROW_HEIGHT
+        if region > 0 and (row_top < view_top or row_top + self.ROW_HEIGHT > view_bottom):
+            target = row_top - (view_bottom - view_top - self.ROW_HEIGHT) / 2
+            self.canvas.yview_moveto(max(0.0, target) / region)
+        self._render()
+        
+        flash_color = COLORS["accent"]
+        flashing = {"row": None}
+        
+        def flash(step):
+            # The slot showing this person can change while scrolling
+            slot = self._slot_for(person_id)
+            prev = flashing["row"]
+            if prev is not None and (slot is None or slot["row"] is not prev):
                 try:
-                    if not found_widget.winfo_exists():
-                        return
+                    prev.configure(fg_color=COLORS["bg_card"])
                 except Exception:
+                    pass
+            if slot is None:
+                return
+            row = flashing["row"] = slot["row"]
+            try:
+                if not row.winfo_exists():
                     return
-                
-                if step > 5:
-                    try:
-                        found_widget.configure(fg_color=COLORS["bg_card"])
-                    except Exception:
-                        pass
-                    return
-                c = flash_color if step % 2 == 0 else COLORS["bg_card"]
+            except Exception:
+                return
+            
+            if step > 5:
                 try:
-                    found_widget.configure(fg_color=c)
+                    row.configure(fg_color=COLORS["bg_card"])
                 except Exception:
-                    return
-                self.after(200, lambda: flash(step + 1))
-            
-            flash(0)
+                    pass
+                return
+            c = flash_color if step % 2 == 0 else COLORS["bg_card"]
+            try:
+                row.configure(fg_color=c)
+            except Exception:
+                return
+            self.after(200, lambda: flash(step + 1))
+        
+        flash(0)
+
+
+# =============================================================================
+# Live Event Feed — pushed updates instead of DB polling timers
+# =============================================================================
+class DashboardEventFeed:
+    """
+    Bridges app.events batches onto the Tk thread.
+
+    The listener thread only drops batches into a queue; the Tk side drains
+    it with after(), so widgets are only touched from the main loop and the
+    database is never polled. Usage:
+
+        feed = DashboardEventFeed(root, stat_cards={"total_photos": photos_card},
+                                  processing=processing_widget,
+                                  on_persons_changed=refresh_people_list)
+        feed.start()
+    """
+
+    DRAIN_MS = 100
+
+    def __init__(self, root, stat_cards=None, processing=None, cloud=None, on_persons_changed=None):
+        import queue
+        from app.events import get_event_listener
+
+        self.root = root
+        self.stat_cards = stat_cards or {}
+        self.processing = processing
+        self.cloud = cloud
+        self.on_persons_changed = on_persons_changed
+        self.listener = get_event_listener()
+        self._queue = queue.SimpleQueue()
+        self._counts = {}
+
+    def start(self):
+        self.listener.add_callback(self._queue.put)
+        self.listener.start()
+        self.root.after(self.DRAIN_MS, self._drain)
+
+    def stop(self):
+        self.listener.remove_callback(self._queue.put)
+
+    def _drain(self):
+        persons_changed = False
+        changed = {}
+        while not self._queue.empty():
+            batch = self._queue.get()
+            changed.update(batch.get("counts", {}))
+            for event in batch.get("events", []):
+                if event.get("type") in ("person_created", "enrolled", "person_merged"):
+                    persons_changed = True
+        self._counts.update(changed)
+
+        for key, value in changed.items():
+            card = self.stat_cards.get(key)
+            if card is not None:
+                card.update_value(str(value))
+
+        if self.processing is not None and ("completed" in changed or "total_photos" in changed):
+            self.processing.update_progress(self._counts.get("completed", 0), self._counts.get("total_photos", 0))
+
+        if self.cloud is not None and "uploads_pending" in changed:
+            if changed["uploads_pending"]:
+                self.cloud.start_uploading()
+            else:
+                self.cloud.stop_uploading()
+
+        if persons_changed and self.on_persons_changed:
+            self.on_persons_changed()
+
+        try:
+            self.root.after(self.DRAIN_MS, self._drain)
+        except Exception:
+            pass    # window closed
+
+
+# =============================================================================
+# Shared-Memory Status Feed — pipeline counters without DB queries
+# =============================================================================
+class StatusBlockFeed:
+    """
+    Reads the worker and upload counters from app.status_block at 30 Hz.
+
+    A read is a few struct unpacks from a memory-mapped file, so this never
+    touches SQLite or the log stream. Widgets are updated when a writer
+    changed something, and at least every RECHECK_MS anyway: a crashed
+    worker never writes again, so only a re-read notices its heartbeat went
+    stale and drops its counts. Usage:
+
+        feed = StatusBlockFeed(root, processing=processing_widget, cloud=cloud_widget,
+                               stat_cards={"queued": queued_card, "stuck": stuck_card})
+        feed.start()
+    """
+
+    POLL_MS = 33
+    RECHECK_MS = 1000   # re-read even without writes, to age out dead workers
+
+    def __init__(self, root, processing=None, cloud=None, stat_cards=None):
+        from app.status_block import get_status_block
+
+        self.root = root
+        self.processing = processing
+        self.cloud = cloud
+        self.stat_cards = stat_cards or {}
+        self.block = get_status_block()
+        self._version = None
+        self._read_at = 0.0
+        self._last = {}
+
+    def start(self):
+        get_animation_clock(self.root).subscribe(self._poll, self.POLL_MS)
+
+    def stop(self):
+        get_animation_clock(self.root).unsubscribe(self._poll)
+
+    def _poll(self):
+        version = self.block.version()
+        now = time.monotonic()
+        if version == self._version and now - self._read_at < self.RECHECK_MS / 1000:
+            return
+        self._version = version
+        self._read_at = now
+        status = self.block.read()
+        pipeline, upload = status["pipeline"], status["upload"]
+
+        pipeline_changed = pipeline != self._last
+        for key, card in self.stat_cards.items():
+            value = pipeline.get(key)
+            if value is not None and value != self._last.get(key):
+                card.update_value(str(value))
+        self._last = pipeline
+
+        if self.processing is not None and pipeline_changed:
+            self.processing.update_progress(pipeline["completed"], pipeline["total"])
+            if pipeline["processing"] or pipeline["queued"]:
+                self.processing.start_processing()
+            else:
+                self.processing.stop_processing()
+
+        if self.cloud is not None and upload["pid"]:
+            self.cloud.update_transfer(upload)
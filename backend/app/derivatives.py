@@ -0,0 +1,148 @@
+"""
+Web-optimized upload derivatives.
+
+Guests open their photos on phones from WhatsApp links, so the first cloud
+pass sends a smaller, progressive derivative instead of the full processed
+2048px JPEG. The full-quality file goes up later in an off-peak pass.
+
+Supported derivative formats: progressive JPEG (default), WebP and AVIF.
+AVIF/HEIF support comes from the pillow-avif-plugin and pillow-heif
+plugins, registered here on first use (the same ones the processor uses).
+"""
+
+import importlib
+import io
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    "jpeg": (".jpg", "JPEG", "image/jpeg"),
+    "webp": (".webp", "WEBP", "image/webp"),
+    "avif": (".avif", "AVIF", "image/avif"),
+}
+
+
+@dataclass
+class DerivativeSettings:
+    """How the upload derivative is encoded."""
+    format: str = "jpeg"          # "off", "jpeg", "webp" or "avif"
+    max_dim: int = 1600           # longest edge in pixels
+    target_bytes: int = 400_000   # size target, quality is searched to fit
+    min_quality: int = 45
+    max_quality: int = 88
+
+    @property
+    def enabled(self) -> bool:
+        return self.format in FORMATS
+
+    @property
+    def suffix(self) -> str:
+        return FORMATS[self.format][0]
+
+    @property
+    def mime_type(self) -> str:
+        return FORMATS[self.format][2]
+
+
+_plugins_registered = False
+_plugins_lock = threading.Lock()
+
+
+def _register_plugins():
+    """Register the AVIF/HEIF pillow plugins once, without importing app.processor."""
+    global _plugins_registered
+    with _plugins_lock:
+        if _plugins_registered:
+            return
+        try:
+            importlib.import_module("pillow_heif").register_heif_opener()
+        except ImportError:
+            logger.debug("HEIC/HEIF not available (install: pip install pillow-heif)")
+        try:
+            importlib.import_module("pillow_avif")
+        except ImportError:
+            logger.debug("AVIF not available (install: pip install pillow-avif-plugin)")
+        _plugins_registered = True
+
+
+def _encode(img: Image.Image, settings: DerivativeSettings, quality: int) -> bytes:
+    pil_format = FORMATS[settings.format][1]
+    buf = io.BytesIO()
+    params = {"quality": quality}
+    if pil_format == "JPEG":
+        params.update(progressive=True, optimize=True)
+    elif pil_format == "WEBP":
+        params.update(method=4)
+    icc = img.info.get("icc_profile")
+    if icc:
+        params["icc_profile"] = icc
+    img.save(buf, format=pil_format, **params)
+    return buf.getvalue()
+
+
+def encode_derivative(src_path: Path, settings: DerivativeSettings) -> bytes:
+    """
+    Downscale and encode a photo, binary-searching the quality so the
+    result fits settings.target_bytes (or uses min_quality if it can't).
+    """
+    _register_plugins()
+
+    with Image.open(src_path) as img:
+        img = img.convert("RGB") if img.mode != "RGB" else img.copy()
+    img.thumbnail((settings.max_dim, settings.max_dim), Image.LANCZOS)
+
+    lo, hi = settings.min_quality, settings.max_quality
+    best = None
+    while lo <= hi:
+        q = (lo + hi) // 2
+        data = _encode(img, settings, q)
+        if len(data) <= settings.target_bytes:
+            best = data
+            lo = q + 1
+        else:
+            hi = q - 1
+    if best is None:
+        best = _encode(img, settings, settings.min_quality)
+    return best
+
+
+def get_derivative(src_path: Path, file_hash: str, cache_dir: Path, settings: DerivativeSettings) -> Optional[Path]:
+    """
+    Return the cached derivative for a photo, encoding it on first use.
+    Cache files are keyed by content hash plus every setting that changes
+    the output, so re-runs don't re-encode and a different --target-kb
+    doesn't reuse derivatives of the wrong size. Returns None if the
+    derivative would not be smaller than the source; that outcome is
+    cached too, as an empty .orig marker.
+    """
+    key = (f"{file_hash}_{settings.max_dim}_{settings.target_bytes}"
+           f"_q{settings.min_quality}-{settings.max_quality}")
+    out_path = cache_dir / f"{key}{settings.suffix}"
+    original_marker = cache_dir / f"{key}{settings.suffix}.orig"
+    if out_path.exists():
+        return out_path
+    if original_marker.exists():
+        return None
+
+    try:
+        data = encode_derivative(src_path, settings)
+    except Exception as e:
+        logger.warning(f"Derivative encode failed for {src_path.name}, using original: {e}")
+        return None
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    if len(data) >= src_path.stat().st_size:
+        original_marker.touch()
+        return None
+
+    tmp = out_path.with_suffix(out_path.suffix + ".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(out_path)
+    return out_path
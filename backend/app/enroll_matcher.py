@@ -0,0 +1,364 @@
+"""
+Batched selfie matching for /api/enroll.
+
+Each enrollment used to decode the selfie, run InsightFace and compare the
+embedding against every person one by one, all inside the request. When the
+MC asks the whole hall to scan the QR code, 200 selfies arrive within a few
+seconds and queue up behind the model.
+
+The matcher keeps ONE warm model on a dedicated thread and coalesces
+concurrent selfies into micro-batches:
+
+* request threads decode the JPEG themselves (cv2 releases the GIL) and
+  enqueue the pixels,
+* the model thread waits at most `max_wait_ms` for more selfies to arrive,
+  runs detection per image and a single batched recognition pass over all
+  aligned faces,
+* all embeddings are scored against the centroid matrix with one matmul.
+
+Server usage:
+
+    @app.post("/api/enroll")
+    async def enroll(selfie: UploadFile, ...):
+        data = await selfie.read()
+        result = await get_enroll_matcher().match_async(data)
+        if not result.face_found:
+            raise HTTPException(400, "No face found in selfie")
+        ...
+
+Don't route the matcher through offload.run_cpu(): that pool is capped at
+CPU_WORKERS threads, and each one would sit blocked on its Future, so no
+more than that many selfies could ever be waiting to be batched.
+match_async() awaits the Future directly; only the decode uses a thread.
+
+Every process that calls get_enroll_matcher() loads its own InsightFace
+model (buffalo_l is roughly 300-500 MB resident). With WEB_WORKERS=N the
+server pays that N times and each process batches only its own share of
+the selfies, so keep WEB_WORKERS=1 on small laptops.
+
+The worker calls get_enroll_matcher().invalidate() after assign_person() so
+new clusters show up on the next batch. Each batch is announced on
+app.events as "selfie_matched" (matched person ids, selfies with no face).
+"""
+
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+from app.events import publish
+
+logger = logging.getLogger(__name__)
+
+MATCH_THRESHOLD = 0.45      # cosine similarity, same scale as clustering
+MIN_DETECT_DIM = 640        # small selfies are upscaled like in processor.py
+CENTROID_MAX_AGE = 30.0     # seconds before the matrix is reloaded anyway
+
+
+@dataclass
+class MatchResult:
+    face_found: bool
+    person_id: Optional[int] = None
+    person_name: Optional[str] = None
+    similarity: float = 0.0
+
+    @property
+    def matched(self) -> bool:
+        return self.person_id is not None
+
+
+# ============================================
+# Embedding model
+# ============================================
+
+class InsightFaceEmbedder:
+    """
+    Detection per image, recognition batched across images.
+
+    FaceAnalysis.get() runs the recognition model once per face; here the
+    aligned 112x112 crops of the whole batch go through get_feat() together.
+    """
+
+    def __init__(self, analyzer=None):
+        if analyzer is None:
+            # Thread-local in processor.py, so this is the model thread's own instance
+            from app.processor import _get_face_analyzer
+            analyzer = _get_face_analyzer()
+        self.detector = analyzer.models["detection"]
+        self.recognizer = analyzer.models["recognition"]
+
+    def _largest_face_crop(self, img: np.ndarray) -> Optional[np.ndarray]:
+        import cv2
+        from insightface.utils import face_align
+
+        h, w = img.shape[:2]
+        scale = 1.0
+        if max(h, w) < MIN_DETECT_DIM:
+            scale = MIN_DETECT_DIM / max(h, w)
+            img = cv2.resize(img, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_CUBIC)
+
+        bboxes, kpss = self.detector.detect(img, max_num=0, metric="default")
+        if bboxes is None or len(bboxes) == 0 or kpss is None:
+            return None
+        areas = (bboxes[:, 2] - bboxes[:, 0]) * (bboxes[:, 3] - bboxes[:, 1])
+        best = int(np.argmax(areas))
+        return face_align.norm_crop(img, landmark=kpss[best])
+
+    def embed_batch(self, images: Sequence[np.ndarray]) -> List[Optional[np.ndarray]]:
+        crops = [self._largest_face_crop(img) for img in images]
+        present = [i for i, c in enumerate(crops) if c is not None]
+        out: List[Optional[np.ndarray]] = [None] * len(images)
+        if present:
+            feats = self.recognizer.get_feat([crops[i] for i in present])
+            for i, feat in zip(present, feats):
+                out[i] = feat
+        return out
+
+
+def decode_image(data: bytes) -> Optional[np.ndarray]:
+    import cv2
+    arr = np.frombuffer(data, dtype=np.uint8)
+    return cv2.imdecode(arr, cv2.IMREAD_COLOR)
+
+
+# ============================================
+# Centroid matrix
+# ============================================
+
+class CentroidIndex:
+    """All person centroids as one L2-normalized (N x D) float32 matrix."""
+
+    def __init__(self):
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.names: List[str] = []
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.loaded_at = 0.0
+
+    def set(self, ids: Sequence[int], names: Sequence[str], centroids: Sequence[np.ndarray]):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.names = list(names)
+        if len(centroids):
+            m = np.vstack(centroids).astype(np.float32)
+            m /= np.maximum(np.linalg.norm(m, axis=1, keepdims=True), 1e-12)
+        else:
+            m = np.zeros((0, 0), dtype=np.float32)
+        self.matrix = m
+        self.loaded_at = time.monotonic()
+
+    def load(self, conn):
+        """Read persons.centroid (float32 blobs) from the face database."""
+        ids, names, vecs = [], [], []
+        for pid, name, blob in conn.execute(
+            "SELECT id, name, centroid FROM persons WHERE centroid IS NOT NULL"
+        ):
+            ids.append(pid)
+            names.append(name)
+            vecs.append(np.frombuffer(blob, dtype=np.float32))
+        self.set(ids, names, vecs)
+        logger.info(f"Enroll matcher loaded {len(ids)} person centroids")
+
+    def best_matches(self, embeddings: np.ndarray):
+        """Return (row index, similarity) of the best centroid for each embedding."""
+        if self.matrix.shape[0] == 0:
+            n = embeddings.shape[0]
+            return np.full(n, -1), np.zeros(n, dtype=np.float32)
+        emb = embeddings.astype(np.float32)
+        emb /= np.maximum(np.linalg.norm(emb, axis=1, keepdims=True), 1e-12)
+        scores = emb @ self.matrix.T            # (batch x persons)
+        best = scores.argmax(axis=1)
+        return best, scores[np.arange(len(best)), best]
+
+
+# ============================================
+# Micro-batching matcher
+# ============================================
+
+class EnrollMatcher:
+    """Single model thread serving batched selfie matches."""
+
+    def __init__(
+        self,
+        embedder_factory: Optional[Callable[[], object]] = None,
+        centroid_loader: Optional[Callable[[CentroidIndex], None]] = None,
+        max_batch: int = 16,
+        max_wait_ms: float = 5.0,
+        threshold: float = MATCH_THRESHOLD,
+    ):
+        self.embedder_factory = embedder_factory or InsightFaceEmbedder
+        self.centroid_loader = centroid_loader or _load_from_db
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.threshold = threshold
+
+        self.index = CentroidIndex()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._stale = True
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+
+    # ---- Lifecycle ----
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="EnrollMatcher", daemon=True)
+                self._thread.start()
+        self._ready.wait()
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+            self._ready.clear()
+
+    def invalidate(self):
+        """Persons changed; reload the centroid matrix before the next batch."""
+        self._stale = True
+
+    # ---- Public API ----
+
+    def submit(self, image: np.ndarray) -> Future:
+        if self._thread is None:
+            self.start()
+        fut: Future = Future()
+        self._queue.put((image, fut))
+        return fut
+
+    def match(self, data: bytes, timeout: float = 30.0) -> MatchResult:
+        """Decode a selfie in the calling thread and wait for its batched match."""
+        image = decode_image(data)
+        if image is None:
+            return MatchResult(face_found=False)
+        return self.submit(image).result(timeout=timeout)
+
+    async def match_async(self, data: bytes, timeout: float = 30.0) -> MatchResult:
+        """match() for the event loop; no executor thread waits on the batch."""
+        image = await asyncio.to_thread(decode_image, data)
+        if image is None:
+            return MatchResult(face_found=False)
+        return await asyncio.wait_for(asyncio.wrap_future(self.submit(image)), timeout)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self._batches,
+            "items": self._items,
+            "avg_batch": round(self._items / self._batches, 2) if self._batches else 0.0,
+            "queued": self._queue.qsize(),
+            "persons": int(self.index.matrix.shape[0]),
+        }
+
+    # ---- Model thread ----
+
+    def _collect(self, first) -> list:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)   # let the main loop see the stop marker
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        try:
+            embedder = self.embedder_factory()
+            logger.info("Enroll matcher model warm")
+        except Exception as e:
+            logger.error(f"Enroll matcher could not load model: {e}")
+            embedder = None
+        self._ready.set()
+
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+            # Selfies whose caller already gave up (timeout, disconnect)
+            # are dropped here instead of going through the model
+            batch = [item for item in self._collect(first) if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            futures = [fut for _, fut in batch]
+            if embedder is None:
+                for fut in futures:
+                    _resolve(fut, exception=RuntimeError("Face model unavailable"))
+                continue
+            try:
+                self._process(embedder, batch)
+            except Exception as e:
+                logger.error(f"Enroll batch of {len(batch)} failed: {e}")
+                for fut in futures:
+                    _resolve(fut, exception=e)
+
+    def _process(self, embedder, batch):
+        if self._stale or time.monotonic() - self.index.loaded_at > CENTROID_MAX_AGE:
+            self._stale = False
+            self.centroid_loader(self.index)
+
+        embeddings = embedder.embed_batch([img for img, _ in batch])
+        self._batches += 1
+        self._items += len(batch)
+
+        found = [i for i, e in enumerate(embeddings) if e is not None]
+        results = [MatchResult(face_found=False) for _ in batch]
+        if found:
+            rows, sims = self.index.best_matches(np.vstack([embeddings[i] for i in found]))
+            for i, row, sim in zip(found, rows, sims):
+                result = MatchResult(face_found=True, similarity=float(sim))
+                if row >= 0 and sim >= self.threshold:
+                    result.person_id = int(self.index.ids[row])
+                    result.person_name = self.index.names[row]
+                results[i] = result
+
+        for (_, fut), result in zip(batch, results):
+            _resolve(fut, result)
+        publish(
+            "selfie_matched",
+            person_ids=[r.person_id for r in results if r.matched],
+            no_face=sum(1 for r in results if not r.face_found),
+            selfies=len(results),
+        )
+
+
+def _resolve(fut: Future, result=None, exception: Optional[BaseException] = None):
+    """Complete a batch member's Future unless it's already done."""
+    if fut.done():
+        return
+    try:
+        if exception is not None:
+            fut.set_exception(exception)
+        else:
+            fut.set_result(result)
+    except InvalidStateError:
+        pass    # resolved concurrently
+
+
+def _load_from_db(index: CentroidIndex):
+    from app.db import get_db
+    index.load(get_db().connect())
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_enroll_matcher() -> EnrollMatcher:
+    global _matcher
+    with _matcher_lock:
+        if _matcher is None:
+            _matcher = EnrollMatcher()
+        return _matcher
@@ -0,0 +1,367 @@
+"""
+Push-based event bus.
+
+The guest page polled /api/stats and the desktop dashboard polled the DB on
+timers to refresh its counters, ring and people list. Instead, the code that
+changes things now announces it:
+
+    from app.events import publish
+    publish("upload_done", path=str(job.path), ok=ok, bytes=job.size)   # UploadScheduler
+    publish("counts", uploads_pending=..., uploads_done=..., uploads_failed=...)
+    publish("selfie_matched", person_ids=[...], no_face=1, selfies=8)   # EnrollMatcher
+    publish("whatsapp_ready", enrollment_ids=[...])                      # whatsapp_readiness
+
+The photo worker should do the same for "photo_completed", "person_created"
+and the photo/face counts once it publishes.
+
+Publishers (worker, upload scheduler, enroll matcher) and listeners (web
+server, desktop dashboard, WhatsApp sender) run in different processes, so events travel as small JSON UDP
+datagrams over loopback. Every listener binds its own port and registers it
+as a file in data/event_listeners/; publish() sends to each registered port.
+A listener touches its file every REGISTRATION_HEARTBEAT; publishers forget
+files that have not been touched for REGISTRATION_STALE.
+
+Delivery is best effort. Every datagram carries its publisher ("src") and a
+per-publisher sequence number, so a listener can tell when one was lost.
+Batches report lost datagrams as "missed" and overflow as "dropped"; either
+means the subscriber should resync from the DB.
+
+Listeners coalesce events: every FLUSH_INTERVAL one batch goes out with the
+counts that changed and the events since the last batch. A burst of 200
+processed photos becomes a handful of updates, not 200.
+
+Server usage:
+
+    @app.on_event("startup")
+    def start_events():
+        listener = get_event_listener()
+        listener.ingest({"type": "counts", "data": get_db().get_stats()})  # one read at startup
+        listener.start()
+
+    @app.get("/api/events")
+    async def events(request: Request):
+        return sse_response(request)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 0.25       # seconds between coalesced batches
+MAX_EVENTS_PER_BATCH = 50
+HEARTBEAT_INTERVAL = 15.0   # SSE comment to keep proxies from closing the stream
+TARGETS_TTL = 2.0           # how long publish() caches the listener list
+REGISTRATION_HEARTBEAT = 5.0
+REGISTRATION_STALE = 30.0   # listener files older than this belong to dead processes
+MAX_DATAGRAM = 8192
+
+
+def _registry_dir() -> Path:
+    # Imported here so publishers (upload_scheduler, enroll_matcher) don't
+    # need the app config just to be imported
+    from app.config import get_config
+    return Path(get_config().db_path).parent / "event_listeners"
+
+
+# ============================================
+# Publishing
+# ============================================
+
+class _Publisher:
+    def __init__(self):
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._lock = threading.Lock()
+        self._targets: List[int] = []
+        self._targets_at = 0.0
+        self._registry_mtime = None
+        self.src = f"{os.getpid()}-{os.urandom(3).hex()}"
+        self._seq = 0
+
+    def _registry_changed(self) -> bool:
+        # A listener registering or leaving changes the directory's mtime
+        try:
+            mtime = _registry_dir().stat().st_mtime_ns
+        except OSError:
+            mtime = None
+        return mtime != self._registry_mtime
+
+    def _refresh_targets(self):
+        ports = []
+        registry = _registry_dir()
+        try:
+            self._registry_mtime = registry.stat().st_mtime_ns
+        except OSError:
+            self._registry_mtime = None
+        if registry.is_dir():
+            now = time.time()
+            for entry in registry.iterdir():
+                try:
+                    _, port = (int(x) for x in entry.name.split("-", 1))
+                    fresh = now - entry.stat().st_mtime < REGISTRATION_STALE
+                except (ValueError, OSError):
+                    continue
+                if fresh:
+                    ports.append(port)
+                else:
+                    entry.unlink(missing_ok=True)
+        self._targets = ports
+        self._targets_at = time.monotonic()
+
+    def send(self, message: dict):
+        with self._lock:
+            self._seq += 1
+            message["src"], message["seq"] = self.src, self._seq
+            payload = json.dumps(message, separators=(",", ":"), default=str).encode()
+            if len(payload) > MAX_DATAGRAM:
+                # Still counts as sent: listeners see the gap and resync
+                logger.debug(f"Dropping oversized event {message.get('type')}")
+                return
+            if time.monotonic() - self._targets_at > TARGETS_TTL or self._registry_changed():
+                self._refresh_targets()
+            for port in self._targets:
+                try:
+                    self._sock.sendto(payload, ("127.0.0.1", port))
+                except OSError:
+                    pass
+
+
+_publisher: Optional[_Publisher] = None
+_publisher_lock = threading.Lock()
+
+
+def publish(event_type: str, **data):
+    """Announce an event to every listening process. Never raises."""
+    global _publisher
+    try:
+        with _publisher_lock:
+            if _publisher is None:
+                _publisher = _Publisher()
+        _publisher.send({"type": event_type, "ts": time.time(), "data": data})
+    except Exception as e:
+        logger.debug(f"Event publish failed ({event_type}): {e}")
+
+
+# ============================================
+# Listening + coalescing
+# ============================================
+
+class EventListener:
+    """
+    Receives events for this process and hands coalesced batches to callbacks.
+
+    A batch looks like:
+        {"counts": {"total_photos": 812}, "events": [{"type": ..., "data": ...}],
+         "dropped": 0, "missed": 0}
+
+    "dropped" counts events past MAX_EVENTS_PER_BATCH, "missed" counts
+    datagrams lost on the way (sequence gaps). Subscribers that need every
+    event resync from the DB when either is non-zero (needs_resync()).
+    """
+
+    def __init__(self, flush_interval: float = FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self.counts: Dict[str, int] = {}        # latest known value of every counter
+        self._pending_counts: Dict[str, int] = {}
+        self._pending_events: list = []
+        self._dropped = 0
+        self._missed = 0
+        self._last_seq: Dict[str, int] = {}     # publisher -> last sequence number seen
+        self._callbacks: List[Callable[[dict], None]] = []
+        self._lock = threading.Lock()
+        self._sock: Optional[socket.socket] = None
+        self._registration: Optional[Path] = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def add_callback(self, fn: Callable[[dict], None]):
+        with self._lock:
+            self._callbacks.append(fn)
+
+    def remove_callback(self, fn: Callable[[dict], None]):
+        with self._lock:
+            if fn in self._callbacks:
+                self._callbacks.remove(fn)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"counts": dict(self.counts), "events": [], "dropped": 0, "missed": 0}
+
+    # ---- Lifecycle ----
+
+    def start(self):
+        if self._sock is not None:
+            return
+        self._stop.clear()
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind(("127.0.0.1", 0))
+        self._sock.settimeout(0.5)
+        port = self._sock.getsockname()[1]
+
+        registry = _registry_dir()
+        registry.mkdir(parents=True, exist_ok=True)
+        self._registration = registry / f"{os.getpid()}-{port}"
+        self._registration.touch()
+        self._touched = time.monotonic()
+
+        self._threads = [
+            threading.Thread(target=self._recv_loop, name="EventRecv", daemon=True),
+            threading.Thread(target=self._flush_loop, name="EventFlush", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+        logger.info(f"Event listener on udp/{port}")
+
+    def stop(self):
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=2)
+        self._threads = []
+        if self._registration is not None:
+            self._registration.unlink(missing_ok=True)
+            self._registration = None
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    # ---- Internals ----
+
+    def ingest(self, message: dict):
+        """Merge one event into the pending batch (also usable in-process)."""
+        data = message.get("data") or {}
+        with self._lock:
+            src, seq = message.get("src"), message.get("seq")
+            if src is not None and seq is not None:
+                last = self._last_seq.get(src)
+                if last is not None and seq > last + 1:
+                    self._missed += seq - last - 1
+                if last is None or seq > last:
+                    self._last_seq[src] = seq
+            if message.get("type") == "counts":
+                for key, value in data.items():
+                    if self.counts.get(key) != value:
+                        self.counts[key] = value
+                        self._pending_counts[key] = value
+                return
+            if len(self._pending_events) < MAX_EVENTS_PER_BATCH:
+                self._pending_events.append(message)
+            else:
+                self._dropped += 1
+
+    def _recv_loop(self):
+        while not self._stop.is_set():
+            try:
+                payload, _ = self._sock.recvfrom(MAX_DATAGRAM)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            try:
+                self.ingest(json.loads(payload))
+            except ValueError:
+                continue
+
+    def _heartbeat(self):
+        if time.monotonic() - self._touched < REGISTRATION_HEARTBEAT:
+            return
+        self._touched = time.monotonic()
+        try:
+            self._registration.touch()     # also recreates it if a publisher expired us
+        except (OSError, AttributeError):
+            pass
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self._heartbeat()
+            with self._lock:
+                if not self._pending_counts and not self._pending_events and not self._missed:
+                    continue
+                batch = {
+                    "counts": self._pending_counts,
+                    "events": self._pending_events,
+                    "dropped": self._dropped,
+                    "missed": self._missed,
+                }
+                self._pending_counts, self._pending_events, self._dropped, self._missed = {}, [], 0, 0
+                callbacks = list(self._callbacks)
+            for fn in callbacks:
+                try:
+                    fn(batch)
+                except Exception as e:
+                    logger.warning(f"Event callback failed: {e}")
+
+
+def needs_resync(batch: dict) -> bool:
+    """True when events were lost before this batch and state must be reread."""
+    return bool(batch.get("dropped") or batch.get("missed"))
+
+
+_listener: Optional[EventListener] = None
+
+
+def get_event_listener() -> EventListener:
+    global _listener
+    with _publisher_lock:
+        if _listener is None:
+            _listener = EventListener()
+        return _listener
+
+
+# ============================================
+# Server-sent events
+# ============================================
+
+def _format_sse(batch: dict) -> str:
+    return f"event: batch\ndata: {json.dumps(batch, separators=(',', ':'), default=str)}\n\n"
+
+
+async def sse_stream(request, listener: Optional[EventListener] = None):
+    """Async generator of SSE frames for one connected client."""
+    listener = listener or get_event_listener()
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=20)
+
+    def deliver(batch: dict):
+        # Called on the listener's flush thread
+        loop.call_soon_threadsafe(_offer, batch)
+
+    def _offer(batch: dict):
+        try:
+            queue.put_nowait(batch)
+        except asyncio.QueueFull:
+            # Slow client: throw away its backlog and resync from the snapshot
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(listener.snapshot())
+
+    listener.add_callback(deliver)
+    try:
+        yield "retry: 3000\n\n" + _format_sse(listener.snapshot())
+        while True:
+            if await request.is_disconnected():
+                break
+            try:
+                batch = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield _format_sse(batch)
+    finally:
+        listener.remove_callback(deliver)
+
+
+def sse_response(request):
+    from fastapi.responses import StreamingResponse
+
+    return StreamingResponse(
+        sse_stream(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,144 @@
+"""
+Keyset-paginated gallery index for /api/photos/{person}.
+
+The endpoint used to list People/<name>/<Solo|Group> on every request and
+return the whole list. For the couple and close family that's thousands of
+entries per page load. Routed photos are now recorded in a `photo_routes`
+table whose primary key is (person_id, category, photo_id), so one page is a
+single index range scan:
+
+    SELECT ... WHERE person_id = ? AND category = ? AND photo_id > ?
+    ORDER BY photo_id LIMIT ?
+
+The router calls record_route() for every copy it places; backfill() fills
+the table from the existing People/ tree once.
+
+list_photos() takes the category, cursor and limit straight from the query
+string and raises InvalidPageRequest for anything malformed, which the
+server turns into a 400:
+
+    try:
+        return await get_async_db().call(lambda conn: list_photos(conn, pid, category, cursor, limit))
+    except InvalidPageRequest as e:
+        raise HTTPException(400, str(e))
+"""
+
+import logging
+import re
+import sqlite3
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES = ("solo", "group")
+DEFAULT_PAGE_SIZE = 60
+MAX_PAGE_SIZE = 200
+
+_PHOTO_NAME = re.compile(r"^(\d+)\.[A-Za-z0-9]+$")
+
+
+class InvalidPageRequest(ValueError):
+    """Bad category, cursor or limit from the client (answer 400, not 500)."""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS photo_routes (
+    person_id INTEGER NOT NULL,
+    category  TEXT    NOT NULL,
+    photo_id  INTEGER NOT NULL,
+    path      TEXT    NOT NULL,
+    PRIMARY KEY (person_id, category, photo_id)
+) WITHOUT ROWID;
+"""
+
+
+def ensure_schema(conn: sqlite3.Connection):
+    conn.executescript(SCHEMA)
+
+
+def record_route(conn: sqlite3.Connection, person_id: int, category: str, photo_id: int, path: Path):
+    """Router hook: remember that a photo was placed in a person's folder."""
+    conn.execute(
+        "INSERT OR REPLACE INTO photo_routes (person_id, category, photo_id, path) VALUES (?, ?, ?, ?)",
+        (person_id, category.lower(), photo_id, str(path)),
+    )
+    conn.commit()
+
+
+def remove_person(conn: sqlite3.Connection, person_id: int):
+    """Drop a person's routes (person deleted or merged)."""
+    conn.execute("DELETE FROM photo_routes WHERE person_id = ?", (person_id,))
+    conn.commit()
+
+
+def backfill(conn: sqlite3.Connection, people_dir: Path) -> int:
+    """
+    One-time import from the People/<name>/<Solo|Group>/NNNNNN.jpg tree.
+    Returns the number of routes recorded.
+    """
+    ensure_schema(conn)
+    persons = {name: pid for pid, name in conn.execute("SELECT id, name FROM persons")}
+    rows = []
+    for person_dir in Path(people_dir).iterdir():
+        person_id = persons.get(person_dir.name)
+        if person_id is None or not person_dir.is_dir():
+            continue
+        for category in CATEGORIES:
+            cat_dir = person_dir / category.capitalize()
+            if not cat_dir.is_dir():
+                continue
+            for f in cat_dir.iterdir():
+                m = _PHOTO_NAME.match(f.name)
+                if m:
+                    rows.append((person_id, category, int(m.group(1)), str(f)))
+    conn.executemany(
+        "INSERT OR REPLACE INTO photo_routes (person_id, category, photo_id, path) VALUES (?, ?, ?, ?)",
+        rows,
+    )
+    conn.commit()
+    logger.info(f"Gallery index backfilled with {len(rows)} routes")
+    return len(rows)
+
+
+def list_photos(conn: sqlite3.Connection, person_id: int, category: str,
+                cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> dict:
+    """
+    One page of a person's photos, oldest first.
+
+    `cursor` is the opaque value returned as `next_cursor` by the previous
+    page. The total is only counted for the first page (the gallery needs it
+    for the tab badge), so later pages are a pure range scan.
+    """
+    category = category.lower()
+    if category not in CATEGORIES:
+        raise InvalidPageRequest(f"Unknown category: {category}")
+    try:
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        raise InvalidPageRequest(f"Invalid limit: {limit!r}") from None
+    if cursor and not (cursor.isascii() and cursor.isdigit()):
+        raise InvalidPageRequest(f"Invalid cursor: {cursor!r}")
+    after = int(cursor) if cursor else 0
+
+    rows = conn.execute(
+        "SELECT photo_id, path FROM photo_routes "
+        "WHERE person_id = ? AND category = ? AND photo_id > ? "
+        "ORDER BY photo_id LIMIT ?",
+        (person_id, category, after, limit + 1),
+    ).fetchall()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    page = {
+        "items": [
+            {"photo_id": photo_id, "path": path, "filename": Path(path).name}
+            for photo_id, path in rows
+        ],
+        "next_cursor": str(rows[-1][0]) if has_more else None,
+    }
+    if cursor is None:
+        page["total"] = conn.execute(
+            "SELECT COUNT(*) FROM photo_routes WHERE person_id = ? AND category = ?",
+            (person_id, category),
+        ).fetchone()[0]
+    return page
@@ -0,0 +1,284 @@
+"""
+Write-ahead intent journal for the photo pipeline.
+
+Crash safety used to come from _reset_stuck_processing() at startup. It
+scanned every 'processing' and 'pending' photo for face rows, deleted
+orphans, recomputed centroids and dropped empty persons, and whatever it
+missed was fixed by hand with fix_stuck_photos.py, reset_cb_photos.py or
+queue_fixed_photos.py.
+
+Now the worker appends an intent line to data/journal-<worker>.jsonl
+*before* each stage of the pipeline, so a crash in the middle of a stage
+always leaves a record of what was under way:
+
+    begin -> detect -> assign -> route -> enqueue -> done
+
+On restart only photos without a terminal record ('done' or 'failed') are
+looked at, so recovery is O(in-flight), not O(photos):
+
+    last intent                 recovery
+    begin/detect/assign         roll back: drop its face rows, recompute the
+                                centroids of the persons they belonged to,
+                                delete persons left with no faces, remove the
+                                processed file, back to 'pending'
+    route                       replay: route to person folders, enqueue, complete
+    enqueue                     replay: enqueue the routed files, complete
+
+The rollback's DB changes are one transaction. Replays reuse the idempotent
+route_photo() / upload_queue.enqueue() paths. The file is rewritten with
+only the in-flight records whenever it grows past COMPACT_BYTES, so it
+stays small.
+
+Worker:
+
+    journal = get_journal()
+    journal.recover()                       # once, before the watcher starts
+    ...
+    with journal.photo(photo_id, original=str(path)) as stage:
+        processed = normalize(...)
+        stage("detect", path=str(processed))
+        faces = detect(...)
+        stage("assign", person_floor=RecoveryActions.person_floor())
+        for face in faces:
+            person_id = assign(face)
+            stage("assign", persons=[person_id])    # persons touched so far
+        stage("route")
+        routed = route_photo(...)
+        stage("enqueue", paths=[str(p) for p in routed])
+        enqueue(...)
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.config import get_config
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("begin", "detect", "assign", "route", "enqueue")
+TERMINAL = ("done", "failed")
+ROLL_FORWARD = ("route", "enqueue")     # everything before these is rolled back
+COMPACT_BYTES = 1024 * 1024
+
+
+def _merge(into: dict, data: dict):
+    # "persons" accumulates across records; everything else is last-wins
+    for key, value in data.items():
+        if key == "persons":
+            into[key] = sorted(set(into.get(key, [])) | set(value))
+        else:
+            into[key] = value
+
+
+class PipelineJournal:
+    def __init__(self, path: Path, fsync: bool = True, compact_bytes: int = COMPACT_BYTES):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+        self.compact_bytes = compact_bytes
+        self._lock = threading.Lock()
+        # photo_id -> {"stage": last stage, "data": merged stage data}
+        self._inflight: Dict[int, dict] = self._load()
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._size = os.fstat(self._fd).st_size
+
+    # ---- Reading ----
+
+    def _load(self) -> Dict[int, dict]:
+        inflight: Dict[int, dict] = {}
+        if not self.path.exists():
+            return inflight
+        raw = self.path.read_bytes()
+        end = raw.rfind(b"\n") + 1
+        if end < len(raw):
+            # Torn last line from the crash; cut it so new records start clean
+            with open(self.path, "r+b") as f:
+                f.truncate(end)
+        for line in raw[:end].decode("utf-8", errors="replace").splitlines():
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            pid, stage = rec.get("photo"), rec.get("stage")
+            if stage in TERMINAL:
+                inflight.pop(pid, None)
+            elif stage in STAGES:
+                entry = inflight.setdefault(pid, {"stage": stage, "data": {}})
+                entry["stage"] = stage
+                _merge(entry["data"], rec.get("data") or {})
+        return inflight
+
+    def in_flight(self) -> Dict[int, dict]:
+        with self._lock:
+            return {pid: {"stage": e["stage"], "data": dict(e["data"])} for pid, e in self._inflight.items()}
+
+    # ---- Writing ----
+
+    def record(self, photo_id: int, stage: str, **data):
+        if stage not in STAGES and stage not in TERMINAL:
+            raise ValueError(f"Unknown pipeline stage: {stage}")
+        line = json.dumps({"photo": photo_id, "stage": stage, "t": round(time.time(), 3), "data": data or None},
+                          separators=(",", ":")) + "\n"
+        with self._lock:
+            if stage in TERMINAL:
+                self._inflight.pop(photo_id, None)
+            else:
+                entry = self._inflight.setdefault(photo_id, {"stage": stage, "data": {}})
+                entry["stage"] = stage
+                _merge(entry["data"], data)
+            os.write(self._fd, line.encode("utf-8"))
+            if self.fsync:
+                os.fsync(self._fd)
+            self._size += len(line)
+            if stage in TERMINAL and self._size > self.compact_bytes:
+                self._compact_locked()
+
+    @contextmanager
+    def photo(self, photo_id: int, **data):
+        """Journal one photo. Yields stage(name, **data); records done/failed on exit."""
+        self.record(photo_id, "begin", **data)
+        try:
+            yield lambda stage, **d: self.record(photo_id, stage, **d)
+        except Exception as e:
+            # The worker's own error path marks the photo; nothing to recover.
+            # KeyboardInterrupt/SystemExit leave it in flight for recover().
+            self.record(photo_id, "failed", error=str(e)[:200])
+            raise
+        else:
+            self.record(photo_id, "done")
+
+    def compact(self):
+        with self._lock:
+            self._compact_locked()
+
+    def _compact_locked(self):
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for pid, entry in self._inflight.items():
+                f.write(json.dumps({"photo": pid, "stage": entry["stage"], "t": round(time.time(), 3),
+                                    "data": entry["data"] or None}, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.close(self._fd)
+        os.replace(tmp, self.path)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._size = os.fstat(self._fd).st_size
+
+    def close(self):
+        os.close(self._fd)
+
+    # ---- Recovery ----
+
+    def recover(self, actions: Optional["RecoveryActions"] = None) -> dict:
+        """Roll back or replay every in-flight photo, then compact. Returns counts."""
+        actions = actions or RecoveryActions()
+        counts = {"rolled_back": 0, "replayed": 0, "errors": 0}
+        for photo_id, entry in sorted(self.in_flight().items()):
+            stage, data = entry["stage"], entry["data"]
+            try:
+                if stage in ROLL_FORWARD:
+                    actions.replay(photo_id, stage, data)
+                    counts["replayed"] += 1
+                    self.record(photo_id, "done", recovered=stage)
+                else:
+                    actions.rollback(photo_id, stage, data)
+                    counts["rolled_back"] += 1
+                    self.record(photo_id, "failed", error=f"rolled back from {stage}")
+            except Exception as e:
+                counts["errors"] += 1
+                logger.error(f"Recovery of photo {photo_id} (at {stage}) failed: {e}")
+        self.compact()
+        if counts["rolled_back"] or counts["replayed"] or counts["errors"]:
+            logger.info(f"Journal recovery: {counts}")
+        return counts
+
+
+class RecoveryActions:
+    """What recovery does to the DB and disk. Swappable for tests and benchmarks."""
+
+    @staticmethod
+    def person_floor() -> int:
+        """Highest person id right now; persons above it were created by this assign."""
+        from app.db import get_db
+
+        return get_db().connect().execute("SELECT COALESCE(MAX(id), 0) FROM persons").fetchone()[0]
+
+    def rollback(self, photo_id: int, stage: str, data: dict):
+        import numpy as np
+        from app.db import get_db
+
+        conn = get_db().connect()
+        if conn.in_transaction:
+            conn.commit()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            touched = set(data.get("persons", []))
+            touched.update(row[0] for row in conn.execute(
+                "SELECT DISTINCT person_id FROM faces WHERE photo_id = ? AND person_id IS NOT NULL", (photo_id,)))
+            if data.get("person_floor") is not None:
+                # Created by the interrupted assign before it journaled them
+                touched.update(row[0] for row in conn.execute(
+                    "SELECT id FROM persons WHERE id > ?", (data["person_floor"],)))
+            conn.execute("DELETE FROM faces WHERE photo_id = ?", (photo_id,))
+            for person_id in sorted(touched):
+                rows = conn.execute(
+                    "SELECT embedding FROM faces WHERE person_id = ? AND embedding IS NOT NULL", (person_id,)
+                ).fetchall()
+                if not rows:
+                    conn.execute("DELETE FROM persons WHERE id = ?", (person_id,))
+                    continue
+                centroid = np.mean([np.frombuffer(r[0], dtype=np.float32) for r in rows], axis=0)
+                centroid /= max(float(np.linalg.norm(centroid)), 1e-12)
+                conn.execute(
+                    "UPDATE persons SET centroid = ?, face_count = ? WHERE id = ?",
+                    (centroid.astype(np.float32).tobytes(), len(rows), person_id),
+                )
+            conn.execute(
+                "UPDATE photos SET status = 'pending', processed_path = NULL, thumbnail_path = NULL, "
+                "face_count = NULL, processed_at = NULL WHERE id = ?",
+                (photo_id,),
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        if touched:
+            logger.info(f"Rolled back photo {photo_id}: recomputed persons {sorted(touched)}")
+        processed = data.get("path") or get_config().processed_dir / f"{photo_id:06d}.jpg"
+        Path(processed).unlink(missing_ok=True)
+
+    def replay(self, photo_id: int, stage: str, data: dict):
+        from app.db import get_db
+
+        config = get_config()
+        db = get_db()
+        routed = [Path(p) for p in data.get("paths", [])]
+        if stage == "route":
+            from app.router import route_photo
+            processed = Path(data.get("path") or config.processed_dir / f"{photo_id:06d}.jpg")
+            routed = route_photo(photo_id, processed, db.get_unique_persons_in_photo(photo_id), config) or []
+        from app.upload_queue import get_upload_queue
+        upload_queue = get_upload_queue()
+        for path in routed:
+            upload_queue.enqueue(photo_id, Path(path), config.event_root)
+        db.update_photo_status(photo_id, "completed")
+
+
+_journal: Optional[PipelineJournal] = None
+_journal_lock = threading.Lock()
+
+
+def get_journal() -> PipelineJournal:
+    """This worker process's journal (one file per WORKER_INDEX)."""
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            index = os.environ.get("WORKER_INDEX", "0")
+            _journal = PipelineJournal(Path(get_config().db_path).parent / f"journal-{index}.jsonl")
+        return _journal
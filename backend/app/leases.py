@@ -0,0 +1,258 @@
+"""
+Claim-based work distribution across worker processes and machines.
+
+One laptop's CPU caps throughput at a big wedding. With leases, several
+worker processes can pull from the same Incoming/ folder without
+processing a photo twice. That includes a second laptop that mounts the
+EventRoot over SMB/NFS. Before touching a photo a worker claims a lease
+on it:
+
+    EventRoot/Admin/leases/<key>.lease    {"owner", "node", "pid", "expires_at", ...}
+
+* Claiming is an O_CREAT|O_EXCL create, which is atomic on local disks and
+  on SMB/NFS shares, unlike SQLite's byte-range locks. The DB is not used
+  for this.
+* The holder heartbeats every ttl/3 by touching the file: a lease expires
+  ttl after its last mtime. The content (the owner) is never rewritten, so
+  a heartbeat can't overwrite a lease another node took in the meantime.
+* A lease past expires_at (plus a grace period for clock skew between
+  laptops) is stolen by the next claimer. A dead node's photos go back to
+  the pool on their own, without a _reset_stuck_processing() pass at
+  startup.
+
+Worker loop (WORKERS=N with CLAIM_MODE=1 in run.py, which also starts the
+heartbeat):
+
+    leases = get_lease_manager()
+    leases.start_heartbeat()
+    for path in sorted(config.incoming_dir.iterdir()):
+        if not leases.claim(path.name):
+            continue            # another worker has it
+        try:
+            process_single_photo(...)
+        finally:
+            leases.release(path.name)
+"""
+
+import json
+import logging
+import os
+import re
+import socket
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 60.0          # seconds a lease lives without a heartbeat
+CLOCK_SKEW_GRACE = 15.0     # extra time before another node may steal it
+_UNSAFE = re.compile(r"[^A-Za-z0-9._-]")
+
+
+def _lease_name(key: str) -> str:
+    return _UNSAFE.sub("_", key) + ".lease"
+
+
+class LeaseManager:
+    def __init__(self, lease_dir: Path, ttl: float = DEFAULT_TTL, node: Optional[str] = None):
+        self.lease_dir = Path(lease_dir)
+        self.lease_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.node = node or socket.gethostname()
+        self.owner = f"{self.node}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._held: Dict[str, Path] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+        self.stats = {"claimed": 0, "stolen": 0, "lost": 0, "busy": 0}
+
+    # ---- Lease files ----
+
+    def _path(self, key: str) -> Path:
+        return self.lease_dir / _lease_name(key)
+
+    def _payload(self, key: str) -> bytes:
+        now = time.time()
+        return json.dumps({
+            "key": key, "owner": self.owner, "node": self.node, "pid": os.getpid(),
+            "claimed_at": now, "expires_at": now + self.ttl,
+        }).encode()
+
+    def _read(self, path: Path) -> Optional[dict]:
+        try:
+            lease = json.loads(path.read_bytes())
+            # Heartbeats touch the file instead of rewriting expires_at
+            lease["expires_at"] = max(lease.get("expires_at", 0), path.stat().st_mtime + self.ttl)
+            return lease
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            # Being written right now, or left half-written by a node that
+            # died mid-create: it expires a TTL after it was created
+            try:
+                return {"owner": None, "expires_at": path.stat().st_mtime + self.ttl}
+            except OSError:
+                return None
+
+    def _create(self, path: Path, key: str) -> bool:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return False
+        try:
+            os.write(fd, self._payload(key))
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        return True
+
+    # ---- Public API ----
+
+    def claim(self, key: str) -> bool:
+        """Try to take the lease on `key`. True if this process now holds it."""
+        path = self._path(key)
+        if self._create(path, key):
+            return self._took(key, path)
+
+        lease = self._read(path)
+        if lease is None:
+            # Released between our create and read; one more try
+            return self._create(path, key) and self._took(key, path)
+        if lease.get("owner") == self.owner:
+            return True
+        if time.time() < lease.get("expires_at", 0) + CLOCK_SKEW_GRACE:
+            self.stats["busy"] += 1
+            return False
+
+        # Expired: move it aside. rename() succeeds for exactly one stealer.
+        graveyard = path.with_name(f"{path.name}.expired.{uuid.uuid4().hex[:8]}")
+        try:
+            os.replace(path, graveyard)
+        except FileNotFoundError:
+            return False
+        moved = self._read(graveyard)
+        if moved is not None and time.time() < moved.get("expires_at", 0) + CLOCK_SKEW_GRACE:
+            # Another node reclaimed it between our read and rename: put theirs back
+            self._restore(graveyard, path)
+            self.stats["busy"] += 1
+            return False
+        try:
+            graveyard.unlink()
+        except OSError:
+            pass
+        logger.warning(f"Lease on {key} from {lease.get('owner')} expired, reclaiming")
+        if self._create(path, key):
+            self.stats["stolen"] += 1
+            return self._took(key, path)
+        return False
+
+    @staticmethod
+    def _restore(moved: Path, path: Path):
+        try:
+            os.link(moved, path)        # fails rather than overwrite a newer lease
+        except FileExistsError:
+            pass
+        except OSError:
+            try:
+                os.rename(moved, path)  # shares without hard links
+                return
+            except OSError:
+                pass
+        try:
+            moved.unlink()
+        except OSError:
+            pass
+
+    def _took(self, key: str, path: Path) -> bool:
+        with self._lock:
+            self._held[key] = path
+        self.stats["claimed"] += 1
+        return True
+
+    def release(self, key: str):
+        with self._lock:
+            path = self._held.pop(key, None)
+        if path is None:
+            return
+        lease = self._read(path)
+        if lease is not None and lease.get("owner") == self.owner:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def holds(self, key: str) -> bool:
+        with self._lock:
+            return key in self._held
+
+    def held(self) -> List[str]:
+        with self._lock:
+            return list(self._held)
+
+    def renew(self):
+        """Push every held lease's expiry forward. Leases stolen from us are dropped."""
+        for key in self.held():
+            path = self._path(key)
+            try:
+                # Touch first, then check the owner. If another node stole the
+                # lease, this only extends *their* lease; nothing is overwritten.
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.error(f"Could not renew lease on {key}: {e}")
+                continue
+            lease = self._read(path)
+            if lease is None or lease.get("owner") != self.owner:
+                # We stalled past the TTL and another node took over
+                logger.warning(f"Lost lease on {key} to {lease.get('owner') if lease else 'nobody'}")
+                with self._lock:
+                    self._held.pop(key, None)
+                self.stats["lost"] += 1
+
+    def start_heartbeat(self):
+        if self._heartbeat is None:
+            self._stop.clear()
+            self._heartbeat = threading.Thread(target=self._beat, name="LeaseHeartbeat", daemon=True)
+            self._heartbeat.start()
+
+    def _beat(self):
+        while not self._stop.wait(self.ttl / 3):
+            self.renew()
+
+    def stop(self, release: bool = True):
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join(timeout=5)
+            self._heartbeat = None
+        if release:
+            for key in self.held():
+                self.release(key)
+
+    def active(self) -> List[dict]:
+        """Every live lease in the directory (all nodes), for the dashboard."""
+        now = time.time()
+        leases = []
+        for path in self.lease_dir.glob("*.lease"):
+            lease = self._read(path)
+            if lease and lease.get("owner") and lease.get("expires_at", 0) + CLOCK_SKEW_GRACE > now:
+                leases.append(lease)
+        return leases
+
+
+_manager: Optional[LeaseManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_lease_manager() -> LeaseManager:
+    global _manager
+    from app.config import get_config
+
+    with _manager_lock:
+        if _manager is None:
+            config = get_config()
+            _manager = LeaseManager(config.event_root / "Admin" / "leases")
+        return _manager
@@ -0,0 +1,303 @@
+"""
+Per-stage pipeline metrics.
+
+Until now the only throughput signal was ProgressTracker's
+"Progress: 5/13 done | 1 processing | 7 queued" log line. Every stage now
+records a latency histogram plus call, error and byte counters. Queue
+depths are gauges.
+
+    from app.metrics import timed, observe, set_gauge
+
+    with timed("detect"):
+        faces = analyzer.get(img)
+    with timed("upload", nbytes=size):
+        cloud.upload(path)
+    observe("whatsapp_send", seconds, error=True)
+    set_gauge("queue_depth", len(pending), stage="detect")
+
+Histograms use fixed buckets, so snapshots from different processes merge
+exactly. Each process writes its snapshot to data/metrics/<service>-<pid>.json
+every EXPORT_INTERVAL once start_exporter() is called; run.py calls it at the
+top of every supervised service. The server merges them for:
+
+    @app.get("/metrics")
+    def metrics():
+        return Response(prometheus_text(read_merged()), media_type=PROMETHEUS_CONTENT_TYPE)
+
+    @app.get("/api/metrics")
+    def metrics_json():
+        return read_merged()            # what the dashboard shows
+
+Recording costs a bisect and an uncontended lock or two; bench_metrics.py
+measures it.
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+STAGES = (
+    "hash", "decode", "detect", "embed", "assign_person", "route_photo",
+    "enqueue", "upload", "whatsapp_send",
+)
+
+# Seconds. 1 ms .. 60 s, roughly x2.5 per step; +Inf is implicit
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+EXPORT_INTERVAL = 2.0
+STALE_AFTER = 30.0          # ignore snapshots from processes that stopped exporting
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class StageMetrics:
+    __slots__ = ("buckets", "count", "total", "errors", "bytes", "in_progress", "_lock")
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+        self.bytes = 0
+        self.in_progress = 0
+        self._lock = threading.Lock()
+
+    def enter(self):
+        with self._lock:
+            self.in_progress += 1
+
+    def observe(self, seconds: float, nbytes: int = 0, error: bool = False, leaving: bool = False):
+        i = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            if leaving:
+                self.in_progress -= 1
+            self.buckets[i] += 1
+            self.count += 1
+            self.total += seconds
+            self.bytes += nbytes
+            if error:
+                self.errors += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "buckets": list(self.buckets), "count": self.count, "sum": self.total,
+                "errors": self.errors, "bytes": self.bytes, "in_progress": self.in_progress,
+            }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._stages: Dict[str, StageMetrics] = {}
+        self._gauges: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def stage(self, name: str) -> StageMetrics:
+        metrics = self._stages.get(name)
+        if metrics is None:
+            with self._lock:
+                metrics = self._stages.setdefault(name, StageMetrics())
+        return metrics
+
+    def set_gauge(self, name: str, value: float, stage: str = ""):
+        self._gauges[(name, stage)] = value
+
+    def snapshot(self) -> dict:
+        return {
+            "time": time.time(),
+            "stages": {name: m.snapshot() for name, m in list(self._stages.items())},
+            "gauges": [{"name": n, "stage": s, "value": v} for (n, s), v in list(self._gauges.items())],
+        }
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    return _registry
+
+
+def observe(stage: str, seconds: float, nbytes: int = 0, error: bool = False):
+    _registry.stage(stage).observe(seconds, nbytes, error)
+
+
+def set_gauge(name: str, value: float, stage: str = ""):
+    _registry.set_gauge(name, value, stage)
+
+
+class timed:
+    """
+    Time a block; an exception counts as an error and is re-raised.
+    A class rather than @contextmanager: no generator per call.
+    """
+
+    __slots__ = ("metrics", "nbytes", "started")
+
+    def __init__(self, stage: str, nbytes: int = 0):
+        self.metrics = _registry.stage(stage)
+        self.nbytes = nbytes
+
+    def __enter__(self):
+        self.metrics.enter()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe(time.perf_counter() - self.started, self.nbytes, exc_type is not None, leaving=True)
+        return False
+
+
+# ============================================
+# Snapshots across processes
+# ============================================
+
+def _metrics_dir() -> Path:
+    # Imported here: upload_scheduler and the WhatsApp dispatcher import this
+    # module, and recording must not pull in (or depend on) the app config
+    from app.config import get_config
+    return Path(get_config().db_path).parent / "metrics"
+
+
+class _Exporter:
+    def __init__(self, service: str, interval: float):
+        self.path = _metrics_dir() / f"{service}-{os.getpid()}.json"
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="MetricsExporter", daemon=True)
+
+    def _run(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        while not self._stop.wait(self.interval):
+            self.write()
+        self.write()
+
+    def write(self):
+        tmp = self.path.with_suffix(".tmp")
+        try:
+            tmp.write_text(json.dumps(_registry.snapshot()))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.debug(f"Could not export metrics: {e}")
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
+
+
+_exporter: Optional[_Exporter] = None
+
+
+def start_exporter(service: str, interval: float = EXPORT_INTERVAL):
+    """Publish this process's metrics for the server and dashboard."""
+    global _exporter
+    if _exporter is None:
+        _exporter = _Exporter(service, interval)
+        _exporter._thread.start()
+    return _exporter
+
+
+def merge(snapshots: List[dict]) -> dict:
+    stages: Dict[str, dict] = {}
+    gauges: Dict[Tuple[str, str], float] = {}
+    for snap in snapshots:
+        for name, s in snap.get("stages", {}).items():
+            into = stages.get(name)
+            if into is None:
+                stages[name] = {k: (list(v) if isinstance(v, list) else v) for k, v in s.items()}
+                continue
+            into["buckets"] = [a + b for a, b in zip(into["buckets"], s["buckets"])]
+            for key in ("count", "sum", "errors", "bytes", "in_progress"):
+                into[key] += s[key]
+        for g in snap.get("gauges", []):
+            key = (g["name"], g["stage"])
+            gauges[key] = gauges.get(key, 0) + g["value"]
+    for s in stages.values():
+        s.update(quantiles(s["buckets"]))
+        s["avg_ms"] = round(s["sum"] / s["count"] * 1000, 2) if s["count"] else 0.0
+    return {
+        "time": time.time(),
+        "stages": stages,
+        "gauges": [{"name": n, "stage": st, "value": v} for (n, st), v in gauges.items()],
+    }
+
+
+def quantiles(buckets: List[int], qs=(0.5, 0.95, 0.99)) -> dict:
+    """Estimate percentiles (ms) from bucket counts, interpolating inside a bucket."""
+    total = sum(buckets)
+    out = {}
+    for q in qs:
+        key = f"p{int(q * 100)}_ms"
+        if not total:
+            out[key] = 0.0
+            continue
+        rank, seen = q * total, 0
+        for i, n in enumerate(buckets):
+            if seen + n >= rank and n:
+                lo = BUCKETS[i - 1] if i > 0 else 0.0
+                hi = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                out[key] = round((lo + (hi - lo) * (rank - seen) / n) * 1000, 2)
+                break
+            seen += n
+    return out
+
+
+def read_merged(include_local: bool = True) -> dict:
+    """This process's metrics plus every other exporting process's, merged."""
+    snapshots = []
+    now = time.time()
+    # Our own file is older than the live registry
+    own = _exporter.path if _exporter is not None and include_local else None
+    directory = _metrics_dir()
+    if directory.exists():
+        for path in directory.glob("*.json"):
+            if path == own:
+                continue
+            try:
+                snap = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            if now - snap.get("time", 0) <= STALE_AFTER:
+                snapshots.append(snap)
+    if include_local:
+        snapshots.append(_registry.snapshot())
+    return merge(snapshots)
+
+
+def prometheus_text(merged: Optional[dict] = None) -> str:
+    merged = merged or merge([_registry.snapshot()])
+    lines = [
+        "# HELP wff_stage_seconds Pipeline stage latency.",
+        "# TYPE wff_stage_seconds histogram",
+    ]
+    for name, s in sorted(merged["stages"].items()):
+        cumulative = 0
+        for bound, n in zip(BUCKETS, s["buckets"]):
+            cumulative += n
+            lines.append(f'wff_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'wff_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {s["count"]}')
+        lines.append(f'wff_stage_seconds_sum{{stage="{name}"}} {s["sum"]:.6f}')
+        lines.append(f'wff_stage_seconds_count{{stage="{name}"}} {s["count"]}')
+    for metric, key, kind, help_text in (
+        ("wff_stage_errors_total", "errors", "counter", "Failed stage runs."),
+        ("wff_stage_bytes_total", "bytes", "counter", "Bytes handled by the stage."),
+        ("wff_stage_in_progress", "in_progress", "gauge", "Stage runs in progress."),
+    ):
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for name, s in sorted(merged["stages"].items()):
+            lines.append(f'{metric}{{stage="{name}"}} {s[key]}')
+    if merged["gauges"]:
+        lines.append("# TYPE wff_gauge gauge")
+        for g in merged["gauges"]:
+            lines.append(f'wff_gauge{{name="{g["name"]}",stage="{g["stage"]}"}} {g["value"]}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,177 @@
+"""
+Keeping blocking work off the web server's event loop.
+
+The FastAPI server runs guest requests on a single asyncio loop. Face
+inference, thumbnail encoding and sqlite queries used to run inline in
+`async def` handlers, so one slow enrollment stalled every phone in the hall.
+This module gives the server three things:
+
+* run_cpu()  - bounded executor for CPU-heavy work (InsightFace, PIL, cv2 all
+               release the GIL). When the queue is full it raises Overloaded
+               so the handler can answer 503 instead of piling up requests.
+* AsyncDB    - sqlite access from a small thread pool. Each thread keeps its
+               own connection in WAL mode with a busy timeout, so several
+               uvicorn worker processes can share wedding.db safely.
+* send_file()- FileResponse with caching headers. Starlette streams it from a
+               worker thread, and uses the ASGI zero-copy extension
+               (os.sendfile) when the server advertises it.
+
+Server usage:
+
+    from app.offload import run_cpu, get_async_db, send_file, Overloaded
+
+    @app.get("/api/stats")
+    async def stats():
+        return await get_async_db().fetchone("SELECT COUNT(*) ...")
+
+    @app.get("/api/thumbnail")
+    async def thumbnail(request: Request, path: str, size: int = 256):
+        try:
+            return await run_cpu(get_thumbnail_service().response, path, size,
+                                 request.headers.get("if-none-match"))
+        except Overloaded:
+            raise HTTPException(503, "Busy, please retry", headers={"Retry-After": "2"})
+
+Selfie matching does NOT go through run_cpu(): the enroll matcher has its
+own model thread and batches across requests (see app.enroll_matcher), and
+parking it behind CPU_WORKERS threads would cap each batch at that size.
+
+Nothing in here is shared between processes; anything that must be shared
+across uvicorn workers lives in wedding.db or on disk.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from app.config import get_config
+
+logger = logging.getLogger(__name__)
+
+CPU_WORKERS = max(2, min(4, (os.cpu_count() or 2) // 2))
+CPU_QUEUE_LIMIT = 64        # waiting + running CPU jobs per process
+DB_WORKERS = 4
+DB_BUSY_TIMEOUT_MS = 5000
+
+
+class Overloaded(Exception):
+    """The CPU executor's queue is full; the caller should answer 503."""
+
+
+# ============================================
+# CPU-bound work
+# ============================================
+
+_cpu_executor: Optional[ThreadPoolExecutor] = None
+_cpu_slots: Optional[threading.BoundedSemaphore] = None
+_executor_lock = threading.Lock()
+
+
+def _get_cpu_executor():
+    global _cpu_executor, _cpu_slots
+    with _executor_lock:
+        if _cpu_executor is None:
+            _cpu_executor = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="cpu")
+            _cpu_slots = threading.BoundedSemaphore(CPU_QUEUE_LIMIT)
+        return _cpu_executor, _cpu_slots
+
+
+async def run_cpu(fn: Callable, *args, **kwargs) -> Any:
+    """Run fn on the CPU executor without blocking the event loop."""
+    executor, slots = _get_cpu_executor()
+    if not slots.acquire(blocking=False):
+        raise Overloaded()
+
+    def call():
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            slots.release()
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, call)
+
+
+# ============================================
+# Async sqlite
+# ============================================
+
+class AsyncDB:
+    """Awaitable sqlite queries executed on a dedicated thread pool."""
+
+    def __init__(self, db_path: Path, workers: int = DB_WORKERS):
+        self.db_path = str(db_path)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db")
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=DB_BUSY_TIMEOUT_MS / 1000)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+            self._local.conn = conn
+        return conn
+
+    async def _run(self, fn: Callable, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args))
+
+    def _fetchall(self, sql: str, params: tuple):
+        return [dict(row) for row in self._conn().execute(sql, params).fetchall()]
+
+    def _fetchone(self, sql: str, params: tuple):
+        row = self._conn().execute(sql, params).fetchone()
+        return dict(row) if row is not None else None
+
+    def _execute(self, sql: str, params: tuple) -> int:
+        conn = self._conn()
+        cur = conn.execute(sql, params)
+        conn.commit()
+        return cur.lastrowid
+
+    async def fetchall(self, sql: str, params: tuple = ()) -> list:
+        return await self._run(self._fetchall, sql, params)
+
+    async def fetchone(self, sql: str, params: tuple = ()) -> Optional[dict]:
+        return await self._run(self._fetchone, sql, params)
+
+    async def execute(self, sql: str, params: tuple = ()) -> int:
+        return await self._run(self._execute, sql, params)
+
+    async def call(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run fn(conn) on a DB thread, e.g. gallery_index.list_photos."""
+        return await self._run(lambda: fn(self._conn()))
+
+
+_async_db: Optional[AsyncDB] = None
+
+
+def get_async_db() -> AsyncDB:
+    global _async_db
+    with _executor_lock:
+        if _async_db is None:
+            _async_db = AsyncDB(get_config().db_path)
+        return _async_db
+
+
+# ============================================
+# File responses
+# ============================================
+
+def send_file(path: Path, media_type: Optional[str] = None, cache_control: Optional[str] = None):
+    """
+    FileResponse for a photo on disk. The body is never read into memory;
+    Starlette streams it off the loop (or hands the fd to sendfile).
+    """
+    from fastapi.responses import FileResponse
+
+    headers = {"Cache-Control": cache_control} if cache_control else None
+    return FileResponse(path, media_type=media_type, headers=headers)
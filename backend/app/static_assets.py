@@ -0,0 +1,211 @@
+"""
+Serving the built FrontEnd and full-size photos efficiently.
+
+build_frontend.py writes FrontEnd/dist/ with minified, fingerprinted assets
+(main.3f9a1c2e.css) plus .br/.gz variants and a manifest. This module serves
+them:
+
+* content negotiation on Accept-Encoding (br > gzip > identity), with
+  `Vary: Accept-Encoding`,
+* strong ETags and 304s,
+* `Cache-Control: immutable` for fingerprinted files; index.html is
+  `no-cache` so a rebuild is picked up on the next visit.
+
+ranged_file_response() answers HTTP Range requests for original photos. The
+lightbox and downloads can then resume or fetch progressively on flaky venue
+Wi-Fi instead of restarting a multi-MB transfer.
+
+Server usage:
+
+    assets = get_static_assets()
+
+    @app.get("/")
+    @app.get("/{asset_path:path}")
+    def frontend(request: Request, asset_path: str = "index.html"):
+        return assets.response(asset_path, request.headers)
+
+    @app.get("/api/photo")
+    def photo(request: Request, path: str, size: int = None):
+        ...
+        return ranged_file_response(src, request.headers)
+"""
+
+import hashlib
+import json
+import logging
+import mimetypes
+import re
+from pathlib import Path
+from typing import Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DIST_DIR = Path(__file__).resolve().parents[2] / "FrontEnd" / "dist"
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+RANGE_CHUNK = 256 * 1024
+
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+_FINGERPRINTED = re.compile(r"\.[0-9a-f]{8}\.[a-z0-9]+$")
+
+
+def _accepted_encodings(accept_encoding: str) -> set:
+    """Parse Accept-Encoding, dropping anything with q=0."""
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        m = re.search(r"q=([0-9.]+)", params)
+        if m:
+            try:
+                q = float(m.group(1))
+            except ValueError:
+                q = 0.0
+        if q > 0:
+            accepted.add(token)
+    return accepted
+
+
+def _file_etag(path: Path) -> str:
+    st = path.stat()
+    return f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+
+class StaticAssets:
+    """Serves FrontEnd/dist (or FrontEnd/ itself if no build exists)."""
+
+    def __init__(self, dist_dir: Path = DIST_DIR):
+        self.dist_dir = Path(dist_dir)
+        if not (self.dist_dir / "manifest.json").exists():
+            logger.warning("FrontEnd/dist not built, serving unminified sources (run build_frontend.py)")
+            self.dist_dir = self.dist_dir.parent
+            self.manifest = {}
+        else:
+            self.manifest = json.loads((self.dist_dir / "manifest.json").read_text(encoding="utf-8"))
+        self._etags = {}    # variant path -> etag (files in dist never change in place)
+
+    def _resolve(self, asset_path: str) -> Optional[Path]:
+        asset_path = asset_path.lstrip("/") or "index.html"
+        p = (self.dist_dir / asset_path).resolve()
+        try:
+            p.relative_to(self.dist_dir.resolve())
+        except ValueError:
+            return None
+        return p if p.is_file() else None
+
+    def _etag(self, path: Path) -> str:
+        tag = self._etags.get(path)
+        if tag is None:
+            digest = hashlib.sha256(path.read_bytes()).hexdigest()[:20]
+            tag = self._etags[path] = f'"{digest}"'
+        return tag
+
+    def pick_variant(self, path: Path, accept_encoding: str) -> Tuple[Path, Optional[str]]:
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding, suffix in ENCODINGS:
+            if encoding in accepted:
+                variant = path.with_name(path.name + suffix)
+                if variant.exists():
+                    return variant, encoding
+        return path, None
+
+    def response(self, asset_path: str, headers: Mapping[str, str]):
+        from fastapi import Response
+
+        path = self._resolve(asset_path)
+        if path is None:
+            return Response(status_code=404)
+
+        variant, encoding = self.pick_variant(path, headers.get("accept-encoding", ""))
+        tag = self._etag(variant)
+        out_headers = {
+            "ETag": tag,
+            "Vary": "Accept-Encoding",
+            "Cache-Control": IMMUTABLE if _FINGERPRINTED.search(path.name) else REVALIDATE,
+        }
+        if encoding:
+            out_headers["Content-Encoding"] = encoding
+
+        if tag in [t.strip() for t in headers.get("if-none-match", "").split(",")]:
+            return Response(status_code=304, headers=out_headers)
+
+        media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        return Response(content=variant.read_bytes(), media_type=media_type, headers=out_headers)
+
+
+def parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single `bytes=` range into inclusive (start, end).
+    Returns None for a missing/multi-range header (serve the whole file),
+    raises ValueError when the range can't be satisfied.
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    start_s, _, end_s = range_header[6:].strip().partition("-")
+    if start_s == "":
+        # Suffix range: last N bytes
+        length = int(end_s)
+        if length <= 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size - 1
+    start = int(start_s)
+    end = int(end_s) if end_s else size - 1
+    if start >= size or end < start:
+        raise ValueError("range not satisfiable")
+    return start, min(end, size - 1)
+
+
+def ranged_file_response(path: Path, headers: Mapping[str, str], media_type: Optional[str] = None,
+                         cache_control: str = "public, max-age=86400"):
+    """FileResponse with single-range support (206 / 416) and If-Range."""
+    from fastapi import Response
+    from fastapi.responses import StreamingResponse
+
+    path = Path(path)
+    size = path.stat().st_size
+    tag = _file_etag(path)
+    media_type = media_type or mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    base_headers = {"Accept-Ranges": "bytes", "ETag": tag, "Cache-Control": cache_control}
+
+    if tag in [t.strip() for t in headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=base_headers)
+
+    byte_range = None
+    if_range = headers.get("if-range")
+    if not if_range or if_range == tag:
+        try:
+            byte_range = parse_range(headers.get("range", ""), size)
+        except ValueError:
+            return Response(status_code=416, headers={**base_headers, "Content-Range": f"bytes */{size}"})
+
+    start, end = byte_range if byte_range else (0, size - 1)
+
+    def body():
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(RANGE_CHUNK, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    out_headers = {**base_headers, "Content-Length": str(end - start + 1)}
+    if byte_range:
+        out_headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        return StreamingResponse(body(), status_code=206, media_type=media_type, headers=out_headers)
+    return StreamingResponse(body(), media_type=media_type, headers=out_headers)
+
+
+_assets: Optional[StaticAssets] = None
+
+
+def get_static_assets() -> StaticAssets:
+    global _assets
+    if _assets is None:
+        _assets = StaticAssets()
+    return _assets
@@ -0,0 +1,211 @@
+"""
+Shared-memory status block for the desktop dashboard.
+
+The dashboard used to learn pipeline status by querying SQLite and by
+scraping worker log lines, which costs time on every refresh and contends
+with the worker's own writes. Writers now put their counters into a small
+fixed-layout file next to wedding.db (data/status.shm) that every process
+maps into memory:
+
+    header      magic "WFFS", layout version
+    pipeline    WORKER_SLOTS slots, one per worker process
+    upload      one slot, written by the upload queue
+
+Each slot has exactly one writer, so nothing is locked. A slot starts with
+a sequence number that is odd while the writer is mid-update (a seqlock);
+readers retry until they see the same even number before and after copying
+the slot, which makes a read a few struct unpacks with no syscalls.
+
+Worker (ProgressTracker, whenever its counts change):
+
+    get_status_block().update_pipeline(worker_index, queued=q, processing=p,
+                                       completed=c, stuck=s, total=t)
+
+The first update starts a heartbeat that rewrites the slot's updated_at
+every HEARTBEAT_INTERVAL. Readers treat a slot older than STALE_AFTER as a
+dead worker, so liveness never needs a PID probe.
+
+Upload queue:
+
+    scheduler = UploadScheduler(..., status_block=get_status_block())
+
+Dashboard, as often as it likes:
+
+    status = get_status_block().read()
+    status["pipeline"]["completed"], status["upload"]["in_flight"]
+"""
+
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.config import get_config
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"WFFS"
+VERSION = 1
+WORKER_SLOTS = 8
+READ_RETRIES = 100
+HEARTBEAT_INTERVAL = 2.0
+STALE_AFTER = 10.0          # seconds without a heartbeat before a worker slot is ignored
+
+HEADER = struct.Struct("<4sI")
+SEQ = struct.Struct("<Q")
+
+# Slot bodies. Every slot is: seq (u64) + body.
+PIPELINE_FIELDS = ("pid", "updated_at", "queued", "processing", "completed", "stuck", "total")
+PIPELINE = struct.Struct("<Qd5Q")
+UPLOAD_FIELDS = ("pid", "updated_at", "queued", "in_flight", "done", "failed", "total",
+                 "bytes_sent", "throughput_bps", "rtt_ms")
+UPLOAD = struct.Struct("<Qd6Q2d")
+
+PIPELINE_OFFSET = HEADER.size
+PIPELINE_SLOT = SEQ.size + PIPELINE.size
+UPLOAD_OFFSET = PIPELINE_OFFSET + WORKER_SLOTS * PIPELINE_SLOT
+SIZE = UPLOAD_OFFSET + SEQ.size + UPLOAD.size
+
+
+def default_path() -> Path:
+    return Path(get_config().db_path).parent / "status.shm"
+
+
+class StatusBlock:
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or default_path())
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size < SIZE:
+                os.ftruncate(fd, SIZE)
+            self._mm = mmap.mmap(fd, SIZE)
+        finally:
+            os.close(fd)
+
+        magic, version = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            # New file, or a layout from another version: start from zero
+            self._mm[:SIZE] = bytes(SIZE)
+            HEADER.pack_into(self._mm, 0, MAGIC, VERSION)
+
+        # Last values this process wrote, so partial updates keep the rest
+        self._pipeline: Dict[int, dict] = {}
+        self._upload: Optional[dict] = None
+        self._write_lock = threading.Lock()   # threads of one writer process
+        self._heartbeat: Optional[threading.Thread] = None
+
+    # ---- Writers ----
+
+    def _write(self, offset: int, body: struct.Struct, values: tuple):
+        seq = SEQ.unpack_from(self._mm, offset)[0]
+        if seq & 1:
+            seq += 1    # previous writer died mid-update
+        SEQ.pack_into(self._mm, offset, seq + 1)
+        body.pack_into(self._mm, offset + SEQ.size, *values)
+        SEQ.pack_into(self._mm, offset, seq + 2)
+
+    def update_pipeline(self, slot: int = 0, **counts):
+        """Set this worker's queued/processing/completed/stuck/total counters."""
+        if not 0 <= slot < WORKER_SLOTS:
+            raise ValueError(f"worker slot must be 0..{WORKER_SLOTS - 1}")
+        with self._write_lock:
+            current = self._pipeline.setdefault(slot, dict.fromkeys(PIPELINE_FIELDS, 0))
+            current.update(counts, pid=os.getpid(), updated_at=time.time())
+            self._write_slot(slot, current)
+            if self._heartbeat is None:
+                self._heartbeat = threading.Thread(target=self._beat, name="StatusHeartbeat", daemon=True)
+                self._heartbeat.start()
+
+    def _write_slot(self, slot: int, current: dict):
+        self._write(PIPELINE_OFFSET + slot * PIPELINE_SLOT, PIPELINE,
+                    tuple(int(current[f]) if f != "updated_at" else current[f] for f in PIPELINE_FIELDS))
+
+    def _beat(self):
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            with self._write_lock:
+                for slot, current in self._pipeline.items():
+                    current["updated_at"] = time.time()
+                    self._write_slot(slot, current)
+
+    def update_upload(self, **stats):
+        """Set the upload counters; accepts UploadScheduler.get_stats() keys."""
+        with self._write_lock:
+            if self._upload is None:
+                self._upload = dict.fromkeys(UPLOAD_FIELDS, 0)
+            self._upload.update({k: v for k, v in stats.items() if k in UPLOAD_FIELDS},
+                                pid=os.getpid(), updated_at=time.time())
+            values = tuple(
+                float(self._upload[f]) if f in ("updated_at", "throughput_bps", "rtt_ms") else int(self._upload[f])
+                for f in UPLOAD_FIELDS
+            )
+            self._write(UPLOAD_OFFSET, UPLOAD, values)
+
+    def clear_pipeline(self, slot: int = 0):
+        """Called by a worker on clean shutdown so its slot stops counting."""
+        with self._write_lock:
+            self._pipeline.pop(slot, None)
+            self._write(PIPELINE_OFFSET + slot * PIPELINE_SLOT, PIPELINE, (0,) * len(PIPELINE_FIELDS))
+
+    # ---- Readers ----
+
+    def _read(self, offset: int, body: struct.Struct) -> tuple:
+        values = None
+        for _ in range(READ_RETRIES):
+            before = SEQ.unpack_from(self._mm, offset)[0]
+            if not before & 1:
+                values = body.unpack_from(self._mm, offset + SEQ.size)
+                if SEQ.unpack_from(self._mm, offset)[0] == before:
+                    return values
+            time.sleep(0)   # let the writer finish its update
+        # Writer kept racing us; a slightly torn snapshot beats blocking the UI
+        return values if values is not None else body.unpack_from(self._mm, offset + SEQ.size)
+
+    def read_workers(self) -> List[dict]:
+        """Slots of workers that are still heartbeating."""
+        workers = []
+        cutoff = time.time() - STALE_AFTER
+        for slot in range(WORKER_SLOTS):
+            row = dict(zip(PIPELINE_FIELDS, self._read(PIPELINE_OFFSET + slot * PIPELINE_SLOT, PIPELINE)))
+            if row["pid"] and row["updated_at"] >= cutoff:
+                row["slot"] = slot
+                workers.append(row)
+        return workers
+
+    def read(self) -> dict:
+        """
+        Aggregate snapshot: pipeline counters summed over live workers,
+        plus the upload counters. `version` changes whenever any writer
+        updated something, so callers can skip redraws cheaply.
+        """
+        workers = self.read_workers()
+        pipeline = {f: sum(w[f] for w in workers) for f in ("queued", "processing", "completed", "stuck", "total")}
+        pipeline["workers"] = len(workers)
+        upload = dict(zip(UPLOAD_FIELDS, self._read(UPLOAD_OFFSET, UPLOAD)))
+        return {"pipeline": pipeline, "upload": upload, "version": self.version()}
+
+    def version(self) -> int:
+        total = SEQ.unpack_from(self._mm, UPLOAD_OFFSET)[0]
+        for slot in range(WORKER_SLOTS):
+            total += SEQ.unpack_from(self._mm, PIPELINE_OFFSET + slot * PIPELINE_SLOT)[0]
+        return total
+
+    def close(self):
+        self._mm.close()
+
+
+_block: Optional[StatusBlock] = None
+_block_lock = threading.Lock()
+
+
+def get_status_block() -> StatusBlock:
+    global _block
+    with _block_lock:
+        if _block is None:
+            _block = StatusBlock()
+        return _block
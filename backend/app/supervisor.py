@@ -0,0 +1,355 @@
+"""
+Process supervisor for the all-in-one launcher (run.py).
+
+run.py used to start the worker and the server, sleep 2 s, poll
+is_alive() every second and tear everything down when either died. The
+supervisor instead runs every part as a separately restartable service:
+
+* readiness handshake: a service is started only when the services it
+  depends on are ready. Readiness means the child called notify_ready(),
+  or a check in the parent passed (port open, DB created), or, for
+  ready="started", that the child got as far as calling its target.
+* restart with backoff: a service that exits unexpectedly is restarted
+  after 1, 2, 4 ... 60 s (with jitter). The delay resets once it has stayed
+  up for a minute. Other services keep running.
+* graceful drain: on shutdown every service gets its stop event at once,
+  dependents first (drain=True services finish what they are doing, e.g.
+  the worker's in-flight photos; the others get SIGINT). All of them are
+  then joined against their stop_timeout in parallel, and whatever is left
+  is terminated, then killed.
+
+Inside a service:
+
+    from app.supervisor import notify_ready, stop_requested
+
+    notify_ready()                   # DB open, watcher running
+    while not stop_requested():
+        process_next_photo()         # never abandoned half way
+
+A drain=True service whose main loop can't poll stop_requested() (it blocks
+in a library call) hands that job to a thread instead:
+
+    interrupt_when_idle(lambda: bool(get_journal().in_flight()), timeout=25)
+    worker_main()                    # gets KeyboardInterrupt once nothing is in flight
+"""
+
+import asyncio
+import importlib
+import inspect
+import logging
+import multiprocessing
+import os
+import random
+import signal
+import sys
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from multiprocessing.connection import wait as wait_sentinels
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+STABLE_AFTER = 60.0     # seconds up before the restart backoff resets
+
+
+@dataclass
+class Service:
+    name: str
+    target: str                                 # "module:function", imported in the child
+    args: tuple = ()
+    env: Dict[str, str] = field(default_factory=dict)
+    depends_on: Tuple[str, ...] = ()
+    ready: Union[str, Callable[[], bool]] = "started"   # "started", "notify" or a parent-side check
+    ready_timeout: float = 60.0
+    drain: bool = False                         # cooperative stop via stop_requested()
+    stop_timeout: float = 10.0
+    restart: bool = True
+
+
+# ============================================
+# Child side
+# ============================================
+
+_ready_event = None
+_stop_event = None
+_interrupt_allowed = threading.Event()
+
+
+def notify_ready():
+    """Tell the supervisor this service is up. Safe to call when not supervised."""
+    if _ready_event is not None:
+        _ready_event.set()
+
+
+def stop_requested() -> bool:
+    return _stop_event is not None and _stop_event.is_set()
+
+
+def wait_for_stop(timeout: Optional[float] = None) -> bool:
+    """Sleep until shutdown starts (or timeout). For services that are just background threads."""
+    if _stop_event is None:
+        time.sleep(timeout if timeout is not None else 1e9)
+        return False
+    return _stop_event.wait(timeout)
+
+
+def interrupt_when_idle(busy: Callable[[], bool], timeout: float, poll: float = 0.1):
+    """
+    For drain=True services: once stop is requested, wait until busy() is
+    False (at most `timeout` seconds), then raise KeyboardInterrupt in the
+    main thread. Returns immediately; the waiting happens in a thread.
+    """
+    def run():
+        if _stop_event is None:
+            return
+        _stop_event.wait()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                if not busy():
+                    break
+            except Exception:
+                break
+            time.sleep(poll)
+        else:
+            logger.warning(f"Still busy after {timeout:.0f}s, stopping anyway")
+        _interrupt_allowed.set()
+        signal.raise_signal(signal.SIGINT)
+
+    threading.Thread(target=run, name="DrainWatcher", daemon=True).start()
+
+
+def _drain_sigint(signum, frame):
+    # Console Ctrl+C is ignored; only interrupt_when_idle() gets through
+    if _interrupt_allowed.is_set():
+        raise KeyboardInterrupt
+
+
+def _interrupt_on_stop(stop_event):
+    # Non-draining services (uvicorn, simple loops) shut down on SIGINT /
+    # KeyboardInterrupt as they always have; deliver it to the main thread.
+    stop_event.wait()
+    signal.raise_signal(signal.SIGINT)
+
+
+def _child_main(service: Service, ready_event, stop_event, backend_dir: str):
+    global _ready_event, _stop_event
+    _ready_event, _stop_event = ready_event, stop_event
+    os.environ.update(service.env)
+    if backend_dir not in sys.path:
+        sys.path.insert(0, backend_dir)
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f"%(asctime)s | %(levelname)-8s | {service.name} | %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+    if service.drain:
+        # Ctrl+C in the console reaches every process; draining services
+        # wait for their stop event instead of dying mid-photo.
+        signal.signal(signal.SIGINT, _drain_sigint)
+    else:
+        threading.Thread(target=_interrupt_on_stop, args=(stop_event,), daemon=True).start()
+
+    module_name, func_name = service.target.split(":")
+    func = getattr(importlib.import_module(module_name), func_name)
+    if service.ready == "started":
+        notify_ready()
+    try:
+        result = func(*service.args)
+        if inspect.iscoroutine(result):
+            asyncio.run(result)
+    except KeyboardInterrupt:
+        if not stop_event.is_set():
+            raise
+
+
+# ============================================
+# Parent side
+# ============================================
+
+class _Running:
+    def __init__(self, service: Service):
+        self.service = service
+        self.process: Optional[multiprocessing.Process] = None
+        self.ready_event = None
+        self.stop_event = None
+        self.started_at = 0.0
+        self.failures = 0
+        self.restart_at: Optional[float] = None
+
+
+class Supervisor:
+    def __init__(self, services: List[Service], backend_dir: str):
+        names = [s.name for s in services]
+        for s in services:
+            missing = [d for d in s.depends_on if d not in names]
+            if missing:
+                raise ValueError(f"{s.name} depends on unknown services: {missing}")
+        self.order = self._dependency_order(services)
+        self.backend_dir = backend_dir
+        self._ctx = multiprocessing.get_context("spawn")
+        self._stop = threading.Event()
+        self._running: Dict[str, _Running] = {s.name: _Running(s) for s in self.order}
+        self._shutting_down = False
+
+    @staticmethod
+    def _dependency_order(services: List[Service]) -> List[Service]:
+        by_name = {s.name: s for s in services}
+        order, visiting, done = [], set(), set()
+
+        def visit(s: Service):
+            if s.name in done:
+                return
+            if s.name in visiting:
+                raise ValueError(f"Dependency cycle at {s.name}")
+            visiting.add(s.name)
+            for dep in s.depends_on:
+                visit(by_name[dep])
+            visiting.discard(s.name)
+            done.add(s.name)
+            order.append(s)
+
+        for s in services:
+            visit(s)
+        return order
+
+    # ---- Start / readiness ----
+
+    def _spawn(self, run: _Running):
+        s = run.service
+        if callable(s.ready):
+            s = replace(s, ready="check")   # the check runs here, the child only needs the name
+        run.ready_event = self._ctx.Event()
+        run.stop_event = self._ctx.Event()
+        run.process = self._ctx.Process(
+            target=_child_main, name=s.name,
+            args=(s, run.ready_event, run.stop_event, self.backend_dir),
+        )
+        run.process.start()
+        run.started_at = time.monotonic()
+        run.restart_at = None
+        logger.info(f"Started {s.name} (pid {run.process.pid})")
+
+    def _is_ready(self, run: _Running) -> bool:
+        if run.ready_event is not None and run.ready_event.is_set():
+            return True
+        check = run.service.ready
+        if callable(check):
+            try:
+                return bool(check())
+            except Exception:
+                return False
+        return False
+
+    def _wait_ready(self, run: _Running) -> bool:
+        deadline = time.monotonic() + run.service.ready_timeout
+        while time.monotonic() < deadline:
+            if self._is_ready(run):
+                logger.info(f"{run.service.name} ready in {time.monotonic() - run.started_at:.1f}s")
+                return True
+            if not run.process.is_alive():
+                return False
+            # Wake early if the child exits; otherwise re-check every 100 ms
+            wait_sentinels([run.process.sentinel], timeout=0.1)
+        logger.warning(f"{run.service.name} not ready after {run.service.ready_timeout:.0f}s, continuing")
+        return True
+
+    def start(self):
+        for s in self.order:
+            run = self._running[s.name]
+            self._spawn(run)
+            if not self._wait_ready(run):
+                logger.error(f"{s.name} exited during startup (code {run.process.exitcode})")
+                self._schedule_restart(run)
+
+    # ---- Supervision ----
+
+    def _schedule_restart(self, run: _Running):
+        if not run.service.restart or self._shutting_down:
+            return
+        if time.monotonic() - run.started_at > STABLE_AFTER:
+            run.failures = 0
+        run.failures += 1
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** (run.failures - 1)))
+        delay = delay / 2 + random.uniform(0, delay / 2)
+        run.restart_at = time.monotonic() + delay
+        logger.warning(f"{run.service.name} exited (code {run.process.exitcode}), restarting in {delay:.1f}s")
+
+    def request_stop(self):
+        self._stop.set()
+
+    def run_forever(self):
+        """Supervise until Ctrl+C or SIGTERM, then drain and stop everything."""
+        signal.signal(signal.SIGTERM, lambda *_: self._stop.set())
+        try:
+            while not self._stop.is_set():
+                alive = [r.process.sentinel for r in self._running.values()
+                         if r.process is not None and r.restart_at is None and r.process.exitcode is None]
+                pending = [r.restart_at for r in self._running.values() if r.restart_at is not None]
+                timeout = min(1.0, max(0.0, min(pending) - time.monotonic())) if pending else 1.0
+                if alive:
+                    wait_sentinels(alive, timeout=timeout)   # wakes as soon as a child exits
+                else:
+                    time.sleep(timeout)
+
+                now = time.monotonic()
+                for run in self._running.values():
+                    if run.restart_at is None and run.process is not None and run.process.exitcode is not None:
+                        self._schedule_restart(run)
+                    elif run.restart_at is not None and now >= run.restart_at:
+                        self._spawn(run)
+        except KeyboardInterrupt:
+            pass
+        self.shutdown()
+
+    def status(self) -> Dict[str, dict]:
+        return {
+            name: {
+                "pid": run.process.pid if run.process else None,
+                "alive": bool(run.process and run.process.is_alive()),
+                "ready": self._is_ready(run) if run.process else False,
+                "failures": run.failures,
+                "restarting": run.restart_at is not None,
+            }
+            for name, run in self._running.items()
+        }
+
+    # ---- Shutdown ----
+
+    def shutdown(self):
+        if self._shutting_down:
+            return
+        self._shutting_down = True
+        self._stop.set()
+        logger.info("Shutting down: draining services...")
+
+        # Every service is told at once (dependents first, so the server stops
+        # taking work as workers start draining) and they stop in parallel
+        now = time.monotonic()
+        stopping = []
+        for s in reversed(self.order):
+            run = self._running[s.name]
+            proc = run.process
+            if proc is None or proc.exitcode is not None:
+                continue
+            run.stop_event.set()    # drain=True services see stop_requested(); others get SIGINT
+            stopping.append((s, proc, now + s.stop_timeout))
+
+        for s, proc, deadline in stopping:
+            proc.join(max(0.0, deadline - time.monotonic()))
+        late = [(s, proc) for s, proc, _ in stopping if proc.exitcode is None]
+        for s, proc in late:
+            logger.warning(f"{s.name} did not stop within {s.stop_timeout:.0f}s, terminating")
+            proc.terminate()
+        kill_deadline = time.monotonic() + 3
+        for s, proc in late:
+            proc.join(max(0.0, kill_deadline - time.monotonic()))
+            if proc.exitcode is None:
+                proc.kill()
+                proc.join()
+        for s, proc, _ in stopping:
+            logger.info(f"Stopped {s.name} (code {proc.exitcode})")
@@ -0,0 +1,219 @@
+"""
+Cached thumbnail pyramid for the guest gallery.
+
+Every processed photo gets fixed-size derivatives (256 / 768 / 1600 px on
+the longest edge). They are generated once, stored on disk content-addressed
+by the source file's sha256, and served with a strong ETag. The URL is
+keyed by path, and a path's content can change (a rolled-back photo is
+reprocessed into the same file), so responses are not `immutable`: phones
+reuse a tile for CACHE_MAX_AGE and then revalidate, which costs a 304 with
+no body. The hottest tiles are also kept in an in-memory LRU so grid
+scrolling doesn't touch disk.
+
+Server usage:
+
+    @app.get("/api/thumbnail")
+    def thumbnail(request: Request, path: str, size: int = 256):
+        return get_thumbnail_service().response(path, size, request.headers.get("if-none-match"))
+
+Worker usage (pipeline stage after routing):
+
+    get_thumbnail_service().pregenerate(processed_path)
+"""
+
+import hashlib
+import io
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+
+from PIL import Image
+
+from app.config import get_config
+
+logger = logging.getLogger(__name__)
+
+SIZES = (256, 768, 1600)
+CACHE_MAX_AGE = 300
+CACHE_CONTROL = f"public, max-age={CACHE_MAX_AGE}, must-revalidate"
+DIGEST_CACHE_ITEMS = 8192   # memoized sha256s, ~1 KB each with keys
+
+
+def _snap_size(size: int) -> int:
+    """Clamp a requested size to the nearest pyramid level at or above it."""
+    for level in SIZES:
+        if size <= level:
+            return level
+    return SIZES[-1]
+
+
+class ThumbnailService:
+    """Generates, stores and serves thumbnail pyramid levels."""
+
+    def __init__(self, root: Path, cache_dir: Path, memory_bytes: int = 64 * 1024 * 1024, quality: int = 82):
+        self.root = Path(root).resolve()
+        self.cache_dir = Path(cache_dir)
+        self.memory_bytes = memory_bytes
+        self.quality = quality
+
+        self._lru = OrderedDict()   # (digest, level) -> bytes
+        self._lru_size = 0
+        self._digests = OrderedDict()   # (path, mtime_ns, size) -> sha256, LRU
+        self._lock = threading.Lock()
+        self._gen_locks = {}        # digest -> [Lock, users] while an encode is running
+
+    # ---- Addressing ----
+
+    def resolve(self, path: str) -> Optional[Path]:
+        """Resolve a client-supplied path, refusing anything outside EventRoot."""
+        p = Path(path)
+        if not p.is_absolute():
+            p = self.root / p
+        try:
+            p = p.resolve()
+            p.relative_to(self.root)
+        except (OSError, ValueError):
+            return None
+        return p if p.is_file() else None
+
+    def digest(self, src: Path) -> str:
+        """sha256 of the source, memoized per (path, mtime, size)."""
+        st = src.stat()
+        key = (str(src), st.st_mtime_ns, st.st_size)
+        with self._lock:
+            cached = self._digests.get(key)
+            if cached:
+                self._digests.move_to_end(key)
+                return cached
+        sha256 = hashlib.sha256()
+        with open(src, "rb") as f:
+            for chunk in iter(lambda: f.read(65536), b""):
+                sha256.update(chunk)
+        value = sha256.hexdigest()
+        with self._lock:
+            self._digests[key] = value
+            while len(self._digests) > DIGEST_CACHE_ITEMS:
+                self._digests.popitem(last=False)
+        return value
+
+    def _disk_path(self, digest: str, level: int) -> Path:
+        return self.cache_dir / digest[:2] / f"{digest}_{level}.jpg"
+
+    @staticmethod
+    def etag(digest: str, level: int) -> str:
+        return f'"{digest[:20]}-{level}"'
+
+    # ---- Generation ----
+
+    def _encode(self, src: Path, level: int) -> bytes:
+        with Image.open(src) as img:
+            img = img.convert("RGB") if img.mode != "RGB" else img.copy()
+        img.thumbnail((level, level), Image.LANCZOS)
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=self.quality, progressive=level > SIZES[0], optimize=True)
+        return buf.getvalue()
+
+    def _generate(self, src: Path, digest: str, level: int) -> bytes:
+        with self._lock:
+            entry = self._gen_locks.setdefault(digest, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                out = self._disk_path(digest, level)
+                if out.exists():
+                    return out.read_bytes()
+                data = self._encode(src, level)
+                out.parent.mkdir(parents=True, exist_ok=True)
+                tmp = out.with_suffix(".tmp")
+                tmp.write_bytes(data)
+                tmp.replace(out)
+                return data
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._gen_locks[digest]
+
+    def pregenerate(self, src: Path):
+        """Pipeline stage: build every pyramid level for a processed photo."""
+        src = Path(src)
+        try:
+            digest = self.digest(src)
+            for level in SIZES:
+                if not self._disk_path(digest, level).exists():
+                    self._generate(src, digest, level)
+        except Exception as e:
+            logger.warning(f"Thumbnail pre-generation failed for {src.name}: {e}")
+
+    # ---- Lookup ----
+
+    def _lru_get(self, key) -> Optional[bytes]:
+        with self._lock:
+            data = self._lru.get(key)
+            if data is not None:
+                self._lru.move_to_end(key)
+            return data
+
+    def _lru_put(self, key, data: bytes):
+        with self._lock:
+            if key in self._lru:
+                return
+            self._lru[key] = data
+            self._lru_size += len(data)
+            while self._lru_size > self.memory_bytes and self._lru:
+                _, evicted = self._lru.popitem(last=False)
+                self._lru_size -= len(evicted)
+
+    def get(self, src: Path, size: int) -> Tuple[bytes, str]:
+        """Return (jpeg bytes, etag) for a pyramid level of `src`."""
+        level = _snap_size(size)
+        digest = self.digest(src)
+        key = (digest, level)
+
+        data = self._lru_get(key)
+        if data is None:
+            disk = self._disk_path(digest, level)
+            data = disk.read_bytes() if disk.exists() else self._generate(src, digest, level)
+            # Only the small grid tiles are worth holding in memory
+            if level < SIZES[-1]:
+                self._lru_put(key, data)
+        return data, self.etag(digest, level)
+
+    def response(self, path: str, size: int, if_none_match: Optional[str] = None):
+        """Build the HTTP response for /api/thumbnail and sized /api/photo requests."""
+        from fastapi import Response
+
+        src = self.resolve(path)
+        if src is None:
+            return Response(status_code=404)
+
+        level = _snap_size(size)
+        tag = self.etag(self.digest(src), level)
+        headers = {"ETag": tag, "Cache-Control": CACHE_CONTROL}
+        if if_none_match and tag in [t.strip() for t in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+
+        data, _ = self.get(src, level)
+        return Response(content=data, media_type="image/jpeg", headers=headers)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"memory_items": len(self._lru), "memory_bytes": self._lru_size}
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_thumbnail_service() -> ThumbnailService:
+    global _service
+    with _service_lock:
+        if _service is None:
+            config = get_config()
+            _service = ThumbnailService(
+                root=config.event_root,
+                cache_dir=config.event_root / "Admin" / "thumbnails",
+            )
+        return _service
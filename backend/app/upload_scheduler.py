@@ -0,0 +1,326 @@
+"""
+Bandwidth-aware upload scheduler.
+
+The venue uplink is shared between cloud uploads, guest phones hitting the
+web server and the WhatsApp sender, so uploads are shaped instead of being
+pushed as fast as the queue drains:
+
+* a token bucket caps the byte rate (0 = uncapped),
+* AIMD adaptive concurrency grows the number of parallel uploads while
+  throughput keeps improving and halves it on errors or a throughput
+  collapse,
+* a priority heap sends enrolled guests' folders first.
+
+Live throughput, RTT and in-flight counts are available from get_stats().
+Every finished upload is announced on app.events ("upload_done" plus the
+uploads_pending/done/failed counts).
+They can be exported to a small JSON file for scripts (reupload_cloud.py
+writes upload_stats.json), or pushed into the shared app.status_block on
+every change, for the desktop dashboard.
+"""
+
+import heapq
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+from app.events import publish
+from app.metrics import observe, set_gauge
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_ENROLLED = 0
+PRIORITY_NORMAL = 1
+
+
+class TokenBucket:
+    """Thread-safe token bucket. One token = one byte (or one message)."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate: float, burst: Optional[float] = None):
+        with self._lock:
+            self._refill()
+            self.rate = float(rate)
+            self.capacity = float(burst if burst is not None else rate)
+            self._tokens = min(self._tokens, self.capacity)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def try_acquire(self, amount: float) -> float:
+        """Take tokens if available. Returns 0 on success, else seconds to wait."""
+        with self._lock:
+            if self.rate <= 0:
+                return 0.0
+            self._refill()
+            # Requests bigger than the bucket are allowed once it is full,
+            # otherwise a large file could never be sent.
+            need = min(amount, self.capacity)
+            if self._tokens >= need:
+                self._tokens -= amount
+                return 0.0
+            return (need - self._tokens) / self.rate
+
+    def acquire(self, amount: float, stop_event: Optional[threading.Event] = None) -> bool:
+        """Block until tokens are available. Returns False if stopped."""
+        while True:
+            wait = self.try_acquire(amount)
+            if wait <= 0:
+                return True
+            if stop_event is not None:
+                if stop_event.wait(min(wait, 0.5)):
+                    return False
+            else:
+                time.sleep(min(wait, 0.5))
+
+
+class AIMDController:
+    """
+    Additive-increase / multiplicative-decrease concurrency limit.
+
+    Every `window` completions the controller measures throughput (bytes
+    per second of wall time, so a batch of small files and a batch of RAW
+    files are judged on the same scale). If it improved on the previous
+    window, and the error rate stayed low, the limit grows by one. If it
+    fell below `congested_fraction` of the best throughput seen so far, or
+    errors appeared, the limit is halved. Raw per-upload RTT is not used:
+    it grows with file size as much as with congestion.
+    """
+
+    def __init__(self, initial: int = 2, minimum: int = 1, maximum: int = 8, window: int = 4,
+                 congested_fraction: float = 0.5):
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.window = window
+        self.congested_fraction = congested_fraction
+        self._samples = 0
+        self._errors = 0
+        self._bytes = 0
+        self._window_start = time.monotonic()
+        self._last_throughput = 0.0
+        self._best_throughput = 0.0
+
+    def on_result(self, ok: bool, nbytes: int):
+        self._samples += 1
+        if ok:
+            self._bytes += nbytes
+        else:
+            self._errors += 1
+            # Back off immediately on errors, don't wait for the window
+            self._decrease()
+            return
+
+        if self._samples < self.window:
+            return
+
+        elapsed = max(time.monotonic() - self._window_start, 1e-6)
+        throughput = self._bytes / elapsed
+        congested = throughput < self.congested_fraction * self._best_throughput
+
+        if congested or self._errors / self._samples > 0.1:
+            # The link may simply have got slower; re-learn the baseline
+            # from here instead of chasing a rate that is gone.
+            self._best_throughput = throughput
+            self._decrease()
+        else:
+            if throughput >= self._last_throughput * 1.05:
+                self.limit = min(self.maximum, self.limit + 1)
+            self._best_throughput = max(self._best_throughput, throughput)
+            self._reset_window()
+        self._last_throughput = throughput
+
+    def _decrease(self):
+        self.limit = max(self.minimum, self.limit // 2)
+        self._reset_window()
+
+    def _reset_window(self):
+        self._samples = 0
+        self._errors = 0
+        self._bytes = 0
+        self._window_start = time.monotonic()
+
+
+@dataclass(order=True)
+class UploadJob:
+    priority: int
+    seq: int
+    path: Path = field(compare=False)
+    size: int = field(compare=False)
+    upload: Callable[[], bool] = field(compare=False)
+
+
+class UploadScheduler:
+    """
+    Runs upload callables under a byte-rate cap and an adaptive
+    concurrency limit. Jobs from enrolled guests' folders go first.
+    """
+
+    def __init__(
+        self,
+        max_bytes_per_sec: float = 0,
+        max_concurrency: int = 8,
+        initial_concurrency: int = 2,
+        stats_path: Optional[Path] = None,
+        status_block=None,
+    ):
+        self.bucket = TokenBucket(max_bytes_per_sec, burst=max(max_bytes_per_sec, 1))
+        self.aimd = AIMDController(initial=initial_concurrency, maximum=max_concurrency)
+        self.stats_path = Path(stats_path) if stats_path else None
+        self.status_block = status_block    # optional app.status_block.StatusBlock
+
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._threads = []
+        self._max_concurrency = max_concurrency
+
+        self._in_flight = 0
+        self._done = 0
+        self._failed = 0
+        self._total = 0
+        self._bytes_sent = 0
+        self._throughput = 0.0   # EWMA bytes/sec
+        self._rtt = 0.0          # EWMA seconds per upload
+        self._last_export = 0.0
+
+    def start(self):
+        for i in range(self._max_concurrency):
+            t = threading.Thread(target=self._run, name=f"UploadScheduler-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join(timeout=timeout)
+        self._threads = []
+
+    def submit(self, path: Path, upload: Callable[[], bool], priority: int = PRIORITY_NORMAL, size: Optional[int] = None):
+        """Queue an upload. `upload` must return True on success."""
+        if size is None:
+            size = Path(path).stat().st_size
+        with self._cond:
+            heapq.heappush(self._heap, UploadJob(priority, next(self._seq), Path(path), size, upload))
+            self._total += 1
+            set_gauge("queue_depth", len(self._heap), stage="upload")
+            self._cond.notify()
+        self._publish_status()
+        self._publish_counts()
+
+    def join(self):
+        """Block until every submitted job has finished."""
+        with self._cond:
+            while (self._heap or self._in_flight) and not self._stop.is_set():
+                self._cond.wait(0.5)
+
+    def _next_job(self) -> Optional[UploadJob]:
+        with self._cond:
+            while not self._stop.is_set():
+                if self._heap and self._in_flight < self.aimd.limit:
+                    self._in_flight += 1
+                    job = heapq.heappop(self._heap)
+                    set_gauge("queue_depth", len(self._heap), stage="upload")
+                    return job
+                self._cond.wait(0.5)
+        return None
+
+    def _run(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            ok = False
+            started = time.monotonic()
+            try:
+                if self.bucket.acquire(job.size, self._stop):
+                    started = time.monotonic()
+                    ok = bool(job.upload())
+            except Exception as e:
+                logger.error(f"Upload failed for {job.path.name}: {e}")
+            self._finish(job, ok, time.monotonic() - started)
+
+    def _finish(self, job: UploadJob, ok: bool, elapsed: float):
+        with self._cond:
+            self._in_flight -= 1
+            self.aimd.on_result(ok, job.size)
+            if ok:
+                self._done += 1
+                self._bytes_sent += job.size
+                rate = job.size / max(elapsed, 1e-3)
+                # Aggregate throughput ~ per-upload rate x parallel uploads
+                sample = rate * max(self._in_flight + 1, 1)
+                self._throughput = sample if not self._throughput else 0.8 * self._throughput + 0.2 * sample
+                self._rtt = elapsed if not self._rtt else 0.8 * self._rtt + 0.2 * elapsed
+            else:
+                self._failed += 1
+            self._cond.notify_all()
+        observe("upload", elapsed, job.size if ok else 0, error=not ok)
+        publish("upload_done", path=str(job.path), ok=ok, bytes=job.size)
+        self._publish_status()
+        self._publish_counts()
+        self._maybe_export()
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            return {
+                "queued": len(self._heap),
+                "in_flight": self._in_flight,
+                "concurrency_limit": self.aimd.limit,
+                "done": self._done,
+                "failed": self._failed,
+                "total": self._total,
+                "bytes_sent": self._bytes_sent,
+                "throughput_bps": round(self._throughput, 1),
+                "rtt_ms": round(self._rtt * 1000, 1),
+                "rate_cap_bps": self.bucket.rate,
+            }
+
+    def _publish_status(self):
+        if self.status_block is not None:
+            self.status_block.update_upload(**self.get_stats())
+
+    def _publish_counts(self):
+        """Upload counters for the event bus (dashboard cloud widget, guest page)."""
+        # Published under the lock so concurrent finishes can't send an
+        # older snapshot after a newer one
+        with self._cond:
+            publish(
+                "counts",
+                uploads_pending=len(self._heap) + self._in_flight,
+                uploads_done=self._done,
+                uploads_failed=self._failed,
+            )
+
+    def _maybe_export(self):
+        """Write stats for the dashboard at most twice a second."""
+        if not self.stats_path:
+            return
+        now = time.monotonic()
+        if now - self._last_export < 0.5:
+            return
+        self._last_export = now
+        try:
+            tmp = self.stats_path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp.write_text(json.dumps(self.get_stats()))
+            os.replace(tmp, self.stats_path)
+        except OSError as e:
+            logger.debug(f"Could not export upload stats: {e}")
+
@@ -0,0 +1,141 @@
+"""
+Background warmup of the heavy backend dependencies.
+
+InsightFace, onnxruntime, cv2, rawpy and the Google API client take
+seconds to import and initialise. Importing them at module level made the
+server and the worker unresponsive until all of them had loaded. Modules
+now import them where they are used, and this module loads them on a
+background thread once the process is already serving:
+
+    Server:
+        @app.on_event("startup")
+        def warm():
+            start_warmup(SERVER_STAGES)     # returns immediately
+
+        @app.get("/api/ready")
+        def ready():
+            return get_warmup().status()
+
+    Worker (run.py does this before the watcher starts):
+        start_warmup(WORKER_STAGES)
+        ...
+        get_warmup().wait("face", timeout=120)   # before the first photo
+
+A stage that fails is logged and marked failed. The code that needs it
+will load it on first use, and hit the same error, as it did before.
+"""
+
+import importlib
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _warm_imaging():
+    importlib.import_module("cv2")
+    from app.processor import _enable_modern_formats
+    _enable_modern_formats()
+    try:
+        importlib.import_module("rawpy")
+    except ImportError:
+        pass    # RAW support is optional
+
+
+def _warm_face():
+    # _get_face_analyzer() is per thread, so this thread's instance is thrown
+    # away; what stays warm is the imports and the model files in the OS cache.
+    from app.processor import _get_face_analyzer
+    _get_face_analyzer()
+
+
+def _warm_enroll():
+    import numpy as np
+    from app.enroll_matcher import get_enroll_matcher
+    matcher = get_enroll_matcher()
+    matcher.start()     # loads the model on the matcher's own thread
+    # One blank frame so onnxruntime allocates its arenas now, not on the first guest
+    matcher.submit(np.zeros((320, 320, 3), dtype=np.uint8)).result(timeout=120)
+
+
+def _warm_cloud():
+    from app.cloud import get_cloud
+    get_cloud()
+
+
+STAGES: Dict[str, Callable[[], None]] = {
+    "imaging": _warm_imaging,
+    "face": _warm_face,
+    "enroll": _warm_enroll,
+    "cloud": _warm_cloud,
+}
+SERVER_STAGES = ("imaging", "enroll")
+WORKER_STAGES = ("imaging", "face", "cloud")
+
+
+class Warmup:
+    def __init__(self, stages: Iterable[str]):
+        unknown = [s for s in stages if s not in STAGES]
+        if unknown:
+            raise ValueError(f"Unknown warmup stages: {unknown}")
+        self.stages = list(stages)
+        self._events = {name: threading.Event() for name in self.stages}
+        self._status = {name: {"state": "pending", "seconds": None} for name in self.stages}
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="Warmup", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        for name in self.stages:
+            self._status[name]["state"] = "running"
+            started = time.perf_counter()
+            try:
+                STAGES[name]()
+                state = "ready"
+            except Exception as e:
+                logger.warning(f"Warmup stage '{name}' failed: {e}")
+                state = "failed"
+            seconds = round(time.perf_counter() - started, 2)
+            self._status[name] = {"state": state, "seconds": seconds}
+            self._events[name].set()
+            logger.info(f"Warmup: {name} {state} in {seconds}s")
+
+    def wait(self, stage: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+        """Block until a stage (or all of them) finished. True if it is ready."""
+        names = [stage] if stage else self.stages
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for name in names:
+            event = self._events.get(name)
+            if event is None:
+                continue
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not event.wait(remaining):
+                return False
+        return all(self._status[n]["state"] == "ready" for n in names if n in self._status)
+
+    def status(self) -> dict:
+        done = all(e.is_set() for e in self._events.values())
+        return {"ready": done, "stages": {k: dict(v) for k, v in self._status.items()}}
+
+
+_warmup: Optional[Warmup] = None
+_warmup_lock = threading.Lock()
+
+
+def start_warmup(stages: Iterable[str] = SERVER_STAGES) -> Warmup:
+    """Start warming up in the background. Later calls return the same Warmup."""
+    global _warmup
+    with _warmup_lock:
+        if _warmup is None:
+            _warmup = Warmup(stages)
+            _warmup.start()
+        return _warmup
+
+
+def get_warmup() -> Optional[Warmup]:
+    return _warmup
@@ -0,0 +1,140 @@
+"""
+Tracks when each enrolled guest's WhatsApp message is ready to send.
+
+A guest can be messaged once two things are true: they enrolled (phone
+number known, matched to a person) and their person folder on Drive is
+shareable (permission set, first photos uploaded). The two happen in
+different processes and in either order, so both paths record their half
+here and the one that completes the pair publishes a `whatsapp_ready`
+event on the app.events bus. The sender reacts to that event and never has
+to poll the enrollments table.
+
+Enrollment path (server):
+    mark_enrolled(conn, enrollment_id, person_id, phone, name)
+
+Upload-complete path (upload queue, after permissions.create):
+    mark_folder_shareable(conn, person_id, folder_link)
+
+Sender:
+    fetch_ready(conn, enrollment_ids)  /  mark_notified(conn, enrollment_id)
+"""
+
+import logging
+import sqlite3
+import time
+from typing import Iterable, List, Optional
+
+from app.events import publish
+
+logger = logging.getLogger(__name__)
+
+READY_EVENT = "whatsapp_ready"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shared_folders (
+    person_id INTEGER PRIMARY KEY,
+    link      TEXT NOT NULL,
+    ready_at  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS whatsapp_readiness (
+    enrollment_id INTEGER PRIMARY KEY,
+    person_id     INTEGER,
+    phone         TEXT NOT NULL,
+    name          TEXT,
+    enrolled_at   REAL NOT NULL,
+    ready_at      REAL,
+    notified_at   REAL
+);
+CREATE INDEX IF NOT EXISTS idx_readiness_person ON whatsapp_readiness(person_id);
+CREATE INDEX IF NOT EXISTS idx_readiness_pending ON whatsapp_readiness(ready_at)
+    WHERE notified_at IS NULL;
+"""
+
+
+def ensure_schema(conn: sqlite3.Connection):
+    conn.executescript(SCHEMA)
+
+
+def mark_enrolled(conn: sqlite3.Connection, enrollment_id: int, person_id: Optional[int],
+                  phone: str, name: str = ""):
+    """Record an enrollment; it is ready at once if the folder is already shared."""
+    ensure_schema(conn)
+    now = time.time()
+    folder = None
+    if person_id is not None:
+        folder = conn.execute(
+            "SELECT ready_at FROM shared_folders WHERE person_id = ?", (person_id,)
+        ).fetchone()
+    ready_at = now if folder else None
+    conn.execute(
+        "INSERT INTO whatsapp_readiness (enrollment_id, person_id, phone, name, enrolled_at, ready_at) "
+        "VALUES (?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT(enrollment_id) DO UPDATE SET person_id = excluded.person_id, "
+        "phone = excluded.phone, name = excluded.name, "
+        "ready_at = COALESCE(whatsapp_readiness.ready_at, excluded.ready_at)",
+        (enrollment_id, person_id, phone, name, now, ready_at),
+    )
+    conn.commit()
+    if ready_at is not None:
+        publish(READY_EVENT, enrollment_ids=[enrollment_id])
+
+
+def mark_folder_shareable(conn: sqlite3.Connection, person_id: int, link: str) -> List[int]:
+    """
+    Record that a person's folder can be opened by guests. Flips every
+    waiting enrollment of that person to ready and returns their ids.
+    Calling it again for the same person is a cheap no-op.
+    """
+    ensure_schema(conn)
+    now = time.time()
+    cur = conn.execute(
+        "INSERT OR IGNORE INTO shared_folders (person_id, link, ready_at) VALUES (?, ?, ?)",
+        (person_id, link, now),
+    )
+    if cur.rowcount == 0:
+        return []
+    ids = [row[0] for row in conn.execute(
+        "SELECT enrollment_id FROM whatsapp_readiness WHERE person_id = ? AND ready_at IS NULL",
+        (person_id,),
+    )]
+    if ids:
+        conn.execute(
+            "UPDATE whatsapp_readiness SET ready_at = ? WHERE person_id = ? AND ready_at IS NULL",
+            (now, person_id),
+        )
+    conn.commit()
+    if ids:
+        publish(READY_EVENT, enrollment_ids=ids)
+    return ids
+
+
+def fetch_ready(conn: sqlite3.Connection, enrollment_ids: Optional[Iterable[int]] = None) -> List[dict]:
+    """
+    Ready, not yet notified guests with their folder link. With ids, only
+    those rows are read (the event path); without, the whole backlog
+    (sender startup).
+    """
+    ensure_schema(conn)
+    sql = (
+        "SELECT r.enrollment_id, r.person_id, r.phone, r.name, f.link "
+        "FROM whatsapp_readiness r JOIN shared_folders f ON f.person_id = r.person_id "
+        "WHERE r.ready_at IS NOT NULL AND r.notified_at IS NULL"
+    )
+    params: tuple = ()
+    if enrollment_ids is not None:
+        ids = list(enrollment_ids)
+        if not ids:
+            return []
+        sql += f" AND r.enrollment_id IN ({','.join('?' * len(ids))})"
+        params = tuple(ids)
+    rows = conn.execute(sql + " ORDER BY r.ready_at", params).fetchall()
+    keys = ("enrollment_id", "person_id", "phone", "name", "link")
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def mark_notified(conn: sqlite3.Connection, enrollment_id: int):
+    conn.execute(
+        "UPDATE whatsapp_readiness SET notified_at = ? WHERE enrollment_id = ?",
+        (time.time(), enrollment_id),
+    )
+    conn.commit()
@@ -0,0 +1,840 @@
+"""
+End-to-end pipeline benchmark on a synthetic wedding.
+
+test_drop.py writes one noise image and sleeps 10 s. This script builds a
+reproducible event (same --seed, same photos, same drop times) and runs
+the real pipeline on it:
+
+    watcher -> worker -> router -> upload queue -> fake cloud
+
+in a throwaway EventRoot, so the real event and its DB are never touched.
+
+The dataset mixes what a wedding actually produces:
+
+  * phone HEICs, DSLR JPEGs, shared WebPs and big RAW-like TIFFs
+  * bursts: 5-10 near-identical frames dropped back to back
+  * group photos with many faces (--faces-dir pastes real face crops;
+    without it faces are drawn and the detector may skip them)
+  * byte-identical duplicates (second card import) and re-encoded ones
+
+The cloud is a local stand-in for the Drive API (FakeDrive), with
+per-request latency and limited bandwidth, running inside the worker. It is
+installed through app.cloud.install_test_service(service) when app.cloud
+has that hook, otherwise as the CloudManager's `service`; if the cloud is
+still disabled after that, the benchmark stops rather than fake it.
+
+--workers N > 1 runs the workers in claim mode (CLAIM_MODE=1, app.leases),
+as run.py does, so no photo is processed twice.
+
+Reports photos/min, per-photo latency (drop -> final DB status), peak
+RSS, and DB write amplification: WAL bytes written per byte the DB grew.
+Results go to bench_results/pipeline-<commit>.json. Compare two commits:
+
+    python bench_pipeline.py
+    python bench_pipeline.py --photos 1000 --workers 2 --rate 4
+    python bench_pipeline.py --compare bench_results/pipeline-5b9c43f.json
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import math
+import os
+import platform
+import random
+import re
+import shutil
+import sqlite3
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from importlib.util import find_spec
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.resolve()
+BACKEND_DIR = BASE_DIR / "backend"
+RESULTS_DIR = BASE_DIR / "bench_results"
+sys.path.insert(0, str(BACKEND_DIR))
+DATASET_VERSION = 1
+
+# (share of photos, format, size at --scale 1.0)
+FORMATS = (
+    (0.55, "jpeg", (6000, 4000)),    # DSLR
+    (0.15, "heic", (4032, 3024)),    # phones
+    (0.10, "webp", (1600, 1067)),    # shared / edited
+    (0.20, "raw", (3000, 2000)),     # RAW-like: big uncompressed TIFF
+)
+EXTENSIONS = {"jpeg": ".jpg", "heic": ".heic", "webp": ".webp", "raw": ".tif"}
+IN_PROGRESS = ("pending", "processing")
+
+
+# ============================================
+# Synthetic dataset
+# ============================================
+
+def _heic_available() -> bool:
+    try:
+        from pillow_heif import register_heif_opener
+        register_heif_opener()
+        return True
+    except ImportError:
+        return False
+
+
+def plan_dataset(photos: int, seed: int, rate: float) -> list:
+    """Decide every photo (kind, format, faces, drop time) without touching pixels."""
+    rng = random.Random(seed)
+    plan = []
+    t = 0.0
+    while len(plan) < photos:
+        roll = rng.random()
+        if roll < 0.30:
+            kind, frames = "burst", rng.randint(5, 10)
+        elif roll < 0.55:
+            kind, frames = "group", 1
+        elif roll < 0.65:
+            kind, frames = "scenery", 1
+        else:
+            kind, frames = "portrait", 1
+        share, fmt, size = 0.0, "jpeg", FORMATS[0][2]
+        pick = rng.random()
+        for share_i, fmt_i, size_i in FORMATS:
+            share += share_i
+            if pick < share:
+                fmt, size = fmt_i, size_i
+                break
+        if rng.random() < 0.5:
+            size = (size[1], size[0])   # portrait orientation
+        faces = {"group": rng.randint(4, 12), "scenery": 0}.get(kind, rng.randint(1, 2))
+        scene = rng.randrange(1 << 30)
+        for frame in range(min(frames, photos - len(plan))):
+            plan.append({
+                "index": len(plan), "kind": kind, "format": fmt, "size": list(size),
+                "faces": faces, "scene": scene, "frame": frame, "drop_at": round(t, 3),
+            })
+            # Burst frames arrive together; otherwise Poisson arrivals at --rate
+            t += 0.05 if kind == "burst" else (rng.expovariate(rate) if rate > 0 else 0.0)
+
+    # Duplicates of earlier photos, dropped later (second card, re-exports)
+    originals = list(plan)
+    duplicates = []
+    for i in range(max(1, photos // 20)):
+        src = rng.choice(originals)
+        dup = dict(src, kind="duplicate", reencode=(i % 3 == 2))
+        after = next(n for n, p in enumerate(plan) if p is src)
+        plan.insert(rng.randint(after + 1, len(plan)), dup)
+        duplicates.append((dup, src))
+    t_last = 0.0
+    for i, item in enumerate(plan):
+        item["index"] = i
+        if item["kind"] == "duplicate":
+            item["drop_at"] = t_last
+        t_last = item["drop_at"]
+    for dup, src in duplicates:
+        dup["duplicate_of"] = src["index"]
+    return plan
+
+
+def _load_faces(faces_dir):
+    if not faces_dir:
+        return []
+    from PIL import Image
+    faces = []
+    for path in sorted(Path(faces_dir).rglob("*")):
+        if path.suffix.lower() in (".jpg", ".jpeg", ".png", ".webp"):
+            faces.append(Image.open(path).convert("RGB"))
+    return faces
+
+
+def render_photo(item: dict, scale: float, faces: list):
+    """Pixels for one plan entry. Same scene + frame always gives the same image."""
+    import numpy as np
+    from PIL import Image, ImageDraw
+
+    w, h = max(64, int(item["size"][0] * scale)), max(64, int(item["size"][1] * scale))
+    rng = np.random.default_rng(item["scene"])
+    # Low-res noisy gradient, upscaled: cheap to make, not trivially compressible
+    small = rng.integers(0, 255, (h // 16 + 1, w // 16 + 1, 3), dtype=np.uint8)
+    img = Image.fromarray(small).resize((w, h), Image.BICUBIC)
+    frame_rng = np.random.default_rng([item["scene"], item["frame"]])
+    grain = frame_rng.integers(-6, 7, (h, w, 1), dtype=np.int16)
+    img = Image.fromarray(np.clip(np.asarray(img, dtype=np.int16) + grain, 0, 255).astype(np.uint8))
+
+    draw = ImageDraw.Draw(img)
+    layout = random.Random(item["scene"])
+    shift = item["frame"] * max(2, w // 400)   # burst frames: the camera moves a little
+    size = int(min(w, h) / (2.5 if item["faces"] <= 2 else 5 + item["faces"] / 3))
+    for n in range(item["faces"]):
+        x = int((n + 0.5) * w / item["faces"] - size / 2) + shift if item["faces"] > 1 else (w - size) // 2 + shift
+        y = int(h * layout.uniform(0.2, 0.5))
+        if faces:
+            img.paste(faces[layout.randrange(len(faces))].resize((size, size)), (x, y))
+            continue
+        skin = tuple(layout.randint(150, 230) for _ in range(3))
+        draw.ellipse((x, y, x + size, y + int(size * 1.3)), fill=skin)
+        eye = max(2, size // 10)
+        for ex in (x + size // 3, x + 2 * size // 3):
+            draw.ellipse((ex - eye, y + size // 2 - eye, ex + eye, y + size // 2 + eye), fill=(30, 30, 30))
+        draw.line((x + size // 3, y + size * 0.95, x + 2 * size // 3, y + size * 0.95), fill=(120, 40, 40), width=eye)
+    return img
+
+
+def encode_photo(img, fmt: str, quality: int) -> bytes:
+    buf = io.BytesIO()
+    if fmt == "heic":
+        img.save(buf, format="HEIF", quality=quality)
+    elif fmt == "webp":
+        img.save(buf, format="WEBP", quality=quality)
+    elif fmt == "raw":
+        img.save(buf, format="TIFF")        # uncompressed, RAW-sized
+    else:
+        img.save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+
+def build_dataset(args) -> Path:
+    """Generate (or reuse) the dataset. Returns the directory holding manifest.json."""
+    key = f"v{DATASET_VERSION}-n{args.photos}-s{args.seed}-r{args.rate:g}-x{args.scale:g}" + ("-faces" if args.faces_dir else "")
+    root = Path(args.dataset_dir) / key
+    manifest_path = root / "manifest.json"
+    if manifest_path.exists():
+        print(f"Dataset: {root} (cached)")
+        return root
+
+    heic = _heic_available()
+    faces = _load_faces(args.faces_dir)
+    plan = plan_dataset(args.photos, args.seed, args.rate)
+    files = root / "photos"
+    files.mkdir(parents=True, exist_ok=True)
+    print(f"Generating {len(plan)} photos into {root} ...")
+    started = time.perf_counter()
+    written = {}
+    for item in plan:
+        fmt = item["format"]
+        if fmt == "heic" and not heic:
+            fmt = item["format"] = "jpeg"   # pillow_heif not installed
+            item["heic_fallback"] = True
+        name = f"IMG_{item['index']:05d}{EXTENSIONS[fmt]}"
+        if item["kind"] == "duplicate" and not item["reencode"]:
+            data = (files / written[item["duplicate_of"]]).read_bytes()
+            name = f"IMG_{item['index']:05d}_copy{Path(written[item['duplicate_of']]).suffix}"
+        else:
+            quality = 80 if item.get("reencode") else 92
+            data = encode_photo(render_photo(item, args.scale, faces), fmt, quality)
+        (files / name).write_bytes(data)
+        written[item["index"]] = name
+        item["file"] = name
+        item["bytes"] = len(data)
+        item["sha256"] = hashlib.sha256(data).hexdigest()
+        if (item["index"] + 1) % 50 == 0:
+            print(f"  {item['index'] + 1}/{len(plan)}")
+    manifest_path.write_text(json.dumps({"version": DATASET_VERSION, "seed": args.seed, "photos": plan}, indent=1))
+    print(f"Generated in {time.perf_counter() - started:.1f}s")
+    return root
+
+
+# ============================================
+# Fake cloud (Drive API v3 surface used by app.cloud)
+# ============================================
+
+class _Request:
+    def __init__(self, fn):
+        self._fn = fn
+
+    def execute(self, *args, **kwargs):
+        return self._fn()
+
+    def next_chunk(self, *args, **kwargs):
+        # Resumable uploads: everything in one "chunk"
+        return None, self._fn()
+
+
+class _Batch:
+    def __init__(self, callback=None):
+        self._callback = callback
+        self._requests = []
+
+    def add(self, request, callback=None, request_id=None):
+        self._requests.append((request, callback or self._callback, request_id or str(len(self._requests))))
+
+    def execute(self, *args, **kwargs):
+        for request, callback, request_id in self._requests:
+            try:
+                response, error = request.execute(), None
+            except Exception as e:
+                response, error = None, e
+            if callback:
+                callback(request_id, response, error)
+
+
+class FakeDrive:
+    """
+    Enough of googleapiclient's Drive service for folders, uploads, listing
+    and sharing. Uploaded bytes land in `root`, one file per Drive id, and
+    every upload is appended to root/uploads.jsonl for the benchmark.
+    """
+
+    FOLDER = "application/vnd.google-apps.folder"
+
+    def __init__(self, root: Path, latency: float = 0.08, bandwidth: float = 20e6 / 8):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.latency = latency
+        self.bandwidth = bandwidth          # bytes/s shared by all uploads
+        self._items = {}
+        self._lock = threading.Lock()
+        self._link = threading.Lock()       # one uplink
+        self._log = open(self.root / "uploads.jsonl", "a", buffering=1)
+
+    # ---- googleapiclient surface ----
+
+    def files(self):
+        return self
+
+    def permissions(self):
+        return _Permissions(self)
+
+    def new_batch_http_request(self, callback=None):
+        return _Batch(callback)
+
+    def create(self, body=None, media_body=None, fields=None, **kwargs):
+        return _Request(lambda: self._create(body or {}, media_body))
+
+    def update(self, fileId=None, body=None, media_body=None, addParents=None, removeParents=None, **kwargs):
+        return _Request(lambda: self._update(fileId, body or {}, media_body, addParents, removeParents))
+
+    def get(self, fileId=None, fields=None, **kwargs):
+        return _Request(lambda: self._get(fileId))
+
+    def delete(self, fileId=None, **kwargs):
+        return _Request(lambda: self._delete(fileId))
+
+    def list(self, q=None, fields=None, pageSize=None, pageToken=None, **kwargs):
+        return _Request(lambda: self._list(q))
+
+    # ---- Storage ----
+
+    def _rtt(self):
+        time.sleep(self.latency)
+
+    def _store(self, file_id: str, media_body) -> int:
+        if media_body is None:
+            return 0
+        stream = media_body.stream() if hasattr(media_body, "stream") else open(getattr(media_body, "_filename"), "rb")
+        data = stream.read()
+        stream.close()
+        with self._link:
+            time.sleep(len(data) / self.bandwidth)
+        (self.root / file_id).write_bytes(data)
+        return len(data)
+
+    def _create(self, body: dict, media_body) -> dict:
+        self._rtt()
+        with self._lock:
+            file_id = f"fake{len(self._items) + 1:08d}"
+            item = {"id": file_id, "name": body.get("name", ""), "mimeType": body.get("mimeType", ""),
+                    "parents": list(body.get("parents") or ["root"]), "appProperties": body.get("appProperties", {}),
+                    "trashed": False}
+            self._items[file_id] = item
+        size = self._store(file_id, media_body)
+        if media_body is not None:
+            item["size"] = str(size)
+            item["md5Checksum"] = hashlib.md5((self.root / file_id).read_bytes()).hexdigest()
+            self._log.write(json.dumps({"id": file_id, "name": item["name"], "bytes": size, "t": time.time()}) + "\n")
+        return dict(item)
+
+    def _update(self, file_id, body, media_body, add, remove) -> dict:
+        self._rtt()
+        item = self._items[file_id]
+        item.update({k: v for k, v in body.items() if k != "parents"})
+        if add:
+            item["parents"] += add.split(",")
+        if remove:
+            item["parents"] = [p for p in item["parents"] if p not in remove.split(",")]
+        if media_body is not None:
+            item["size"] = str(self._store(file_id, media_body))
+            self._log.write(json.dumps({"id": file_id, "name": item["name"], "bytes": int(item["size"]), "t": time.time()}) + "\n")
+        return dict(item)
+
+    def _get(self, file_id) -> dict:
+        self._rtt()
+        return dict(self._items[file_id])
+
+    def _delete(self, file_id) -> dict:
+        self._rtt()
+        self._items.pop(file_id, None)
+        return {}
+
+    def _list(self, q) -> dict:
+        self._rtt()
+        q = q or ""
+        name = re.search(r"name\s*=\s*'((?:[^'\\]|\\.)*)'", q)
+        parent = re.search(r"'([^']+)'\s+in\s+parents", q)
+        folders = "mimeType" in q and "!=" not in q.split("mimeType", 1)[1][:4]
+        found = [
+            dict(item) for item in list(self._items.values())
+            if not item["trashed"]
+            and (name is None or item["name"] == name.group(1).replace("\\'", "'"))
+            and (parent is None or parent.group(1) in item["parents"])
+            and (not folders or item["mimeType"] == self.FOLDER)
+        ]
+        return {"files": found}
+
+
+class _Permissions:
+    def __init__(self, drive: FakeDrive):
+        self._drive = drive
+
+    def create(self, fileId=None, body=None, **kwargs):
+        return _Request(lambda: (self._drive._rtt(), {"id": "anyone"})[1])
+
+
+def run_worker(cloud_dir: str, latency: float, bandwidth: float):
+    """Service target: run.py's worker entry point, with the cloud pointed at FakeDrive."""
+    import app.cloud
+    from run import run_backend_worker
+
+    fake = FakeDrive(Path(cloud_dir), latency, bandwidth)
+    install = getattr(app.cloud, "install_test_service", None)
+    if install is not None:
+        install(fake)
+    else:
+        app.cloud.get_cloud().service = fake
+    if not app.cloud.get_cloud().is_enabled:
+        raise SystemExit("FakeDrive could not be installed: the cloud is still disabled. "
+                         "Add app.cloud.install_test_service(service).")
+    run_backend_worker()
+
+
+# ============================================
+# Measurements
+# ============================================
+
+class WalCounter:
+    """
+    Counts the bytes SQLite appends to the -wal file, across checkpoints.
+    Frames whose salt matches the WAL header belong to the current cycle; a
+    new checkpoint sequence means the WAL restarted from the beginning.
+    Sampled, so frames written just before a restart can be missed.
+    """
+
+    HEADER = 32
+    FRAME_HEADER = 24
+
+    def __init__(self, db_path: Path):
+        self.wal = Path(str(db_path) + "-wal")
+        self.seq = None
+        self.frames = 0         # valid frames in the current cycle at the last sample
+        self.cycle_commits = 0
+        self.total_frames = 0
+        self.commits = 0
+        self.page_size = 0
+        self.seen = False
+
+    def sample(self):
+        try:
+            with open(self.wal, "rb") as f:
+                header = f.read(self.HEADER)
+                if len(header) < self.HEADER:
+                    return
+                self.seen = True
+                _, _, page_size, seq, salt1, salt2 = struct.unpack(">6I", header[:24])
+                self.page_size = page_size
+                frame = self.FRAME_HEADER + page_size
+                frames = commits = 0
+                while True:
+                    f.seek(self.HEADER + frames * frame)
+                    fh = f.read(self.FRAME_HEADER)
+                    if len(fh) < self.FRAME_HEADER:
+                        break
+                    _, db_size, s1, s2 = struct.unpack(">4I", fh[:16])
+                    if (s1, s2) != (salt1, salt2):
+                        break
+                    frames += 1
+                    commits += db_size != 0
+        except OSError:
+            return
+        if seq != self.seq:
+            self.seq = seq
+            self.frames = self.cycle_commits = 0
+        if frames > self.frames:
+            self.total_frames += frames - self.frames
+            self.commits += max(0, commits - self.cycle_commits)
+            self.frames, self.cycle_commits = frames, commits
+
+    @property
+    def bytes_written(self) -> int:
+        return self.total_frames * (self.FRAME_HEADER + self.page_size)
+
+
+class RssSampler:
+    """Peak RSS of the service processes: psutil, else /proc high-water marks, else rusage."""
+
+    def __init__(self):
+        try:
+            import psutil
+            self._psutil = psutil
+        except ImportError:
+            self._psutil = None
+        self.peak = 0
+
+    def sample(self, pids):
+        total = 0
+        for pid in pids:
+            if self._psutil is not None:
+                try:
+                    proc = self._psutil.Process(pid)
+                    total += proc.memory_info().rss
+                    total += sum(c.memory_info().rss for c in proc.children(recursive=True))
+                except self._psutil.Error:
+                    pass
+                continue
+            try:
+                for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+                    if line.startswith("VmHWM:"):
+                        total += int(line.split()[1]) * 1024
+            except OSError:
+                pass
+        self.peak = max(self.peak, total)
+
+    def finish(self) -> int:
+        if self.peak or sys.platform == "win32":
+            return self.peak
+        import resource
+        # Largest single child once they've been joined; KB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def git_commit() -> tuple:
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                             capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=BASE_DIR,
+                                    capture_output=True, text=True).stdout.strip())
+        return sha, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+# ============================================
+# Run
+# ============================================
+
+def prepare_event(bench_root: Path):
+    """Point the app at a throwaway EventRoot and DB, and make sure it listened."""
+    event_root = bench_root / "EventRoot"
+    db_path = bench_root / "data" / "wedding.db"
+    event_root.mkdir(parents=True)
+    db_path.parent.mkdir()
+    os.environ["EVENT_ROOT"] = str(event_root)
+    os.environ["DB_PATH"] = str(db_path)
+
+    from app.config import get_config
+    config = get_config()
+    for name, expected in (("event_root", event_root), ("db_path", db_path)):
+        actual = Path(getattr(config, name)).resolve()
+        if actual != expected.resolve():
+            print(f"Config {name} is {actual}, not the benchmark's {expected}.")
+            print("Refusing to run against a real event. Check EVENT_ROOT / DB_PATH handling in app.config.")
+            sys.exit(2)
+    return config
+
+
+def run_pipeline(args, dataset: Path, bench_root: Path) -> dict:
+    from app.supervisor import Service, Supervisor
+
+    config = prepare_event(bench_root)
+    manifest = json.loads((dataset / "manifest.json").read_text())
+    photos = manifest["photos"]
+    cloud_dir = bench_root / "cloud"
+
+    services = [
+        Service(
+            name=f"BenchWorker-{i + 1}",
+            target="bench_pipeline:run_worker",
+            args=(str(cloud_dir), args.cloud_latency_ms / 1000, args.cloud_mbps * 1e6 / 8),
+            env={"WORKER_INDEX": str(i), "CLAIM_MODE": "1" if args.workers > 1 else "0",
+                 "UPLOAD_QUEUE_SERVICE": "0"},
+            ready="notify",
+            ready_timeout=120.0,
+            drain=True,
+            stop_timeout=60.0,
+            restart=False,          # a crashed worker ends the run instead of skewing it
+        )
+        for i in range(args.workers)
+    ]
+    supervisor = Supervisor(services, backend_dir=str(BACKEND_DIR))
+    wal = WalCounter(Path(config.db_path))
+    rss = RssSampler()
+    stop_sampling = threading.Event()
+
+    def sampler():
+        while not stop_sampling.wait(0.05):
+            wal.sample()
+            rss.sample([s["pid"] for s in supervisor.status().values() if s["pid"]])
+
+    print(f"\nStarting {args.workers} worker(s) on {config.event_root}")
+    started = time.perf_counter()
+    supervisor.start()
+    print(f"Workers ready in {time.perf_counter() - started:.1f}s")
+    from app.db import get_db
+    db = get_db()
+    size_before = _db_logical_size(config.db_path)
+    threading.Thread(target=sampler, name="BenchSampler", daemon=True).start()
+
+    # Drop on schedule; a temp name first so the watcher never sees half a file
+    dropped_at = {}             # sha256 -> first drop time
+    t0, t0_wall = time.perf_counter(), time.time()
+    for item in photos:
+        delay = item["drop_at"] - (time.perf_counter() - t0)
+        if delay > 0:
+            time.sleep(delay)
+        dest = config.incoming_dir / item["file"]
+        tmp = dest.with_name(dest.name + ".part")
+        shutil.copyfile(dataset / "photos" / item["file"], tmp)
+        os.replace(tmp, dest)
+        dropped_at.setdefault(item["sha256"], time.perf_counter())
+    print(f"Dropped {len(photos)} photos in {time.perf_counter() - t0:.1f}s, waiting for the pipeline...")
+
+    finished_at, statuses, face_counts = {}, {}, []
+    deadline = time.perf_counter() + args.timeout
+    while len(finished_at) < len(dropped_at) and time.perf_counter() < deadline:
+        if not any(st["alive"] for st in supervisor.status().values()):
+            print("All workers exited; stopping early")
+            break
+        for sha in dropped_at.keys() - finished_at.keys():
+            photo = db.get_photo_by_hash(sha)
+            if photo is not None and photo.status not in IN_PROGRESS:
+                finished_at[sha] = time.perf_counter()
+                statuses[photo.status] = statuses.get(photo.status, 0) + 1
+                if getattr(photo, "face_count", None) is not None:
+                    face_counts.append(photo.face_count)
+        time.sleep(0.1)
+    processed_s = time.perf_counter() - t0
+
+    # Uploads drain after processing; wait until the fake cloud goes quiet
+    uploads_log = cloud_dir / "uploads.jsonl"
+    last_size, quiet_since = -1, time.perf_counter()
+    while time.perf_counter() < deadline:
+        size = uploads_log.stat().st_size if uploads_log.exists() else 0
+        if size != last_size:
+            last_size, quiet_since = size, time.perf_counter()
+        elif time.perf_counter() - quiet_since > args.upload_quiet:
+            break
+        time.sleep(0.2)
+    uploads = [json.loads(line) for line in uploads_log.read_text().splitlines()] if uploads_log.exists() else []
+
+    stage_metrics = {}
+    try:
+        from app.metrics import read_merged
+        stage_metrics = read_merged(include_local=False)["stages"]
+    except ImportError:
+        pass
+
+    stop_sampling.set()
+    supervisor.shutdown()
+    wal.sample()
+    size_after = _db_logical_size(config.db_path)
+    timed_out = len(finished_at) < len(dropped_at)
+
+    latencies = [(finished_at[sha] - dropped_at[sha]) * 1000 for sha in finished_at]
+    unique = len(dropped_at)
+    upload_bytes = sum(u["bytes"] for u in uploads)
+    growth = max(0, size_after - size_before)
+    wal_bytes = wal.bytes_written if wal.seen else None
+    return {
+        "dataset": {
+            "photos": len(photos),
+            "unique": unique,
+            "bytes": sum(p["bytes"] for p in photos),
+            "kinds": _count(p["kind"] for p in photos),
+            "formats": _count(p["format"] for p in photos),
+            "heic_fallback": any(p.get("heic_fallback") for p in photos),
+        },
+        "results": {
+            "timed_out": timed_out,
+            "finished": len(finished_at),
+            "statuses": statuses,
+            "faces_found": sum(face_counts),
+            "processing_s": round(processed_s, 2),
+            "photos_per_min": round(len(finished_at) / processed_s * 60, 1) if processed_s else 0.0,
+            "latency_ms": {
+                "p50": round(percentile(latencies, 0.50), 1),
+                "p95": round(percentile(latencies, 0.95), 1),
+                "p99": round(percentile(latencies, 0.99), 1),
+                "max": round(max(latencies, default=0.0), 1),
+            },
+            "uploads": {
+                "files": len(uploads),
+                "bytes": upload_bytes,
+                "drained_s": round(max(u["t"] for u in uploads) - t0_wall, 2) if uploads else None,
+            },
+            "peak_rss_mb": round(rss.finish() / 1e6, 1),
+            "db": {
+                "wal_bytes_written": wal_bytes,
+                "wal_commits": wal.commits if wal.seen else None,
+                "growth_bytes": growth,
+                "write_amplification": round(wal_bytes / growth, 1) if wal_bytes and growth else None,
+                "kb_written_per_photo": round(wal_bytes / 1024 / unique, 1) if wal_bytes and unique else None,
+            },
+            "stages": {name: {k: s[k] for k in ("count", "p50_ms", "p95_ms", "avg_ms", "errors")}
+                       for name, s in stage_metrics.items()},
+        },
+    }
+
+
+def _db_logical_size(db_path) -> int:
+    if not Path(db_path).exists():
+        return 0
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return conn.execute("PRAGMA page_count").fetchone()[0] * conn.execute("PRAGMA page_size").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _missing(module: str) -> bool:
+    try:
+        return find_spec(module) is None
+    except ModuleNotFoundError:
+        return True
+
+
+def _count(values) -> dict:
+    counts = {}
+    for v in values:
+        counts[v] = counts.get(v, 0) + 1
+    return counts
+
+
+# ============================================
+# Report
+# ============================================
+
+COMPARED = (
+    # (label, path into "results", higher is better)
+    ("photos/min", ("photos_per_min",), True),
+    ("p95 latency ms", ("latency_ms", "p95"), False),
+    ("peak RSS MB", ("peak_rss_mb",), False),
+    ("DB KB/photo", ("db", "kb_written_per_photo"), False),
+)
+
+
+def _dig(results: dict, path: tuple):
+    for key in path:
+        results = (results or {}).get(key)
+    return results
+
+
+def print_report(report: dict):
+    r = report["results"]
+    print("\n" + "-" * 50)
+    print(f"Commit:            {report['commit']}{' (dirty)' if report['dirty'] else ''}")
+    print(f"Photos:            {report['dataset']['photos']} dropped, {report['dataset']['unique']} unique")
+    print(f"Finished:          {r['finished']}  {r['statuses']}")
+    print(f"Throughput:        {r['photos_per_min']} photos/min")
+    lat = r["latency_ms"]
+    print(f"Latency:           p50 {lat['p50']} ms  p95 {lat['p95']} ms  p99 {lat['p99']} ms  max {lat['max']} ms")
+    print(f"Uploads:           {r['uploads']['files']} files, {r['uploads']['bytes'] / 1e6:.1f} MB, "
+          f"drained at {r['uploads']['drained_s']}s")
+    print(f"Peak RSS:          {r['peak_rss_mb']} MB")
+    db = r["db"]
+    if db["wal_bytes_written"] is None:
+        print("DB writes:         no WAL seen (DB not in WAL mode?)")
+    else:
+        print(f"DB writes:         {db['wal_bytes_written'] / 1e6:.1f} MB in {db['wal_commits']} commits, "
+              f"{db['kb_written_per_photo']} KB/photo, amplification x{db['write_amplification']}")
+    for name, s in r["stages"].items():
+        print(f"  {name:<14} n={s['count']:<6} p50 {s['p50_ms']:>8} ms  p95 {s['p95_ms']:>8} ms")
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> bool:
+    print(f"\nAgainst {baseline['commit']} (tolerance {tolerance:g}%):")
+    ok = True
+    for label, path, higher_better in COMPARED:
+        new, old = _dig(report["results"], path), _dig(baseline["results"], path)
+        if not new or not old:
+            print(f"  {label:<16} {old!s:>10} -> {new!s:>10}")
+            continue
+        change = (new - old) / old * 100
+        worse = -change if higher_better else change
+        flag = "  REGRESSION" if worse > tolerance else ""
+        ok = ok and not flag
+        print(f"  {label:<16} {old:>10} -> {new:>10}  ({change:+.1f}%){flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark on a synthetic wedding")
+    parser.add_argument("--photos", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--rate", type=float, default=2.0, help="Average photos/s between bursts (0 = all at once)")
+    parser.add_argument("--scale", type=float, default=0.5, help="Image size factor (1.0 = full 24 MP)")
+    parser.add_argument("--faces-dir", help="Folder of face crops to paste into photos")
+    parser.add_argument("--dataset-dir", default=str(Path(tempfile.gettempdir()) / "wff_bench_datasets"))
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--cloud-latency-ms", type=float, default=80.0)
+    parser.add_argument("--cloud-mbps", type=float, default=20.0, help="Fake uplink bandwidth")
+    parser.add_argument("--timeout", type=float, default=1800.0)
+    parser.add_argument("--upload-quiet", type=float, default=5.0, help="Seconds without uploads that mean drained")
+    parser.add_argument("--out", help="Results JSON (default bench_results/pipeline-<commit>.json)")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="Percent change allowed before FAIL")
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark EventRoot")
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("PIPELINE BENCHMARK")
+    print("=" * 50)
+
+    missing = [m for m in ("app.config", "app.db", "app.cloud", "app.worker") if _missing(m)]
+    if missing:
+        print(f"Pipeline modules not found: {', '.join(missing)}. Run from a full checkout.")
+        sys.exit(2)
+
+    dataset = build_dataset(args)
+    bench_root = Path(tempfile.mkdtemp(prefix="wff_bench_"))
+    commit, dirty = git_commit()
+    try:
+        report = {
+            "commit": commit,
+            "dirty": dirty,
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "platform": f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs, Python {platform.python_version()}",
+            "params": {k: v for k, v in vars(args).items() if k not in ("out", "compare", "keep", "dataset_dir")},
+        }
+        report.update(run_pipeline(args, dataset, bench_root))
+    finally:
+        if args.keep:
+            print(f"\nBenchmark EventRoot kept at {bench_root}")
+        else:
+            shutil.rmtree(bench_root, ignore_errors=True)
+
+    print_report(report)
+    out = Path(args.out) if args.out else RESULTS_DIR / f"pipeline-{commit}{'-dirty' if dirty else ''}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f"\nResults: {out}")
+
+    ok = not report["results"]["timed_out"]
+    if args.compare:
+        ok = compare(report, json.loads(Path(args.compare).read_text()), args.tolerance) and ok
+    print("\nPASS" if ok else "\nFAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
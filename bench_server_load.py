@@ -0,0 +1,183 @@
+"""
+Mixed-traffic load benchmark for the guest web server (locust-style, stdlib only).
+
+Spawns virtual guests that loop over weighted tasks with think time:
+
+    stats    GET  /api/stats
+    gallery  GET  /api/photos/{person}?category=solo&limit=60  + 256px thumbnails
+    enroll   POST /api/enroll  (only with --selfie; creates real enrollments!)
+
+and reports per-endpoint request counts, failures, p50/p95/p99 latency and
+overall requests/sec. Run it against a live server (python run.py):
+
+    python bench_server_load.py --users 100 --duration 30 --person Person_001
+    python bench_server_load.py --users 200 --selfie selfie.jpg --weights 6,3,1
+
+Compare runs with WEB_WORKERS=1 and WEB_WORKERS=4 to see the effect of
+multiple uvicorn workers.
+"""
+
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from urllib.parse import quote, urlparse
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.failures = defaultdict(int)
+
+    def record(self, name: str, seconds: float, ok: bool):
+        with self.lock:
+            self.latencies[name].append(seconds)
+            if not ok:
+                self.failures[name] += 1
+
+
+def pct(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k] * 1000
+
+
+class Guest(threading.Thread):
+    def __init__(self, args, stats: Stats, stop: threading.Event, selfie: bytes):
+        super().__init__(daemon=True)
+        self.args = args
+        self.stats = stats
+        self.stop_event = stop
+        self.selfie = selfie
+        url = urlparse(args.host)
+        self.host, self.port = url.hostname, url.port or 80
+        self.conn = None
+        self.thumbs = []
+
+    def request(self, name, method, path, body=None, headers=None):
+        t0 = time.perf_counter()
+        ok = False
+        data = b""
+        try:
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            self.conn.request(method, path, body=body, headers=headers or {})
+            resp = self.conn.getresponse()
+            data = resp.read()
+            ok = resp.status < 400
+        except Exception:
+            self.conn = None    # reconnect on the next request
+        self.stats.record(name, time.perf_counter() - t0, ok)
+        return data if ok else None
+
+    # ---- Tasks ----
+
+    def task_stats(self):
+        self.request("stats", "GET", "/api/stats")
+
+    def task_gallery(self):
+        data = self.request(
+            "photos", "GET", f"/api/photos/{quote(self.args.person)}?category=solo&limit=60"
+        )
+        if data:
+            try:
+                page = json.loads(data)
+                items = page["items"] if isinstance(page, dict) else page
+                self.thumbs = [item["path"] for item in items]
+            except (ValueError, KeyError, TypeError):
+                pass
+        # A phone shows roughly the first screenful of tiles
+        for path in self.thumbs[:12]:
+            self.request("thumbnail", "GET", f"/api/thumbnail?path={quote(path)}&size=256")
+
+    def task_enroll(self):
+        boundary = uuid.uuid4().hex
+        fields = {
+            "name": f"Load Test {uuid.uuid4().hex[:6]}",
+            "phone": "+910000000000",
+            "email": "",
+            "consent": "true",
+        }
+        parts = []
+        for key, value in fields.items():
+            parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"\r\n\r\n{value}\r\n'.encode())
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="selfie"; filename="selfie.jpg"\r\n'
+            f"Content-Type: image/jpeg\r\n\r\n".encode() + self.selfie + b"\r\n"
+        )
+        parts.append(f"--{boundary}--\r\n".encode())
+        self.request(
+            "enroll", "POST", "/api/enroll", body=b"".join(parts),
+            headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+        )
+
+    def run(self):
+        tasks = [self.task_stats, self.task_gallery, self.task_enroll]
+        weights = list(self.args.weights)
+        if not self.selfie:
+            weights[2] = 0
+        while not self.stop_event.is_set():
+            random.choices(tasks, weights=weights)[0]()
+            time.sleep(random.uniform(*self.args.think))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mixed stats/gallery/enroll load benchmark")
+    parser.add_argument("--host", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--spawn-rate", type=float, default=20.0, help="Guests started per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of full load")
+    parser.add_argument("--person", default="Person_001", help="Gallery to browse")
+    parser.add_argument("--selfie", help="JPEG to enroll with (enables the enroll task)")
+    parser.add_argument("--weights", default="6,3,1", help="stats,gallery,enroll task weights")
+    parser.add_argument("--think", default="0.5,2.0", help="min,max seconds between tasks")
+    args = parser.parse_args()
+    args.weights = [float(w) for w in args.weights.split(",")]
+    args.think = tuple(float(t) for t in args.think.split(","))
+
+    selfie = open(args.selfie, "rb").read() if args.selfie else b""
+
+    print("=" * 60)
+    print("SERVER LOAD BENCHMARK")
+    print("=" * 60)
+    print(f"Target: {args.host}  Users: {args.users}  Duration: {args.duration:.0f}s")
+    if not selfie:
+        print("No --selfie given, enroll task disabled")
+
+    stats = Stats()
+    stop = threading.Event()
+    guests = []
+    for _ in range(args.users):
+        g = Guest(args, stats, stop, selfie)
+        g.start()
+        guests.append(g)
+        time.sleep(1.0 / args.spawn_rate)
+
+    t0 = time.perf_counter()
+    time.sleep(args.duration)
+    stop.set()
+    for g in guests:
+        g.join(timeout=35)
+    elapsed = time.perf_counter() - t0
+
+    print(f"\n{'Endpoint':<12}{'Reqs':>8}{'Fails':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    print("-" * 58)
+    total = 0
+    for name in sorted(stats.latencies):
+        lat = stats.latencies[name]
+        total += len(lat)
+        print(f"{name:<12}{len(lat):>8}{stats.failures[name]:>8}"
+              f"{pct(lat, 50):>10.1f}{pct(lat, 95):>10.1f}{pct(lat, 99):>10.1f}")
+    print("-" * 58)
+    print(f"Total: {total} requests, {total / elapsed:.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Cold-start benchmark for the desktop dashboard and the backend modules.
+
+Runs each target in a fresh interpreter with `-X importtime`, reports the
+slowest imports, and FAILS (exit 1) if:
+
+  * importing WeddingFFapp takes longer than --max-import-ms,
+  * a heavy module (InsightFace, onnxruntime, cv2, rawpy, the Google client,
+    app.db, ...) is imported at startup instead of lazily,
+  * with a display available, process start to first paint of a dashboard
+    window takes longer than --max-paint-ms.
+
+Times are the best of --runs runs, so one slow disk read doesn't fail it.
+
+    python bench_startup.py
+    python bench_startup.py --runs 5 --max-import-ms 600 --max-paint-ms 2000
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.resolve()
+
+# Must never be imported just to open the window or load the server modules
+HEAVY_MODULES = (
+    "insightface", "onnxruntime", "cv2", "rawpy", "googleapiclient", "google.oauth2",
+    "sqlalchemy", "app.db", "app.processor", "app.cloud", "numpy",
+)
+
+# Backend modules the server/worker import at startup (the rest are lazy)
+BACKEND_MODULES = (
+    "app.events", "app.offload", "app.static_assets", "app.thumbnails", "app.gallery_index",
+    "app.derivatives", "app.upload_scheduler", "app.status_block", "app.warmup",
+)
+
+IMPORTTIME = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+PAINT_SNIPPET = """
+import WeddingFFapp as w
+root = w.ctk.CTk()
+root.geometry("900x600")
+w.ProcessingWidget(root).pack(side="left", padx=10)
+w.CloudWidget(root).pack(side="left", padx=10)
+w.StatusIndicator(root).pack(side="left", padx=10)
+def painted():
+    print("PAINTED", flush=True)
+    root.destroy()
+root.after_idle(lambda: root.after(0, painted))
+root.mainloop()
+"""
+
+
+def run_importtime(code: str):
+    """Run code in a fresh interpreter; return (wall ms, {module: cumulative us}, {module: self us})."""
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BASE_DIR, capture_output=True, text=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed")
+    cumulative, self_time = {}, {}
+    for line in proc.stderr.splitlines():
+        m = IMPORTTIME.match(line)
+        if m:
+            self_time[m.group(4)] = int(m.group(1))
+            cumulative[m.group(4)] = int(m.group(2))
+    return wall_ms, cumulative, self_time
+
+
+def heavy_imports(modules) -> list:
+    return sorted(m for m in modules if any(m == h or m.startswith(h + ".") for h in HEAVY_MODULES))
+
+
+def has_display() -> bool:
+    return sys.platform in ("win32", "darwin") or bool(os.environ.get("DISPLAY"))
+
+
+def measure_paint() -> float:
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", PAINT_SNIPPET], cwd=BASE_DIR,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    for line in proc.stdout:
+        if line.strip() == "PAINTED":
+            elapsed = (time.perf_counter() - started) * 1000
+            proc.wait(timeout=10)
+            return elapsed
+    raise RuntimeError(proc.stderr.read().strip() or "window never painted")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard / backend cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--max-import-ms", type=float, default=500.0, help="Budget for importing WeddingFFapp")
+    parser.add_argument("--max-paint-ms", type=float, default=1500.0, help="Budget for process start to first paint")
+    parser.add_argument("--top", type=int, default=8, help="Slowest imports to list")
+    args = parser.parse_args()
+
+    failures = []
+    print("=" * 50)
+    print("STARTUP BENCHMARK")
+    print("=" * 50)
+
+    # ---- Dashboard import ----
+    best = None
+    for _ in range(args.runs):
+        result = run_importtime("import WeddingFFapp")
+        if best is None or result[1].get("WeddingFFapp", 0) < best[1].get("WeddingFFapp", 0):
+            best = result
+    wall_ms, cumulative, self_time = best
+    import_ms = cumulative.get("WeddingFFapp", 0) / 1000
+    print(f"\nWeddingFFapp import: {import_ms:.0f} ms (process {wall_ms:.0f} ms)  budget {args.max_import_ms:.0f} ms")
+    for name, us in sorted(self_time.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"  {us / 1000:7.1f} ms  {name}")
+    if import_ms > args.max_import_ms:
+        failures.append(f"WeddingFFapp import {import_ms:.0f} ms > {args.max_import_ms:.0f} ms")
+    heavy = heavy_imports(cumulative)
+    if heavy:
+        failures.append(f"WeddingFFapp imports heavy modules at startup: {', '.join(heavy)}")
+
+    # ---- Backend modules ----
+    print("\nBackend modules:")
+    for module in BACKEND_MODULES:
+        code = f"import sys; sys.path.insert(0, 'backend'); import {module}"
+        try:
+            _, cumulative, _ = run_importtime(code)
+        except RuntimeError as e:
+            print(f"  {module:24s} skipped ({e})")
+            continue
+        heavy = heavy_imports(cumulative)
+        print(f"  {module:24s} {cumulative.get(module, 0) / 1000:7.1f} ms" + (f"  HEAVY: {', '.join(heavy)}" if heavy else ""))
+        if heavy:
+            failures.append(f"{module} imports heavy modules at startup: {', '.join(heavy)}")
+
+    # ---- First paint ----
+    if has_display():
+        paint_ms = min(measure_paint() for _ in range(args.runs))
+        print(f"\nCold start to first paint: {paint_ms:.0f} ms  budget {args.max_paint_ms:.0f} ms")
+        if paint_ms > args.max_paint_ms:
+            failures.append(f"first paint {paint_ms:.0f} ms > {args.max_paint_ms:.0f} ms")
+    else:
+        print("\nNo display; first-paint check skipped")
+
+    print()
+    if failures:
+        for f in failures:
+            print(f"FAIL: {f}")
+        sys.exit(1)
+    print("PASS")
+
+
+if __name__ == "__main__":
+    main()
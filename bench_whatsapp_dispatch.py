@@ -0,0 +1,135 @@
+"""
+Benchmark for the WhatsApp dispatch scheduler against a local fake sender.
+
+The fake sender takes 1-3 s per message (WhatsApp Web typing + send), fails
+transiently 10% of the time and has a few numbers that are not on WhatsApp
+or that always fail. It compares:
+
+    sequential  - the old loop: one guest at a time, retries inline
+    scheduler   - DispatchScheduler: rate-limited, concurrent, timing-wheel retries
+
+Timings are scaled with --speedup, so a 300-guest wedding runs in seconds;
+messages/min are reported in real (unscaled) minutes.
+
+    python bench_whatsapp_dispatch.py
+    python bench_whatsapp_dispatch.py --guests 300 --rate-per-min 20 --in-flight 3
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from whatsapp_tool.dispatch import DispatchScheduler, InvalidRecipient, jittered_backoff
+
+
+class FakeSender:
+    def __init__(self, speedup: float, fail_rate: float, bad_numbers: set, invalid_numbers: set, seed: int = 7):
+        self.speedup = speedup
+        self.fail_rate = fail_rate
+        self.bad = bad_numbers
+        self.invalid = invalid_numbers
+        self.rng = random.Random(seed)
+        self.delivered = set()
+
+    async def send(self, recipient: str):
+        await asyncio.sleep(self.rng.uniform(1.0, 3.0) / self.speedup)
+        if recipient in self.invalid:
+            raise InvalidRecipient("not on WhatsApp")
+        if recipient in self.bad:
+            # Unreachable numbers hang until the send times out
+            await asyncio.sleep(20.0 / self.speedup)
+            raise TimeoutError("send timed out")
+        if self.rng.random() < self.fail_rate:
+            raise ConnectionError("transient failure")
+        self.delivered.add(recipient)
+
+
+def make_guests(n: int):
+    guests = [f"+91{9000000000 + i}" for i in range(n)]
+    rng = random.Random(1)
+    invalid = set(rng.sample(guests, max(1, n // 50)))
+    bad = set(rng.sample([g for g in guests if g not in invalid], max(1, n // 30)))
+    return guests, bad, invalid
+
+
+async def run_sequential(args, guests, bad, invalid):
+    """The old sender: strictly in order, max_retries=3 per number, fixed sleep between tries."""
+    sender = FakeSender(args.speedup, args.fail_rate, bad, invalid)
+    min_gap = 60.0 / args.rate_per_min / args.speedup
+    t0 = time.perf_counter()
+    for phone in guests:
+        for _ in range(3):
+            try:
+                await sender.send(phone)
+                break
+            except InvalidRecipient:
+                break
+            except Exception:
+                await asyncio.sleep(5.0 / args.speedup)
+        await asyncio.sleep(min_gap)
+    return sender, time.perf_counter() - t0
+
+
+async def run_scheduler(args, guests, bad, invalid):
+    sender = FakeSender(args.speedup, args.fail_rate, bad, invalid)
+
+    async def send(job):
+        await sender.send(job.recipient)
+
+    scheduler = DispatchScheduler(
+        send,
+        rate_per_min=args.rate_per_min * args.speedup,
+        burst=3,
+        max_in_flight=args.in_flight,
+        backoff=lambda attempt: jittered_backoff(attempt, base=30.0 / args.speedup),
+        wheel_tick=1.0 / args.speedup,
+    )
+    await scheduler.start()
+    t0 = time.perf_counter()
+    for phone in guests:
+        scheduler.submit(phone)
+    await scheduler.join()
+    elapsed = time.perf_counter() - t0
+    await scheduler.stop()
+    return sender, elapsed, scheduler.stats
+
+
+def report(label, sender, elapsed, speedup, total):
+    real_minutes = elapsed * speedup / 60.0
+    print(f"\n{label}")
+    print(f"  Delivered:     {len(sender.delivered)}/{total}")
+    print(f"  Time (real):   {real_minutes:.1f} min")
+    print(f"  Throughput:    {len(sender.delivered) / real_minutes:.1f} messages/min")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="WhatsApp dispatch benchmark (fake sender)")
+    parser.add_argument("--guests", type=int, default=300)
+    parser.add_argument("--rate-per-min", type=float, default=20.0, help="Global send rate cap")
+    parser.add_argument("--in-flight", type=int, default=3)
+    parser.add_argument("--fail-rate", type=float, default=0.10)
+    parser.add_argument("--speedup", type=float, default=200.0, help="Simulated seconds per real second")
+    args = parser.parse_args()
+
+    guests, bad, invalid = make_guests(args.guests)
+    print("=" * 50)
+    print("WHATSAPP DISPATCH BENCHMARK")
+    print("=" * 50)
+    print(f"Guests: {args.guests}  invalid: {len(invalid)}  unreachable: {len(bad)}  "
+          f"rate cap: {args.rate_per_min:.0f}/min  in-flight: {args.in_flight}")
+
+    sender, elapsed = await run_sequential(args, guests, bad, invalid)
+    report("Sequential (old loop)", sender, elapsed, args.speedup, args.guests)
+
+    sender, elapsed, stats = await run_scheduler(args, guests, bad, invalid)
+    report("DispatchScheduler", sender, elapsed, args.speedup, args.guests)
+    print(f"  Retries: {stats['retried']}  invalid: {stats['invalid']}  gave up: {stats['gave_up']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,167 @@
+"""
+FRONTEND BUILD
+Minifies FrontEnd/ assets, fingerprints CSS/JS filenames with a content
+hash, writes precompressed .gz (and .br if the `brotli` package is
+installed) variants to FrontEnd/dist/ and reports first-load bytes.
+
+    python build_frontend.py
+    python build_frontend.py --link-kbps 1000 --rtt-ms 300   # model congested venue Wi-Fi
+
+The server (app.static_assets) serves FrontEnd/dist/ when a manifest exists:
+fingerprinted files get `Cache-Control: immutable`, index.html revalidates.
+
+The minifiers are deliberately conservative (comments and indentation only,
+line structure is kept), so they can't change behaviour.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import re
+import shutil
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BASE_DIR = Path(__file__).parent.resolve()
+SRC_DIR = BASE_DIR / "FrontEnd"
+DIST_DIR = SRC_DIR / "dist"
+
+FINGERPRINT = ["css/main.css", "js/main.js"]
+ENTRY = "index.html"
+
+
+# ============================================
+# Minifiers
+# ============================================
+
+def minify_css(text: str) -> str:
+    text = re.sub(r"/\*.*?\*/", "", text, flags=re.S)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\s*([{};,>])\s*", r"\1", text)
+    text = re.sub(r":\s+", ":", text)   # only after ':', "a :hover" keeps its space
+    text = text.replace(";}", "}")
+    return text.strip()
+
+
+def minify_js(text: str) -> str:
+    out = []
+    in_block = False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if in_block:
+            if "*/" in stripped:
+                in_block = False
+            continue
+        if stripped.startswith("/*"):
+            in_block = "*/" not in stripped
+            continue
+        if not stripped or stripped.startswith("//"):
+            continue
+        out.append(stripped)
+    return "\n".join(out) + "\n"
+
+
+def minify_html(text: str) -> str:
+    text = re.sub(r"<!--.*?-->", "", text, flags=re.S)
+    lines = [line.strip() for line in text.splitlines()]
+    return "\n".join(line for line in lines if line) + "\n"
+
+
+MINIFIERS = {".css": minify_css, ".js": minify_js, ".html": minify_html}
+
+
+# ============================================
+# Build
+# ============================================
+
+def compress_variants(path: Path) -> dict:
+    data = path.read_bytes()
+    sizes = {"raw": len(data)}
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    path.with_name(path.name + ".gz").write_bytes(gz)
+    sizes["gzip"] = len(gz)
+    if brotli is not None:
+        br = brotli.compress(data, quality=11)
+        path.with_name(path.name + ".br").write_bytes(br)
+        sizes["br"] = len(br)
+    return sizes
+
+
+def build() -> dict:
+    if DIST_DIR.exists():
+        shutil.rmtree(DIST_DIR)
+    DIST_DIR.mkdir(parents=True)
+
+    manifest = {}
+    report = {}
+
+    for rel in FINGERPRINT:
+        src = SRC_DIR / rel
+        text = src.read_text(encoding="utf-8")
+        minified = MINIFIERS[src.suffix](text)
+        digest = hashlib.sha256(minified.encode()).hexdigest()[:8]
+        out_rel = str(Path(rel).with_name(f"{src.stem}.{digest}{src.suffix}")).replace("\\", "/")
+        out = DIST_DIR / out_rel
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(minified, encoding="utf-8")
+        manifest[rel] = out_rel
+        report[rel] = {"source": src.stat().st_size, **compress_variants(out)}
+
+    html = (SRC_DIR / ENTRY).read_text(encoding="utf-8")
+    for rel, out_rel in manifest.items():
+        html = html.replace(f"./{rel}", f"./{out_rel}")
+    out = DIST_DIR / ENTRY
+    out.write_text(minify_html(html), encoding="utf-8")
+    report[ENTRY] = {"source": (SRC_DIR / ENTRY).stat().st_size, **compress_variants(out)}
+
+    (DIST_DIR / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return report
+
+
+def first_load_ms(total_bytes: int, link_kbps: float, rtt_ms: float, round_trips: int) -> float:
+    """Rough time-to-interactive: transfer time plus request round trips."""
+    return total_bytes * 8 / link_kbps + rtt_ms * round_trips
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build FrontEnd/dist")
+    parser.add_argument("--link-kbps", type=float, default=1000.0, help="Modelled guest bandwidth")
+    parser.add_argument("--rtt-ms", type=float, default=300.0, help="Modelled round-trip time")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("FRONTEND BUILD")
+    print("=" * 60)
+    if brotli is None:
+        print("brotli not installed, writing gzip variants only (pip install brotli)")
+
+    report = build()
+    best = "br" if brotli is not None else "gzip"
+
+    print(f"\n{'Asset':<16}{'Source':>10}{'Minified':>10}{'gzip':>10}{'br':>10}")
+    print("-" * 56)
+    before = after = 0
+    for rel, sizes in report.items():
+        print(f"{rel:<16}{sizes['source']:>10}{sizes['raw']:>10}{sizes['gzip']:>10}{sizes.get('br', '-'):>10}")
+        before += sizes["source"]
+        after += sizes[best]
+    print("-" * 56)
+
+    # index.html, then CSS and JS in parallel: two dependent round trips
+    rtts = 2
+    t_before = first_load_ms(before, args.link_kbps, args.rtt_ms, rtts)
+    t_after = first_load_ms(after, args.link_kbps, args.rtt_ms, rtts)
+    t_repeat = first_load_ms(report[ENTRY][best], args.link_kbps, args.rtt_ms, 1)
+    print(f"First load: {before:,} -> {after:,} bytes ({100 * (1 - after / before):.0f}% smaller)")
+    print(f"Modelled time-to-interactive @ {args.link_kbps:.0f} kbps / {args.rtt_ms:.0f} ms RTT:")
+    print(f"  before: {t_before:,.0f} ms   after: {t_after:,.0f} ms   repeat visit: {t_repeat:,.0f} ms")
+    print(f"\nWrote {DIST_DIR}")
+
+
+if __name__ == "__main__":
+    main()
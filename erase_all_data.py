@@ -136,12 +136,14 @@ def main(auto_confirm=False):
     print(f"  ✅ Deleted {log_count} log files")
 
     # 4. Reset WhatsApp state (but keep session)
+    # Send state now lives in the whatsapp_messages table (cleared with the
+    # databases above). Remove any legacy JSON so it isn't re-imported.
     print("\n📱 Resetting WhatsApp queue...")
-    wa_state = Path("whatsapp_tool/message_state_db.json")
-    if wa_state.exists():
-        with open(wa_state, 'w') as f:
-            f.write("{}")
-        print(f"  ✅ Cleared: {wa_state}")
+    for wa_state in [Path("whatsapp_tool/message_state_db.json"),
+                     Path("whatsapp_tool/message_state_db.json.imported")]:
+        if wa_state.exists():
+            wa_state.unlink()
+            print(f"  ✅ Removed: {wa_state}")
 
     print("\n" + "=" * 60)
     print("✨ SYSTEM RESET COMPLETE! ✨".center(60))
@@ -0,0 +1,159 @@
+"""
+Load test for the batched enrollment matcher.
+
+Simulates a crowd of guests submitting selfies at the same moment and
+reports p50/p99 match latency, throughput and the average batch size.
+
+    python load_test_enroll.py                     # simulated model, batched vs unbatched
+    python load_test_enroll.py --guests 500
+    python load_test_enroll.py --real --selfies path/to/selfies   # InsightFace + wedding.db
+
+The simulated model mirrors InsightFaceEmbedder.embed_batch(): detection
+runs serially per selfie (--detect-ms each, batching can't amortize it),
+then one recognition call costs a fixed overhead plus a small per-face
+cost. Detection usually dominates, so the simulated batching gain is only
+an upper bound; use --real to measure the actual FaceAnalysis path.
+"""
+
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path
+backend_path = Path("backend").resolve()
+sys.path.insert(0, str(backend_path))
+
+from app.enroll_matcher import EnrollMatcher
+
+EMBED_DIM = 512
+
+
+class SimulatedEmbedder:
+    """Stand-in for InsightFace: serial detection per image, then one batched recognition call."""
+
+    def __init__(self, detect_ms: float, call_ms: float, face_ms: float, centroids: np.ndarray):
+        self.detect_s = detect_ms / 1000.0
+        self.call_s = call_ms / 1000.0
+        self.face_s = face_ms / 1000.0
+        self.centroids = centroids
+        self.rng = np.random.default_rng(1)
+
+    def embed_batch(self, images):
+        time.sleep(self.detect_s * len(images))
+        time.sleep(self.call_s + self.face_s * len(images))
+        out = []
+        for img in images:
+            person = int(img[0, 0, 0]) % len(self.centroids)
+            noise = self.rng.normal(0, 0.02, EMBED_DIM).astype(np.float32)
+            out.append(self.centroids[person] + noise)
+        return out
+
+
+def percentile(values, pct):
+    return float(np.percentile(values, pct)) * 1000.0 if values else 0.0
+
+
+def run_crowd(matcher: EnrollMatcher, images, concurrency: int):
+    latencies = []
+    lock = threading.Lock()
+    start_gate = threading.Event()
+
+    def guest(img):
+        start_gate.wait()
+        t0 = time.perf_counter()
+        if isinstance(img, bytes):
+            matcher.match(img)
+        else:
+            matcher.submit(img).result(timeout=120)
+        with lock:
+            latencies.append(time.perf_counter() - t0)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(guest, img) for img in images]
+        time.sleep(0.2)
+        t0 = time.perf_counter()
+        start_gate.set()
+        for f in futures:
+            f.result()
+        elapsed = time.perf_counter() - t0
+
+    return latencies, elapsed
+
+
+def report(label, matcher, latencies, elapsed):
+    stats = matcher.stats()
+    print(f"\n{label}")
+    print(f"  Requests:   {len(latencies)} in {elapsed:.2f}s ({len(latencies) / elapsed:.1f}/s)")
+    print(f"  p50:        {percentile(latencies, 50):.1f} ms")
+    print(f"  p99:        {percentile(latencies, 99):.1f} ms")
+    print(f"  Batches:    {stats['batches']} (avg {stats['avg_batch']} selfies)")
+
+
+def simulated(args):
+    rng = np.random.default_rng(0)
+    centroids = rng.normal(0, 1, (args.persons, EMBED_DIM)).astype(np.float32)
+    centroids /= np.linalg.norm(centroids, axis=1, keepdims=True)
+    ids = list(range(1, args.persons + 1))
+    names = [f"Person_{i:03d}" for i in ids]
+
+    # Tiny fake "images"; the first pixel says which person it is
+    images = [np.full((4, 4, 3), i % 256, dtype=np.uint8) for i in range(args.guests)]
+
+    for label, max_batch in (("Unbatched (max_batch=1)", 1), (f"Batched (max_batch={args.max_batch})", args.max_batch)):
+        matcher = EnrollMatcher(
+            embedder_factory=lambda: SimulatedEmbedder(args.detect_ms, args.call_ms, args.face_ms, centroids),
+            centroid_loader=lambda index: index.set(ids, names, centroids),
+            max_batch=max_batch,
+            max_wait_ms=args.max_wait_ms,
+        )
+        matcher.start()
+        latencies, elapsed = run_crowd(matcher, images, args.guests)
+        report(label, matcher, latencies, elapsed)
+        matcher.stop()
+
+
+def real(args):
+    selfie_dir = Path(args.selfies)
+    files = [f for f in selfie_dir.iterdir() if f.suffix.lower() in (".jpg", ".jpeg", ".png")]
+    if not files:
+        print(f"No selfies found in {selfie_dir}")
+        return
+    payloads = [files[i % len(files)].read_bytes() for i in range(args.guests)]
+
+    matcher = EnrollMatcher(max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+    print("Loading InsightFace model...")
+    matcher.start()
+    latencies, elapsed = run_crowd(matcher, payloads, args.guests)
+    report(f"InsightFace (max_batch={args.max_batch})", matcher, latencies, elapsed)
+    matcher.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent enrollment load test")
+    parser.add_argument("--guests", type=int, default=200, help="Simultaneous enrollments")
+    parser.add_argument("--max-batch", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--persons", type=int, default=300, help="Simulated person clusters")
+    parser.add_argument("--detect-ms", type=float, default=20.0, help="Simulated detection cost per selfie (serial)")
+    parser.add_argument("--call-ms", type=float, default=25.0, help="Simulated cost per recognition call")
+    parser.add_argument("--face-ms", type=float, default=3.0, help="Simulated cost per face")
+    parser.add_argument("--real", action="store_true", help="Use InsightFace and the real database")
+    parser.add_argument("--selfies", default="selfies", help="Directory of selfie images for --real")
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("ENROLLMENT LOAD TEST")
+    print("=" * 50)
+    if args.real:
+        real(args)
+    else:
+        simulated(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
-
+import argparse
+import hashlib
 import logging
 import sys
-import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 
 # Add backend to path
@@ -10,134 +13,639 @@ sys.path.insert(0, str(backend_path))
 
 from app.config import get_config
 from app.cloud import get_cloud, CloudManager
+from app.db import get_db
+from app.derivatives import DerivativeSettings, FORMATS, get_derivative
+from app.upload_scheduler import UploadScheduler, PRIORITY_ENROLLED, PRIORITY_NORMAL
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s | %(levelname)s | %(message)s')
 logger = logging.getLogger(__name__)
 
-def wipe_folder_contents(cloud: CloudManager, folder_id: str):
+CONTENT_STORE_NAME = ".content"
+FOLDER_MIME = "application/vnd.google-apps.folder"
+SHORTCUT_MIME = "application/vnd.google-apps.shortcut"
+BATCH_SIZE = 100  # Drive batch endpoint limit
+PARENTS_PER_QUERY = 40  # folder ids OR-ed into one listing query
+
+# Only the fields the diff needs - keeps each listing page small
+LIST_FIELDS = (
+    "nextPageToken, files(id, name, mimeType, parents, size, md5Checksum, "
+    "appProperties, shortcutDetails/targetId, permissionIds)"
+)
+LINK_PERMISSION_ID = "anyoneWithLink"   # Drive's id for an anyone-with-the-link grant
+
+
+def compute_file_hash(file_path: Path, chunk_size: int = 8192) -> str:
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def compute_md5(file_path: Path, chunk_size: int = 65536) -> str:
+    md5 = hashlib.md5()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+def group_by_content(config):
     """
-    Recursively deletes everything inside a folder. 
-    If a folder cannot be deleted (e.g. permissions), it empties it and moves on.
+    Walk EventRoot/People and group routed files by content hash.
+    A group photo routed to N people shows up as one hash with N paths.
     """
-    logger.info(f"Scanning folder {folder_id}...")
-    
-    page_token = None
-    while True:
+    groups = {}
+    for file_path in config.people_dir.rglob("*"):
+        if not file_path.is_file() or file_path.suffix.lower() not in config.supported_extensions:
+            continue
+        if any(part.startswith(".") for part in file_path.relative_to(config.people_dir).parts):
+            continue  # skip .thumbnails and other hidden caches
         try:
-            results = cloud.service.files().list(
-                q=f"'{folder_id}' in parents and trashed=false",
-                fields="nextPageToken, files(id, name, mimeType)",
-                pageToken=page_token,
-                pageSize=100
-            ).execute()
-        except Exception as e:
-            logger.error(f"Error listing folder {folder_id}: {e}")
-            break
-
-        items = results.get('files', [])
-        
+            groups.setdefault(compute_file_hash(file_path), []).append(file_path)
+        except OSError as e:
+            logger.error(f"Cannot read {file_path.name}: {e}")
+    return groups
+
+
+# =============================================================================
+# Remote tree
+# =============================================================================
+@dataclass
+class RemoteTree:
+    """Drive contents under the root folder, keyed by path parts."""
+    folders: dict = field(default_factory=dict)   # ("People", "Ana") -> folder id
+    files: dict = field(default_factory=dict)     # ("People", "Ana", "Solo", "x.jpg") -> [items]
+
+    def children(self, prefix: tuple):
+        n = len(prefix)
+        for path, items in self.files.items():
+            if path[:n] == prefix:
+                yield path, items
+
+
+def list_remote_tree(cloud: CloudManager, root_id: str) -> RemoteTree:
+    """
+    List everything below root_id, one level at a time. Each query asks for
+    the children of up to PARENTS_PER_QUERY folders at once ('<id>' in
+    parents OR ...), so a tree of any width costs a handful of paged calls
+    and nothing outside the event folder is ever listed.
+    """
+    tree = RemoteTree()
+    pages = 0
+    level = [((), root_id)]
+    while level:
+        next_level = []
+        for i in range(0, len(level), PARENTS_PER_QUERY):
+            chunk = {folder_id: prefix for prefix, folder_id in level[i:i + PARENTS_PER_QUERY]}
+            parents = " or ".join(f"'{folder_id}' in parents" for folder_id in chunk)
+            page_token = None
+            while True:
+                results = cloud.service.files().list(
+                    q=f"trashed=false and ({parents})",
+                    fields=LIST_FIELDS,
+                    pageToken=page_token,
+                    pageSize=1000
+                ).execute()
+                pages += 1
+                for item in results.get("files", []):
+                    for parent in item.get("parents", []):
+                        if parent not in chunk:
+                            continue
+                        path = chunk[parent] + (item["name"],)
+                        if item["mimeType"] == FOLDER_MIME:
+                            tree.folders[path] = item["id"]
+                            next_level.append((path, item["id"]))
+                        else:
+                            tree.files.setdefault(path, []).append(item)
+                page_token = results.get("nextPageToken")
+                if not page_token:
+                    break
+        level = next_level
+
+    logger.info(f"Listed remote tree in {pages} page(s): {len(tree.folders)} folders, "
+                f"{sum(len(v) for v in tree.files.values())} files")
+    return tree
+
+
+# =============================================================================
+# Diff
+# =============================================================================
+@dataclass
+class SyncPlan:
+    uploads: list = field(default_factory=list)    # (file_hash, local_path)
+    replaces: list = field(default_factory=list)   # (file_hash, local_path, remote item)
+    links: list = field(default_factory=list)      # (local_path, file_hash)
+    deletes: list = field(default_factory=list)    # (path parts, remote item)
+    saved: dict = field(default_factory=dict)      # local_path -> bytes not uploaded thanks to its shortcut
+    in_sync: int = 0
+
+    @property
+    def bytes_saved(self) -> int:
+        return sum(self.saved.values())
+
+    @property
+    def empty(self) -> bool:
+        return not (self.uploads or self.replaces or self.links or self.deletes)
+
+    def print_diff(self, event_root: Path, limit: int = 20):
+        def show(sign, rows):
+            for row in rows[:limit]:
+                print(f"  {sign} {row}")
+            if len(rows) > limit:
+                print(f"  {sign} ... and {len(rows) - limit} more")
+
+        show("+", [f"{CONTENT_STORE_NAME}/{h[:12]}  ({p.name})" for h, p in self.uploads])
+        show("~", [f"{CONTENT_STORE_NAME}/{h[:12]}  ({p.name}, changed)" for h, p, _ in self.replaces])
+        show(">", [p.relative_to(event_root).as_posix() for p, _ in self.links])
+        show("-", ["/".join(path) + ("/" if item["mimeType"] == FOLDER_MIME else "")
+                   for path, item in self.deletes])
+        print(f"\n  {len(self.uploads)} to upload, {len(self.replaces)} changed, "
+              f"{len(self.links)} to link, {len(self.deletes)} stale, {self.in_sync} in sync")
+        print(f"  {self.bytes_saved:,} bytes saved by linking instead of re-uploading")
+
+
+def _matches(item: dict, size: int, md5: str) -> bool:
+    return item.get("md5Checksum") == md5 and int(item.get("size", -1)) == size
+
+
+def build_plan(config, tree: RemoteTree, groups: dict) -> SyncPlan:
+    """
+    Diff local People/ against the remote tree by name + size + md5Checksum.
+    Only People/ and the content store are reconciled; anything else under
+    the Drive root is left alone.
+    """
+    plan = SyncPlan()
+    md5_cache = {}
+
+    def local_md5(path):
+        if path not in md5_cache:
+            md5_cache[path] = compute_md5(path)
+        return md5_cache[path]
+
+    # Content store: one blob per unique hash
+    store = {}
+    for path, items in tree.children((CONTENT_STORE_NAME,)):
+        for item in items:
+            file_hash = Path(item["name"]).stem
+            if file_hash in groups and file_hash not in store:
+                store[file_hash] = item
+            else:
+                plan.deletes.append((path, item))  # no longer needed, or a duplicate
+
+    for file_hash, paths in groups.items():
+        blob = store.get(file_hash)
+        local = paths[0]
+        if blob is None:
+            plan.uploads.append((file_hash, local))
+            continue
+        variant = (blob.get("appProperties") or {}).get("variant", "original")
+        # Web derivatives differ from the local file by design; the
+        # --originals pass upgrades them.
+        if variant == "original" and not _matches(blob, local.stat().st_size, local_md5(local)):
+            plan.replaces.append((file_hash, local, blob))
+
+    # Person folders: one shortcut (or legacy plain copy) per routed file.
+    # Each new shortcut saves uploading that copy, except the one placement
+    # per newly uploaded blob whose bytes the upload itself pays for.
+    wanted = set()
+    uploading = {file_hash for file_hash, _ in plan.uploads}
+    for file_hash, paths in groups.items():
+        blob = store.get(file_hash)
+        paid = file_hash not in uploading
+        for local in paths:
+            rel = local.relative_to(config.event_root).parts
+            wanted.add(rel)
+            ok = False
+            for item in tree.files.get(rel, []):
+                if ok:
+                    plan.deletes.append((rel, item))  # duplicate upload of the same name
+                elif item["mimeType"] == SHORTCUT_MIME:
+                    target = (item.get("shortcutDetails") or {}).get("targetId")
+                    if blob is not None and target == blob["id"]:
+                        ok = True
+                    else:
+                        plan.deletes.append((rel, item))
+                elif _matches(item, local.stat().st_size, local_md5(local)):
+                    ok = True  # plain copy from an older sync, already correct
+                else:
+                    plan.deletes.append((rel, item))
+            if ok:
+                plan.in_sync += 1
+            else:
+                plan.links.append((local, file_hash))
+                plan.saved[local] = local.stat().st_size if paid else 0
+                paid = True
+
+    # Stale remote people/folders: trash the top-most folder that no longer
+    # exists locally instead of every file inside it.
+    people = config.people_dir.relative_to(config.event_root).parts
+    stale_folders = []
+    for path, folder_id in sorted(tree.folders.items(), key=lambda kv: len(kv[0])):
+        if path[:len(people)] != people or path == people:
+            continue
+        if any(path[:len(s)] == s for s in stale_folders):
+            continue
+        if not (config.event_root.joinpath(*path)).is_dir():
+            stale_folders.append(path)
+            plan.deletes.append((path, {"id": folder_id, "mimeType": FOLDER_MIME}))
+
+    for path, items in tree.children(people):
+        if path in wanted or any(path[:len(s)] == s for s in stale_folders):
+            continue
         for item in items:
-            delete_item(cloud, item)
+            plan.deletes.append((path, item))
+
+    return plan
+
+
+# =============================================================================
+# Apply
+# =============================================================================
+_thread_local = threading.local()
+
 
-        page_token = results.get('nextPageToken')
-        if not page_token:
-            break
+def _thread_http(cloud: CloudManager):
+    """
+    The Drive client's httplib2 transport is not thread-safe, so each
+    scheduler thread gets its own authorized connection.
+    """
+    http = getattr(_thread_local, "http", None)
+    if http is None:
+        import httplib2
+        from google_auth_httplib2 import AuthorizedHttp
+        http = AuthorizedHttp(cloud.service._http.credentials, http=httplib2.Http())
+        _thread_local.http = http
+    return http
 
-def delete_item(cloud: CloudManager, item):
-    """Try to trash an item. If it's a locked folder, empty it instead."""
-    item_id = item['id']
-    name = item['name']
-    mime_type = item['mimeType']
-    is_folder = (mime_type == 'application/vnd.google-apps.folder')
 
+def get_enrolled_folders() -> set:
+    """Folder names of persons that an enrolled guest has claimed."""
     try:
-        logger.info(f"Trashing {name}...")
-        cloud.service.files().update(
-            fileId=item_id, 
-            body={'trashed': True}
-        ).execute()
-        
+        conn = get_db().connect()
+        rows = conn.execute(
+            "SELECT p.name FROM persons p JOIN enrollments e ON e.person_id = p.id"
+        ).fetchall()
+        return {row[0] for row in rows}
     except Exception as e:
-        # Check for permission error
-        if "insufficientFilePermissions" in str(e) or "403" in str(e):
-            if is_folder:
-                logger.warning(f"Permission denied deleting folder '{name}'. Clearing contents instead...")
-                wipe_folder_contents(cloud, item_id)
-                logger.info(f"Folder '{name}' cleared (but kept due to permissions).")
-            else:
-                logger.error(f"Cannot delete file '{name}' due to permissions: {e}")
-        else:
-            logger.error(f"Failed to delete '{name}': {e}")
-
-def reupload_all_photos(config, cloud: CloudManager):
-    """Walk through EventRoot/People and upload all photos."""
-    people_dir = config.people_dir
-    
-    if not people_dir.exists():
-        logger.warning(f"People directory not found: {people_dir}")
-        return
+        logger.warning(f"Could not read enrollments, uploading without priority: {e}")
+        return set()
 
-    logger.info(f"Scanning {people_dir} for photos to upload...")
-    
-    count = 0
-    errors = 0
-    
-    # Walk through the directory
-    for file_path in people_dir.rglob("*"):
-        if file_path.is_file() and file_path.suffix.lower() in config.supported_extensions:
-            try:
-                # Calculate relative path for correct folder structure
-                success = cloud.upload_file(file_path, config.event_root)
-                if success:
-                    count += 1
-                else:
-                    errors += 1
-            except Exception as e:
-                logger.error(f"Failed to upload {file_path.name}: {e}")
-                errors += 1
 
-    logger.info(f"Upload complete! {count} files uploaded, {errors} errors.")
+def ensure_content_store(cloud: CloudManager, store_id: str = None) -> tuple:
+    """
+    Get (or create) the hidden content store under the Drive root.
+
+    The store folder itself is never shared: a link to it would expose every
+    guest's photos. Blobs are shared one by one (share_blobs) so a guest's
+    shortcuts can open their own targets. Older syncs granted anyone/reader
+    on the whole store; that grant is removed here.
+
+    Returns (store_id, revoked) where revoked says an old store-wide grant
+    was taken away, i.e. existing blobs lost their inherited access.
+    """
+    store_id = store_id or cloud.ensure_folder_path([CONTENT_STORE_NAME])
+    perms = cloud.service.permissions().list(fileId=store_id, fields="permissions(id, type)").execute()
+    revoked = False
+    for perm in perms.get("permissions", []):
+        if perm.get("type") == "anyone":
+            cloud.service.permissions().delete(fileId=store_id, permissionId=perm["id"]).execute()
+            revoked = True
+    if revoked:
+        logger.info("Removed the store-wide link sharing from the content store")
+    return store_id, revoked
+
+
+def share_blobs(cloud: CloudManager, file_ids) -> int:
+    """Give each blob its own read-only, link-only grant (batched). Returns error count."""
+    requests = [
+        cloud.service.permissions().create(
+            fileId=file_id,
+            body={"role": "reader", "type": "anyone", "allowFileDiscovery": False},
+        )
+        for file_id in file_ids
+    ]
+    return run_batched(cloud, requests, "Share") if requests else 0
+
+
+def upload_blob(cloud: CloudManager, store_id: str, file_hash: str, file_path: Path, variant: str = "original") -> str:
+    """
+    Upload one unique file into the content store, named by its hash.
+    `variant` is "web" for derivatives that the off-peak pass upgrades later.
+    """
+    from googleapiclient.http import MediaFileUpload
+
+    media = MediaFileUpload(str(file_path), resumable=True)
+    created = cloud.service.files().create(
+        body={
+            "name": f"{file_hash}{file_path.suffix.lower()}",
+            "parents": [store_id],
+            "appProperties": {"file_hash": file_hash, "variant": variant},
+        },
+        media_body=media,
+        fields="id"
+    ).execute(http=_thread_http(cloud))
+    return created["id"]
+
+
+def replace_blob(cloud: CloudManager, file_id: str, file_hash: str, file_path: Path, variant: str = "original"):
+    """Overwrite a stored blob in place; shortcuts pointing at it stay valid."""
+    from googleapiclient.http import MediaFileUpload
+
+    cloud.service.files().update(
+        fileId=file_id,
+        body={
+            "name": f"{file_hash}{file_path.suffix.lower()}",
+            "appProperties": {"variant": variant},
+        },
+        media_body=MediaFileUpload(str(file_path), resumable=True),
+        fields="id"
+    ).execute(http=_thread_http(cloud))
+
+
+def run_batched(cloud: CloudManager, requests: list, label: str) -> int:
+    """Send metadata-only requests through the Drive batch endpoint. Returns error count."""
+    errors = []
+
+    def callback(request_id, response, exception):
+        if exception is not None:
+            errors.append(exception)
+            logger.error(f"{label} failed: {exception}")
+
+    for i in range(0, len(requests), BATCH_SIZE):
+        batch = cloud.service.new_batch_http_request(callback=callback)
+        for request in requests[i:i + BATCH_SIZE]:
+            batch.add(request)
+        batch.execute()
+    return len(errors)
+
+
+def apply_plan(config, cloud: CloudManager, tree: RemoteTree, plan: SyncPlan,
+               scheduler: UploadScheduler, derivative: DerivativeSettings = None) -> dict:
+    """
+    Execute a sync plan: trash stale items, upload missing/changed blobs in
+    parallel through the scheduler, share each blob by link, then link them
+    into person folders.
+    """
+    derivative = derivative or DerivativeSettings(format="off")
+    stats = {"uploaded": 0, "replaced": 0, "linked": 0, "deleted": 0, "errors": 0,
+             "bytes_uploaded": 0, "bytes_original": 0, "bytes_saved": 0}
+
+    # 1. Stale items (batched trash, recoverable from Drive's bin)
+    if plan.deletes:
+        requests = [cloud.service.files().update(fileId=item["id"], body={"trashed": True})
+                    for _, item in plan.deletes]
+        failed = run_batched(cloud, requests, "Trash")
+        stats["deleted"] = len(requests) - failed
+        stats["errors"] += failed
+
+    # 2. Blobs
+    store_id, revoked = ensure_content_store(cloud, tree.folders.get((CONTENT_STORE_NAME,)))
+    trashed = {item["id"] for _, item in plan.deletes}
+    blob_ids = {}
+    unshared = set()    # kept blobs without their own link grant
+    for path, items in tree.children((CONTENT_STORE_NAME,)):
+        for item in items:
+            if item["id"] in trashed:
+                continue
+            blob_ids.setdefault(Path(item["name"]).stem, item["id"])
+            if revoked or LINK_PERMISSION_ID not in item.get("permissionIds", []):
+                unshared.add(item["id"])
+
+    # Encode web derivatives up front (in parallel) so the scheduler's
+    # rate limiter is charged the bytes actually sent.
+    upload_paths = {}
+    if derivative.enabled and plan.uploads:
+        cache_dir = config.event_root / "Admin" / "web_derivatives"
+        logger.info(f"Encoding {len(plan.uploads)} {derivative.format.upper()} derivatives...")
+        with ThreadPoolExecutor() as pool:
+            results = pool.map(lambda item: get_derivative(item[1], item[0], cache_dir, derivative), plan.uploads)
+            upload_paths = {h: web for (h, _), web in zip(plan.uploads, results) if web}
+
+    enrolled = get_enrolled_folders()
+    lock = threading.Lock()
+
+    def priority_for(local: Path) -> int:
+        person = local.relative_to(config.people_dir).parts[0]
+        return PRIORITY_ENROLLED if person in enrolled else PRIORITY_NORMAL
+
+    def make_upload(file_hash, local):
+        def job():
+            web_path = upload_paths.get(file_hash)
+            send = web_path or local
+            file_id = upload_blob(cloud, store_id, file_hash, send, variant="web" if web_path else "original")
+            with lock:
+                blob_ids[file_hash] = file_id
+                unshared.add(file_id)
+                stats["uploaded"] += 1
+                stats["bytes_uploaded"] += send.stat().st_size
+                stats["bytes_original"] += local.stat().st_size
+            return True
+        return job
+
+    def make_replace(file_hash, local, item):
+        def job():
+            replace_blob(cloud, item["id"], file_hash, local)
+            with lock:
+                stats["replaced"] += 1
+                stats["bytes_uploaded"] += local.stat().st_size
+                stats["bytes_original"] += local.stat().st_size
+            return True
+        return job
+
+    for file_hash, local in plan.uploads:
+        send = upload_paths.get(file_hash, local)
+        scheduler.submit(local, make_upload(file_hash, local), priority=priority_for(local),
+                         size=send.stat().st_size)
+    for file_hash, local, item in plan.replaces:
+        scheduler.submit(local, make_replace(file_hash, local, item), priority=priority_for(local))
+    scheduler.join()
+    stats["errors"] += scheduler.get_stats()["failed"]
+
+    # 3. Per-blob link sharing, so shortcuts in guests' folders can open
+    # their targets without the whole store being public
+    stats["errors"] += share_blobs(cloud, sorted(unshared))
+
+    # 4. Shortcuts into person folders (metadata only, so batched)
+    folder_ids = dict(tree.folders)
+    requests = []
+    for local, file_hash in plan.links:
+        target_id = blob_ids.get(file_hash)
+        if not target_id:
+            continue  # blob upload failed, already counted
+        stats["bytes_saved"] += plan.saved.get(local, 0)
+        parts = local.relative_to(config.event_root).parent.parts
+        if parts not in folder_ids:
+            folder_ids[parts] = cloud.ensure_folder_path(list(parts))
+        requests.append(cloud.service.files().create(
+            body={
+                "name": local.name,
+                "mimeType": SHORTCUT_MIME,
+                "parents": [folder_ids[parts]],
+                "shortcutDetails": {"targetId": target_id},
+            },
+            fields="id"
+        ))
+    if requests:
+        failed = run_batched(cloud, requests, "Link")
+        stats["linked"] = len(requests) - failed
+        stats["errors"] += failed
+
+    logger.info(
+        f"Sync complete! {stats['uploaded']} uploaded, {stats['replaced']} replaced, "
+        f"{stats['linked']} linked, {stats['deleted']} trashed, {stats['errors']} errors. "
+        f"{stats['bytes_uploaded']:,} bytes sent ({stats['bytes_original']:,} as full quality), "
+        f"{stats['bytes_saved']:,} bytes saved by linking instead of re-uploading."
+    )
+    return stats
+
+
+# =============================================================================
+# Off-peak originals pass
+# =============================================================================
+def upgrade_to_originals(config, cloud: CloudManager, tree: RemoteTree, scheduler: UploadScheduler) -> dict:
+    """
+    Off-peak pass: replace every web derivative in the content store with
+    the full-quality file. The Drive file id is kept, so the shortcuts in
+    guests' folders start serving the original without being touched.
+    """
+    stats = {"upgraded": 0, "errors": 0, "bytes_uploaded": 0}
+    web_blobs = {}
+    for path, items in tree.children((CONTENT_STORE_NAME,)):
+        for item in items:
+            if (item.get("appProperties") or {}).get("variant") == "web":
+                web_blobs[Path(item["name"]).stem] = item["id"]
+    if not web_blobs:
+        logger.info("All stored photos are already full quality.")
+        return stats
+
+    groups = group_by_content(config)
+    enrolled = get_enrolled_folders()
+    lock = threading.Lock()
+
+    def make_job(file_id, file_hash, original):
+        def job():
+            replace_blob(cloud, file_id, file_hash, original)
+            with lock:
+                stats["upgraded"] += 1
+                stats["bytes_uploaded"] += original.stat().st_size
+            return True
+        return job
+
+    for file_hash, file_id in web_blobs.items():
+        paths = groups.get(file_hash)
+        if not paths:
+            logger.warning(f"No local file for stored blob {file_hash[:12]}, skipping")
+            continue
+        person_names = {p.relative_to(config.people_dir).parts[0] for p in paths}
+        priority = PRIORITY_ENROLLED if person_names & enrolled else PRIORITY_NORMAL
+        scheduler.submit(paths[0], make_job(file_id, file_hash, paths[0]), priority=priority)
+
+    scheduler.join()
+    stats["errors"] = scheduler.get_stats()["failed"]
+    logger.info(f"Upgraded {stats['upgraded']} photos to full quality, "
+                f"{stats['bytes_uploaded']:,} bytes sent, {stats['errors']} errors.")
+    return stats
+
 
 def main():
+    parser = argparse.ArgumentParser(description="Reconcile the Drive folder with EventRoot/People.")
+    parser.add_argument("--dry-run", action="store_true", help="Only show the diff")
+    parser.add_argument("--yes", action="store_true", help="Apply the diff without asking")
+    parser.add_argument("--max-kbps", type=float, default=0,
+                        help="Upload rate cap in KB/s, leaving room for guests on the venue Wi-Fi (0 = no cap)")
+    parser.add_argument("--max-concurrency", type=int, default=6,
+                        help="Upper bound for adaptive upload concurrency")
+    parser.add_argument("--derivative", choices=["off"] + list(FORMATS), default="jpeg",
+                        help="Upload a web-optimized derivative instead of the full processed photo")
+    parser.add_argument("--max-dim", type=int, default=1600, help="Longest edge of the derivative")
+    parser.add_argument("--target-kb", type=int, default=400, help="Size target for the derivative")
+    parser.add_argument("--originals", action="store_true",
+                        help="Off-peak pass: replace uploaded derivatives with full-quality files")
+    args = parser.parse_args()
+
     print("=" * 60)
-    print("CLOUD RESET AND RE-UPLOAD TOOL (V2)")
+    print("CLOUD RECONCILE TOOL (V3)")
     print("=" * 60)
-    
+
     config = get_config()
     cloud = get_cloud()
-    
+
     if not cloud.is_enabled:
         print("X Cloud upload is not enabled.")
         return
-        
+
     root_folder_id = config.drive_root_folder_id
     if not root_folder_id:
         print("X DRIVE_ROOT_FOLDER_ID is not set.")
         return
 
     print(f"Target Cloud Folder ID: {root_folder_id}")
-    
-    if config.dry_run:
+    dry_run = args.dry_run or config.dry_run
+
+    if dry_run:
          print("DRY RUN MODE ENABLED.")
-    
-    print("\nStarting in 3 seconds...")
-    time.sleep(3)
-    
-    # 1. Clear Cloud
-    print("\nStep 1: Clearing Cloud Folder...")
-    if not config.dry_run:
-        wipe_folder_contents(cloud, root_folder_id)
-    else:
-        print("[DRY RUN] Would wipe folder contents.")
-        
-    # 2. Reset internal cache
-    cloud._folder_cache = {} 
-    
-    # 3. Re-upload
-    print("\nStep 2: Re-uploading Organized Photos...")
-    reupload_all_photos(config, cloud)
-    
+
+    scheduler = UploadScheduler(
+        max_bytes_per_sec=args.max_kbps * 1024,
+        max_concurrency=args.max_concurrency,
+        stats_path=Path(config.db_path).parent / "upload_stats.json",
+    )
+
+    print("\nStep 1: Listing cloud folder...")
+    tree = list_remote_tree(cloud, root_folder_id)
+
+    if args.originals:
+        print("\nUpgrading web derivatives to full-quality originals...")
+        if dry_run:
+            print("[DRY RUN] Would upload full-quality originals.")
+            return
+        scheduler.start()
+        try:
+            upgrade_to_originals(config, cloud, tree, scheduler)
+        finally:
+            scheduler.stop()
+        return
+
+    if not config.people_dir.exists():
+        print(f"X People directory not found: {config.people_dir}")
+        return
+
+    print("\nStep 2: Comparing with local photos...")
+    groups = group_by_content(config)
+    plan = build_plan(config, tree, groups)
+    plan.print_diff(config.event_root)
+
+    if plan.empty:
+        print("\nCloud is already in sync.")
+        return
+    if dry_run:
+        print("\n[DRY RUN] No changes made.")
+        return
+    if not args.yes:
+        confirm = input("\nApply these changes? (type 'y' to confirm): ")
+        if confirm.strip().lower() != "y":
+            print("X Sync aborted.")
+            return
+
+    print("\nStep 3: Applying changes...")
+    derivative = DerivativeSettings(
+        format=args.derivative,
+        max_dim=args.max_dim,
+        target_bytes=args.target_kb * 1024,
+    )
+    scheduler.start()
+    try:
+        stats = apply_plan(config, cloud, tree, plan, scheduler, derivative)
+    finally:
+        scheduler.stop()
+
+    print(f"\nBytes uploaded: {stats['bytes_uploaded']:,} "
+          f"(full quality would be {stats['bytes_original']:,})")
+    if derivative.enabled and stats["uploaded"]:
+        print("Run again with --originals off-peak to upload full-quality files.")
+
     print("\n" + "=" * 60)
     print("PROCESS COMPLETE")
     print("=" * 60)
@@ -1,8 +1,9 @@
 import os
 import sys
-import time
+import socket
 import multiprocessing
 import logging
+from importlib.util import find_spec
 from pathlib import Path
 
 # Setup logging
@@ -13,6 +14,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+BASE_DIR = Path(__file__).parent.resolve()
+BACKEND_DIR = BASE_DIR / "backend"
+SERVER_PORT = 8000
+WORKER_DRAIN_TIMEOUT = 25.0     # inside the worker's 30 s stop_timeout
+
 def run_backend_worker():
     """Start the photo processing background worker."""
     logger.info("Starting Backend Worker...")
@@ -22,7 +28,32 @@ def run_backend_worker():
     backend_dir = base_dir / "backend"
     sys.path.insert(0, str(backend_dir))
     
-    # Import and run worker main
+    from app.metrics import start_exporter
+    start_exporter("worker")
+    
+    # Load the face model and cloud client in the background while the
+    # worker sets up its folders and watcher
+    from app.warmup import start_warmup, WORKER_STAGES
+    start_warmup(WORKER_STAGES)
+    
+    if os.environ.get("CLAIM_MODE") == "1":
+        # Several workers share Incoming/; keep this one's photo leases alive
+        from app.leases import get_lease_manager
+        get_lease_manager().start_heartbeat()
+    
+    if os.environ.get("UPLOAD_QUEUE_SERVICE") == "1":
+        # The UploadQueue service owns uploads; don't run a second queue here
+        from app.config import get_config
+        get_config().upload_queue_enabled = False
+    
+    # On shutdown, let in-flight photos finish, then stop the worker the way
+    # Ctrl+C always has. Anything still in flight is recovered from the journal.
+    from app.journal import get_journal
+    from app.supervisor import interrupt_when_idle
+    interrupt_when_idle(lambda: bool(get_journal().in_flight()), timeout=WORKER_DRAIN_TIMEOUT)
+    
+    # Import and run worker main (it calls app.supervisor.notify_ready()
+    # once its watcher is running)
     from app.worker import main as worker_main
     worker_main()
 
@@ -38,54 +69,140 @@ def run_frontend_server():
     sys.path.insert(0, str(frontend_dir))
     sys.path.insert(0, str(backend_dir))
     
-    # Import app from server module
     import uvicorn
-    from server import app
     
-    # Run uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # WEB_WORKERS > 1 runs several server processes. uvicorn needs the import
+    # string (not the app object) to spawn them; shared state lives in the DB.
+    workers = max(1, int(os.environ.get("WEB_WORKERS", "1")))
+    if workers > 1:
+        # Each spawned process has its own registry; server.py's startup
+        # hook has to call start_exporter("server") in every one of them
+        logger.info(f"Starting {workers} web server workers")
+    else:
+        from app.metrics import start_exporter
+        start_exporter("server")
+    
+    uvicorn.run(
+        "server:app",
+        host="0.0.0.0",
+        port=SERVER_PORT,
+        workers=workers,
+        app_dir=str(frontend_dir),
+        timeout_keep_alive=15,
+    )
+
+def run_upload_queue():
+    """Cloud upload queue as its own service (UPLOAD_SERVICE=1)."""
+    from app.metrics import start_exporter
+    from app.supervisor import notify_ready, wait_for_stop
+    from app.upload_queue import get_upload_queue
+    
+    start_exporter("upload_queue")
+    upload_queue = get_upload_queue()
+    upload_queue.start()
+    notify_ready()
+    wait_for_stop()
+    upload_queue.stop()
+
+def run_whatsapp_sender():
+    """WhatsApp sender (WHATSAPP_SENDER=1), with its send metrics exported."""
+    from app.metrics import start_exporter
+    from whatsapp_tool.db_whatsapp_sender import main as sender_main
+    
+    start_exporter("whatsapp_sender")
+    sender_main()
+
+def _port_open(port: int) -> bool:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.settimeout(0.2)
+        return sock.connect_ex(("127.0.0.1", port)) == 0
+
+def build_services():
+    """
+    The services run.py supervises. Environment:
+        WORKERS=N          photo worker processes; N > 1 needs CLAIM_MODE=1, i.e. a
+                           worker that claims each photo through app.leases
+        UPLOAD_SERVICE=1   run the upload queue in its own process
+        WHATSAPP_SENDER=1  run the WhatsApp sender too
+    """
+    from app.supervisor import Service
+    
+    services = []
+    workers = max(1, int(os.environ.get("WORKERS", "1")))
+    claim_mode = os.environ.get("CLAIM_MODE") == "1"
+    if workers > 1 and not claim_mode:
+        # Without leases every worker would process every photo
+        raise SystemExit(f"WORKERS={workers} needs CLAIM_MODE=1 (see app.leases); refusing to start")
+    upload_service = os.environ.get("UPLOAD_SERVICE") == "1"
+    if upload_service and not find_spec("app.upload_queue"):
+        logger.warning("UPLOAD_SERVICE=1 but app.upload_queue is not installed, skipping")
+        upload_service = False
+    worker_names = []
+    for i in range(workers):
+        name = "BackendWorker" if workers == 1 else f"BackendWorker-{i + 1}"
+        worker_names.append(name)
+        services.append(Service(
+            name=name,
+            target="run:run_backend_worker",
+            env={
+                "WORKER_INDEX": str(i),
+                "CLAIM_MODE": "1" if claim_mode else "0",
+                "UPLOAD_QUEUE_SERVICE": "1" if upload_service else "0",
+            },
+            ready="notify",         # the worker's watcher is running
+            ready_timeout=120.0,    # first start loads the face model
+            drain=True,             # in-flight photos finish instead of staying 'processing'
+            stop_timeout=WORKER_DRAIN_TIMEOUT + 5,
+        ))
+    
+    if upload_service:
+        services.append(Service(
+            name="UploadQueue", target="run:run_upload_queue",
+            depends_on=(worker_names[0],), ready="notify", drain=True, stop_timeout=30.0,
+        ))
+    
+    if os.environ.get("WHATSAPP_SENDER") == "1":
+        if find_spec("whatsapp_tool.db_whatsapp_sender"):
+            services.append(Service(
+                name="WhatsAppSender", target="run:run_whatsapp_sender",
+                depends_on=(worker_names[0],), drain=False,
+            ))
+        else:
+            logger.warning("WHATSAPP_SENDER=1 but whatsapp_tool/db_whatsapp_sender.py is missing, skipping")
+    
+    services.append(Service(
+        name="FrontendServer",
+        target="run:run_frontend_server",
+        depends_on=tuple(worker_names),
+        ready=lambda: _port_open(SERVER_PORT),
+    ))
+    return services
 
 if __name__ == "__main__":
     multiprocessing.freeze_support()
+    sys.path.insert(0, str(BACKEND_DIR))
+    from app.supervisor import Supervisor
     
     logger.info("=" * 60)
     logger.info("  WEDDING FACE FORWARD - ALL-IN-ONE TRIAL RUN")
     logger.info("=" * 60)
     
-    # Create processes
-    backend_proc = multiprocessing.Process(target=run_backend_worker, name="BackendWorker")
-    frontend_proc = multiprocessing.Process(target=run_frontend_server, name="FrontendServer")
-    
+    supervisor = Supervisor(build_services(), backend_dir=str(BACKEND_DIR))
     try:
-        # Start backend first to ensure directories and DB are ready
-        backend_proc.start()
-        time.sleep(2)  # Give backend a moment to initialize
-        
-        # Start frontend
-        frontend_proc.start()
+        # Each service starts once the ones it depends on report ready
+        supervisor.start()
         
         logger.info("-" * 60)
         logger.info("  SYSTEM RUNNING!")
-        logger.info("  Web UI: http://localhost:8000")
+        logger.info(f"  Web UI: http://localhost:{SERVER_PORT}")
         logger.info("  Drop photos in: EventRoot/Incoming/")
         logger.info("  Press Ctrl+C to stop everything.")
         logger.info("-" * 60)
         
-        # Wait for both processes
-        while backend_proc.is_alive() and frontend_proc.is_alive():
-            time.sleep(1)
-            
+        # Crashed services are restarted with backoff; returns on Ctrl+C / SIGTERM
+        supervisor.run_forever()
     except KeyboardInterrupt:
         logger.info("Shutting down everything...")
     finally:
-        # Terminate processes
-        if backend_proc.is_alive():
-            backend_proc.terminate()
-        if frontend_proc.is_alive():
-            frontend_proc.terminate()
-        
-        # Join to cleanup
-        backend_proc.join(timeout=2)
-        frontend_proc.join(timeout=2)
-        
+        supervisor.shutdown()
         logger.info("All services stopped.")
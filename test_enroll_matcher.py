@@ -0,0 +1,110 @@
+"""
+Cancellation test for the batched enrollment matcher (app.enroll_matcher).
+
+A guest whose request times out or disconnects cancels its Future while
+the rest of the micro-batch is still waiting. Checks that:
+
+  * a selfie cancelled before its batch runs is never sent to the model,
+  * a selfie that times out while its batch is running does not fail the
+    other guests in the same batch,
+  * the matcher keeps serving afterwards.
+
+    python test_enroll_matcher.py
+"""
+
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "backend"))
+
+from app.enroll_matcher import EnrollMatcher
+
+EMBED_DIM = 512
+
+
+class SlowEmbedder:
+    """Returns person 0's centroid for every image after a fixed delay."""
+
+    def __init__(self, centroid: np.ndarray, delay: float):
+        self.centroid = centroid
+        self.delay = delay
+        self.seen = []
+
+    def embed_batch(self, images):
+        self.seen.append(len(images))
+        time.sleep(self.delay)
+        return [self.centroid.copy() for _ in images]
+
+
+def make_matcher(delay: float, max_wait_ms: float):
+    centroid = np.zeros(EMBED_DIM, dtype=np.float32)
+    centroid[0] = 1.0
+    embedder = SlowEmbedder(centroid, delay)
+    matcher = EnrollMatcher(
+        embedder_factory=lambda: embedder,
+        centroid_loader=lambda index: index.set([1], ["Person_001"], centroid[None, :]),
+        max_batch=8,
+        max_wait_ms=max_wait_ms,
+    )
+    matcher.start()
+    return matcher, embedder
+
+
+def image():
+    return np.zeros((4, 4, 3), dtype=np.uint8)
+
+
+def cancelled_before_batch() -> bool:
+    matcher, embedder = make_matcher(delay=0.05, max_wait_ms=300)
+    futures = [matcher.submit(image()) for _ in range(3)]
+    futures[1].cancel()
+    results = [f.result(timeout=5) for f in (futures[0], futures[2])]
+    matcher.stop()
+
+    ok = embedder.seen == [2] and all(r.person_id == 1 for r in results)
+    print(f"  Cancelled while queued: model saw batches {embedder.seen}, "
+          f"others matched: {[r.person_id for r in results]}  {'OK' if ok else 'FAIL'}")
+    return ok
+
+
+def cancelled_during_batch() -> bool:
+    matcher, embedder = make_matcher(delay=0.3, max_wait_ms=50)
+
+    async def guest(timeout):
+        fut = matcher.submit(image())
+        return await asyncio.wait_for(asyncio.wrap_future(fut), timeout)
+
+    async def crowd():
+        return await asyncio.gather(guest(5), guest(0.1), guest(5), return_exceptions=True)
+
+    results = asyncio.run(crowd())
+    after = matcher.submit(image()).result(timeout=5)
+    matcher.stop()
+
+    healthy = [results[0], results[2]]
+    ok = (isinstance(results[1], asyncio.TimeoutError)
+          and all(getattr(r, "person_id", None) == 1 for r in healthy)
+          and after.person_id == 1)
+    print(f"  Timed out mid-batch:    {[type(r).__name__ for r in results]}, "
+          f"next request matched: {after.person_id}  {'OK' if ok else 'FAIL'}")
+    return ok
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+    print("=" * 50)
+    print("ENROLL MATCHER CANCELLATION TEST")
+    print("=" * 50)
+    ok = cancelled_before_batch()
+    ok = cancelled_during_batch() and ok
+    print("\nPASS" if ok else "\nFAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
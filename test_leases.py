@@ -0,0 +1,129 @@
+"""
+Multi-process test for claim-based work distribution (app.leases).
+
+Starts several local worker processes that all pull from one pool of fake
+photos through a shared lease directory, the same way workers on two
+laptops share EventRoot/Admin/leases over SMB. One worker crashes while
+holding a lease. Checks that:
+
+  * every photo is processed,
+  * no photo is processed by two workers at the same time,
+  * the crashed worker's photo comes back after its lease expires.
+
+    python test_leases.py
+    python test_leases.py --workers 6 --photos 500
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "backend"))
+
+TTL = 1.0
+GRACE = 0.5
+
+
+def worker(index: int, root: str, keys: list, crash_after: int):
+    from app import leases as leases_mod
+    leases_mod.CLOCK_SKEW_GRACE = GRACE
+
+    root = Path(root)
+    manager = leases_mod.LeaseManager(root / "leases", ttl=TTL, node=f"node{index}")
+    manager.start_heartbeat()
+    rng = random.Random(index)
+    done_dir = root / "done"
+    claimed = 0
+
+    while True:
+        remaining = [k for k in keys if not (done_dir / k).exists()]
+        if not remaining:
+            break
+        rng.shuffle(remaining)
+        progressed = False
+        for key in remaining:
+            if (done_dir / key).exists() or not manager.claim(key):
+                continue
+            progressed = True
+            claimed += 1
+            if claimed == crash_after:
+                # Die holding the lease: no release, no heartbeat
+                os._exit(1)
+            started = time.time()
+            time.sleep(rng.uniform(0.005, 0.02))    # "process the photo"
+            with open(root / "log.txt", "a") as log:
+                log.write(f"{key} {index} {started:.6f} {time.time():.6f}\n")
+            (done_dir / key).touch()
+            manager.release(key)
+        if not progressed:
+            time.sleep(0.1)     # everything left is leased by someone else
+
+    manager.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lease-based work distribution test")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--photos", type=int, default=300)
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="wff_leases_"))
+    (root / "done").mkdir()
+    keys = [f"IMG_{i:05d}.jpg" for i in range(args.photos)]
+
+    print("=" * 50)
+    print("LEASE TEST")
+    print("=" * 50)
+    print(f"Workers: {args.workers}  photos: {args.photos}  ttl: {TTL}s  (worker 0 crashes)")
+
+    ctx = multiprocessing.get_context("spawn")
+    t0 = time.perf_counter()
+    procs = [
+        ctx.Process(target=worker, args=(i, str(root), keys, 10 if i == 0 else -1))
+        for i in range(args.workers)
+    ]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(timeout=120)
+    elapsed = time.perf_counter() - t0
+
+    runs = {}
+    for line in (root / "log.txt").read_text().splitlines():
+        key, who, start, end = line.split()
+        runs.setdefault(key, []).append((float(start), float(end), int(who)))
+
+    missing = [k for k in keys if k not in runs]
+    overlaps = []
+    for key, spans in runs.items():
+        spans.sort()
+        for (s1, e1, w1), (s2, e2, w2) in zip(spans, spans[1:]):
+            if s2 < e1:
+                overlaps.append((key, w1, w2))
+    per_worker = {}
+    for spans in runs.values():
+        for _, _, who in spans:
+            per_worker[who] = per_worker.get(who, 0) + 1
+    leftover = list((root / "leases").glob("*.lease"))
+
+    print(f"\nTime:              {elapsed:.1f}s")
+    print(f"Processed:         {len(runs)}/{args.photos}")
+    print(f"Per worker:        {dict(sorted(per_worker.items()))}")
+    print(f"Crashed worker:    exit code {procs[0].exitcode}")
+    print(f"Concurrent dupes:  {len(overlaps)}")
+    print(f"Leases left over:  {len(leftover)}")
+
+    ok = not missing and not overlaps and not leftover and procs[0].exitcode == 1
+    shutil.rmtree(root, ignore_errors=True)
+    print("\nPASS" if ok else "\nFAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
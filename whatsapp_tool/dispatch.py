@@ -0,0 +1,257 @@
+"""
+Concurrent, rate-limited WhatsApp dispatch.
+
+The sender used to work through guests one at a time and retried a failing
+number up to 3 times inline, so one bad number held up everybody behind it.
+DispatchScheduler instead:
+
+* caps the global send rate with a token bucket (messages/min, small burst)
+  so the account stays well under WhatsApp's bot-detection thresholds,
+* keeps up to `max_in_flight` sends running at once,
+* parks failed recipients in a timing wheel until their retry is due, so
+  they never block the ready queue. Retry counts and backoff come from
+  message_state: with a store attached, its `retries` column and
+  `next_attempt_at` decide, so the dispatcher and the store can't disagree.
+
+send_fn is the existing WhatsApp Web send coroutine. It should raise
+InvalidRecipient for numbers that are not on WhatsApp (never retried), and
+any other exception for transient failures.
+
+    scheduler = DispatchScheduler(send_whatsapp, state=MessageStateStore())
+    await scheduler.start()
+    for guest in await queue.get():          # notify_queue.NotificationQueue
+        scheduler.submit(guest["phone"], guest)
+"""
+
+import asyncio
+import logging
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+# Add backend and this folder to path (the sender also runs as whatsapp_tool.*)
+TOOL_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = TOOL_DIR.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+if str(TOOL_DIR) not in sys.path:
+    sys.path.insert(0, str(TOOL_DIR))
+
+from app.metrics import observe, set_gauge
+from app.upload_scheduler import TokenBucket
+from message_state import MAX_RETRIES, backoff_delay
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE_PER_MIN = 20
+DEFAULT_BURST = 3
+DEFAULT_IN_FLIGHT = 2
+
+
+class InvalidRecipient(Exception):
+    """The number is not on WhatsApp; retrying won't help."""
+
+
+@dataclass
+class DispatchJob:
+    recipient: str
+    payload: dict = field(default_factory=dict)
+    attempts: int = 0
+    last_error: str = ""
+
+
+class TimingWheel:
+    """
+    Hashed timing wheel: O(1) schedule, O(slot) per tick. Delays longer than
+    one revolution are kept in their slot with a remaining-rounds counter.
+    """
+
+    def __init__(self, tick: float = 1.0, slots: int = 128):
+        self.tick = tick
+        self.slots: List[List[list]] = [[] for _ in range(slots)]
+        self.cursor = 0
+        self.size = 0
+
+    def schedule(self, item, delay: float):
+        ticks = max(1, int(round(delay / self.tick)))
+        rounds, offset = divmod(ticks, len(self.slots))
+        slot = (self.cursor + offset) % len(self.slots)
+        if offset == 0:
+            rounds -= 1     # lands on the cursor slot one full revolution later
+        self.slots[slot].append([rounds, item])
+        self.size += 1
+
+    def advance(self) -> list:
+        """Move one tick forward and return items that became due."""
+        self.cursor = (self.cursor + 1) % len(self.slots)
+        bucket = self.slots[self.cursor]
+        due, keep = [], []
+        for entry in bucket:
+            if entry[0] <= 0:
+                due.append(entry[1])
+            else:
+                entry[0] -= 1
+                keep.append(entry)
+        self.slots[self.cursor] = keep
+        self.size -= len(due)
+        return due
+
+
+class DispatchScheduler:
+    def __init__(
+        self,
+        send_fn: Callable[[DispatchJob], Awaitable[None]],
+        state=None,
+        rate_per_min: float = DEFAULT_RATE_PER_MIN,
+        burst: int = DEFAULT_BURST,
+        max_in_flight: int = DEFAULT_IN_FLIGHT,
+        max_attempts: int = MAX_RETRIES,
+        backoff: Callable[[int], float] = backoff_delay,
+        wheel_tick: float = 1.0,
+    ):
+        self.send_fn = send_fn
+        self.state = state          # optional message_state.MessageStateStore
+        self.bucket = TokenBucket(rate_per_min / 60.0, burst)
+        self.max_in_flight = max_in_flight
+        self.max_attempts = max_attempts    # only used without a state store
+        self.backoff = backoff
+        self.wheel = TimingWheel(tick=wheel_tick)
+
+        self._ready: Deque[DispatchJob] = deque()
+        self._known: Dict[str, DispatchJob] = {}    # queued, in flight or waiting to retry
+        self._in_flight = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._sends: Set[asyncio.Task] = set()      # strong refs so running sends aren't collected
+        self._idle: Optional[asyncio.Event] = None
+        self.stats = {"sent": 0, "retried": 0, "invalid": 0, "gave_up": 0}
+
+    # ---- Public API ----
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._tasks = [
+            asyncio.create_task(self._dispatch_loop(), name="wa-dispatch"),
+            asyncio.create_task(self._wheel_loop(), name="wa-wheel"),
+        ]
+
+    async def stop(self):
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, recipient: str, payload: Optional[dict] = None) -> bool:
+        """Queue a message. Duplicates of a recipient already in the pipeline are ignored."""
+        if recipient in self._known:
+            return False
+        if self.state is not None and not self.state.should_send(recipient):
+            return False
+        job = DispatchJob(recipient, payload or {})
+        self._known[recipient] = job
+        self._ready.append(job)
+        self._idle.clear()
+        self._wakeup.set()
+        return True
+
+    async def join(self):
+        """Wait until every submitted recipient is sent or given up on."""
+        await self._idle.wait()
+
+    def pending(self) -> dict:
+        return {"ready": len(self._ready), "in_flight": self._in_flight, "waiting_retry": self.wheel.size}
+
+    # ---- Loops ----
+
+    async def _dispatch_loop(self):
+        while True:
+            if not self._ready or self._in_flight >= self.max_in_flight:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            wait = self.bucket.try_acquire(1)
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            job = self._ready.popleft()
+            set_gauge("queue_depth", len(self._ready), stage="whatsapp_send")
+            self._in_flight += 1
+            task = asyncio.create_task(self._send(job))
+            self._sends.add(task)
+            task.add_done_callback(self._sends.discard)
+
+    async def _wheel_loop(self):
+        next_tick = time.monotonic()
+        while True:
+            next_tick += self.wheel.tick
+            await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+            due = self.wheel.advance()
+            if due:
+                self._ready.extend(due)
+                self._wakeup.set()
+
+    async def _send(self, job: DispatchJob):
+        job.attempts += 1
+        started = time.perf_counter()
+        retry_in = None
+        try:
+            await self.send_fn(job)
+        except InvalidRecipient as e:
+            observe("whatsapp_send", time.perf_counter() - started, error=True)
+            self.stats["invalid"] += 1
+            self._record("mark_invalid", job.recipient, str(e) or "not on WhatsApp")
+        except Exception as e:
+            observe("whatsapp_send", time.perf_counter() - started, error=True)
+            job.last_error = str(e)
+            retry_in = self._retry_delay(job)
+            if retry_in is None:
+                self.stats["gave_up"] += 1
+                logger.warning(f"WhatsApp to {job.recipient} failed {job.attempts}x, giving up: {e}")
+            else:
+                self.stats["retried"] += 1
+        else:
+            observe("whatsapp_send", time.perf_counter() - started)
+            self.stats["sent"] += 1
+            self._record("mark_sent", job.recipient, job.payload.get("enrollment_id"))
+        finally:
+            self._in_flight -= 1
+            if retry_in is None:
+                self._finish(job)
+            else:
+                self.wheel.schedule(job, retry_in)
+            self._wakeup.set()
+
+    def _retry_delay(self, job: DispatchJob) -> Optional[float]:
+        """Seconds until the next attempt, or None to give up."""
+        if self.state is not None:
+            try:
+                status = self.state.record_failure(job.recipient, job.last_error)
+                row = self.state.get(job.recipient) or {}
+            except Exception as e:
+                logger.error(f"Could not record WhatsApp failure for {job.recipient}: {e}")
+            else:
+                job.attempts = row.get("retries", job.attempts)
+                if status != "failed":
+                    return None
+                return max(0.0, row.get("next_attempt_at", 0) - time.time())
+        if job.attempts >= self.max_attempts:
+            return None
+        return self.backoff(job.attempts)
+
+    def _record(self, method: str, *args):
+        """Persist a final state; a failed write is logged and the job still finishes."""
+        if self.state is None:
+            return
+        try:
+            getattr(self.state, method)(*args)
+        except Exception as e:
+            logger.error(f"Could not store WhatsApp state for {args[0]}: {e}")
+
+    def _finish(self, job: DispatchJob):
+        self._known.pop(job.recipient, None)
+        if not self._known:
+            self._idle.set()
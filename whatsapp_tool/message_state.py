@@ -0,0 +1,212 @@
+"""
+WhatsApp send state in SQLite.
+
+message_state_db.json was loaded and rewritten in full on every state
+change, so each update cost O(guests) and a crash mid-write could leave a
+truncated file. State now lives in the `whatsapp_messages` table of
+wedding.db: one row per phone number, and every transition is a single-row
+UPDATE in its own transaction.
+
+Statuses:
+    pending             waiting for its first (or next) attempt
+    sent                delivered, never send again
+    failed              last attempt failed; retried at next_attempt_at
+    invalid             number is not on WhatsApp, never retried
+    permanently_failed  gave up after max_retries attempts
+
+The first MessageStateStore() on a tree that still has the JSON file
+imports it once and renames it to message_state_db.json.imported.
+"""
+
+import json
+import logging
+import random
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+# Add backend to path
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.config import get_config
+
+logger = logging.getLogger(__name__)
+
+LEGACY_JSON = Path(__file__).resolve().parent / "message_state_db.json"
+
+MAX_RETRIES = 3
+BACKOFF_BASE = 30.0         # seconds before the first retry
+BACKOFF_MAX = 30 * 60.0
+
+TERMINAL = ("sent", "invalid", "permanently_failed")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS whatsapp_messages (
+    phone           TEXT PRIMARY KEY,
+    enrollment_id   INTEGER,
+    status          TEXT NOT NULL DEFAULT 'pending',
+    retries         INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    last_error      TEXT,
+    updated_at      REAL NOT NULL,
+    sent_at         REAL
+);
+CREATE INDEX IF NOT EXISTS idx_whatsapp_due ON whatsapp_messages(next_attempt_at)
+    WHERE status IN ('pending', 'failed');
+"""
+
+
+def backoff_delay(retries: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** max(0, retries - 1))))
+
+
+class MessageStateStore:
+    def __init__(self, db_path: Optional[Path] = None, max_retries: int = MAX_RETRIES,
+                 legacy_json: Optional[Path] = LEGACY_JSON):
+        self.db_path = Path(db_path or get_config().db_path)
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=10)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        if legacy_json is not None and Path(legacy_json).exists():
+            self.import_json(Path(legacy_json))
+
+    # ---- Queries ----
+
+    def get(self, phone: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM whatsapp_messages WHERE phone = ?", (phone,)).fetchone()
+        return dict(row) if row else None
+
+    def should_send(self, phone: str, now: Optional[float] = None) -> bool:
+        """Check-first guard: False for delivered/blacklisted numbers or retries not yet due."""
+        state = self.get(phone)
+        if state is None:
+            return True
+        if state["status"] in TERMINAL:
+            return False
+        return state["next_attempt_at"] <= (now if now is not None else time.time())
+
+    def due(self, now: Optional[float] = None, limit: int = 100) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM whatsapp_messages WHERE status IN ('pending', 'failed') "
+                "AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT ?",
+                (now if now is not None else time.time(), limit),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM whatsapp_messages GROUP BY status").fetchall()
+        return {status: n for status, n in rows}
+
+    # ---- Transitions (one row, one transaction) ----
+
+    def _write(self, sql: str, params: tuple):
+        with self._lock, self._conn:
+            self._conn.execute(sql, params)
+
+    def ensure(self, phone: str, enrollment_id: Optional[int] = None):
+        """Register a recipient as pending if we've never seen it."""
+        self._write(
+            "INSERT OR IGNORE INTO whatsapp_messages (phone, enrollment_id, updated_at) VALUES (?, ?, ?)",
+            (phone, enrollment_id, time.time()),
+        )
+
+    def mark_sent(self, phone: str, enrollment_id: Optional[int] = None):
+        now = time.time()
+        self._write(
+            "INSERT INTO whatsapp_messages (phone, enrollment_id, status, updated_at, sent_at) "
+            "VALUES (?, ?, 'sent', ?, ?) "
+            "ON CONFLICT(phone) DO UPDATE SET status = 'sent', last_error = NULL, "
+            "enrollment_id = COALESCE(excluded.enrollment_id, enrollment_id), "
+            "updated_at = excluded.updated_at, sent_at = excluded.sent_at",
+            (phone, enrollment_id, now, now),
+        )
+
+    def mark_invalid(self, phone: str, error: str = "not on WhatsApp"):
+        now = time.time()
+        self._write(
+            "INSERT INTO whatsapp_messages (phone, status, last_error, updated_at) VALUES (?, 'invalid', ?, ?) "
+            "ON CONFLICT(phone) DO UPDATE SET status = 'invalid', last_error = excluded.last_error, "
+            "updated_at = excluded.updated_at",
+            (phone, error, now),
+        )
+
+    def record_failure(self, phone: str, error: str = "") -> str:
+        """
+        Count a failed attempt. Schedules the next attempt with backoff, or
+        moves the number to permanently_failed after max_retries. A number
+        that is already sent/invalid/permanently_failed is left alone.
+        Returns the resulting status.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT status, retries FROM whatsapp_messages WHERE phone = ?", (phone,)).fetchone()
+            if row and row["status"] in TERMINAL:
+                return row["status"]
+            retries = (row["retries"] if row else 0) + 1
+            status = "permanently_failed" if retries >= self.max_retries else "failed"
+            next_at = now + backoff_delay(retries) if status == "failed" else 0
+            self._conn.execute(
+                "INSERT INTO whatsapp_messages (phone, status, retries, next_attempt_at, last_error, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(phone) DO UPDATE SET status = excluded.status, retries = excluded.retries, "
+                "next_attempt_at = excluded.next_attempt_at, last_error = excluded.last_error, "
+                "updated_at = excluded.updated_at "
+                f"WHERE status NOT IN ({', '.join('?' * len(TERMINAL))})",
+                (phone, status, retries, next_at, error[:500], now) + TERMINAL,
+            )
+        if status == "permanently_failed":
+            logger.warning(f"Giving up on {phone} after {retries} attempts: {error}")
+        return status
+
+    # ---- Migration ----
+
+    def import_json(self, path: Path) -> int:
+        """
+        One-time import of message_state_db.json. Accepts both
+        {"+91...": "sent"} and {"+91...": {"status": ..., "retries": ...}}.
+        Rows already in the table win. The file is renamed afterwards.
+        """
+        try:
+            data = json.loads(path.read_text(encoding="utf-8") or "{}")
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read {path.name}, not importing: {e}")
+            return 0
+
+        now = time.time()
+        rows = []
+        for phone, state in (data.items() if isinstance(data, dict) else []):
+            if isinstance(state, str):
+                state = {"status": state}
+            elif not isinstance(state, dict):
+                continue
+            status = state.get("status", "pending")
+            if status not in TERMINAL + ("pending", "failed"):
+                status = "failed"
+            retries = int(state.get("retries", state.get("attempts", 0)) or 0)
+            if status == "failed" and retries >= self.max_retries:
+                status = "permanently_failed"
+            rows.append((phone, status, retries, state.get("error") or state.get("last_error"), now))
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO whatsapp_messages (phone, status, retries, last_error, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        path.replace(path.with_name(path.name + ".imported"))
+        logger.info(f"Imported {len(rows)} WhatsApp states from {path.name}")
+        return len(rows)
+
+    def close(self):
+        self._conn.close()
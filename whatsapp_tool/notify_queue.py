@@ -0,0 +1,144 @@
+"""
+Event-driven notification queue for the WhatsApp sender.
+
+Replaces the `while True: fetch_enrolled_users(); await asyncio.sleep(10)`
+loop in db_whatsapp_sender.py. That loop reread the enrollments table and
+message_state_db.json every 10 seconds whether or not anything had changed.
+
+The queue reads the ready backlog at startup. After that it mostly
+touches the DB only when a `whatsapp_ready` event arrives from the
+enrollment or upload-complete path (see app.whatsapp_readiness). Events
+reach the sender within the event bus flush interval (250 ms), so a send
+starts well under a second after a guest's folder becomes shareable.
+
+Events are best effort, so the backlog is also reread when the bus reports
+lost events, and every SWEEP_INTERVAL as a safety net. Guests handed out by
+get() are not handed out again until they are marked notified, requeued, or
+CLAIM_TIMEOUT passes without either.
+
+Sender main loop:
+
+    queue = NotificationQueue()
+    await queue.start()
+    while True:
+        for guest in await queue.get():
+            ok = await send_whatsapp(guest["phone"], build_message(guest))
+            if ok:
+                queue.mark_notified(guest["enrollment_id"])
+            else:
+                queue.requeue(guest["enrollment_id"])
+"""
+
+import asyncio
+import logging
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Add backend to path
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.config import get_config
+from app.events import get_event_listener, needs_resync
+from app.whatsapp_readiness import READY_EVENT, fetch_ready, mark_notified
+
+logger = logging.getLogger(__name__)
+
+SWEEP_INTERVAL = 45.0       # full backlog reread, in case a ready event was lost
+RETRY_DELAY = 60.0          # requeued guests come back after this
+CLAIM_TIMEOUT = 600.0       # a guest handed out and never resolved is offered again
+
+
+class NotificationQueue:
+    def __init__(self, db_path: Optional[Path] = None, sweep_interval: float = SWEEP_INTERVAL):
+        self.db_path = Path(db_path or get_config().db_path)
+        self.sweep_interval = sweep_interval
+        self._conn: Optional[sqlite3.Connection] = None
+        self._ids: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listener = get_event_listener()
+        self._sweeper: Optional[asyncio.Task] = None
+        self._claimed: Dict[int, float] = {}    # enrollment_id -> when get() handed it out
+        self._queries = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=10)
+        return self._conn
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._ids = asyncio.Queue()
+        self._listener.add_callback(self._on_batch)
+        self._listener.start()
+        self._ids.put_nowait(None)      # None = full backlog read
+        self._sweeper = asyncio.create_task(self._sweep_loop(), name="wa-notify-sweep")
+        logger.info("WhatsApp notification queue listening for ready guests")
+
+    def stop(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        self._listener.remove_callback(self._on_batch)
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _on_batch(self, batch: dict):
+        # Runs on the event listener thread
+        ids = []
+        for event in batch.get("events", []):
+            if event.get("type") == READY_EVENT:
+                ids.extend(event.get("data", {}).get("enrollment_ids", []))
+        if needs_resync(batch):
+            # Events were dropped under load or lost; reread the backlog once
+            self._loop.call_soon_threadsafe(self._ids.put_nowait, None)
+        elif ids:
+            self._loop.call_soon_threadsafe(self._ids.put_nowait, ids)
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            self._ids.put_nowait(None)
+
+    async def get(self) -> List[dict]:
+        """Wait for guests that became ready; coalesces whatever is already queued."""
+        first = await self._ids.get()
+        full = first is None
+        ids = set(first or [])
+        while not self._ids.empty():
+            more = self._ids.get_nowait()
+            if more is None:
+                full = True
+            else:
+                ids.update(more)
+
+        self._queries += 1
+        guests = await asyncio.to_thread(fetch_ready, self._db(), None if full else ids)
+        now = time.monotonic()
+        fresh = []
+        for guest in guests:
+            claimed_at = self._claimed.get(guest["enrollment_id"])
+            if claimed_at is not None and now - claimed_at < CLAIM_TIMEOUT:
+                continue    # being sent right now
+            self._claimed[guest["enrollment_id"]] = now
+            fresh.append(guest)
+        return fresh
+
+    def mark_notified(self, enrollment_id: int):
+        mark_notified(self._db(), enrollment_id)
+        self._claimed.pop(enrollment_id, None)
+
+    def requeue(self, enrollment_id: int, delay: float = RETRY_DELAY):
+        """A send failed: offer this guest again after `delay` seconds."""
+        # Held back from sweeps until the delay is over
+        self._claimed[enrollment_id] = time.monotonic() - CLAIM_TIMEOUT + delay
+        self._loop.call_later(delay, self._ids.put_nowait, [enrollment_id])
+
+    @property
+    def query_count(self) -> int:
+        """DB reads since start; stays flat while nothing changes."""
+        return self._queries